@@ -85,6 +85,55 @@ DATABASES = {
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/6.0/topics/cache/
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+}
+
+# Analitika grafiklari keshi uchun CACHES alias. Bir nechta worker bo‘lsa,
+# umumiy backend (FileBasedCache / DatabaseCache / Redis) tanlang.
+FINANCE_ANALYTICS_CACHE = 'default'
+
+# Kichik ma'lumotnoma keshlari uchun CACHES alias (byudjetli va transfer kategoriyalari, formalar tanlovlari).
+# Signal tozalashi faqat shu jarayon keshiga yetadi: bir nechta worker bo‘lsa umumiy backend
+# tanlang; TIMEOUT — boshqa worker’dagi o‘zgarish eng ko‘pi bilan qancha kechikib ko‘rinishi (s).
+FINANCE_LOOKUP_CACHE = 'default'
+FINANCE_LOOKUP_CACHE_TIMEOUT = 300
+
+# ASGI (uvicorn/daphne) ostida ishlaganda True qiling: dashboard, oylik hisobot, analitika
+# va profil async view’larga ulanadi (config/asgi.py). WSGI uchun sync variantlar tezroq.
+FINANCE_ASYNC_VIEWS = False
+
+# Dashboard, oylik hisobot, analitika va profil sahifalari keshi (finance/page_cache.py).
+# Kalitda foydalanuvchi ma'lumotlari versiyasi bor — o‘zgarishda eski sahifa qaytmaydi.
+FINANCE_PAGE_CACHE = 'default'
+FINANCE_PAGE_CACHE_TIMEOUT = 600
+
+# So‘rov metrikalari (finance/metrics.py): Server-Timing sarlavhasi va /metrics (staff).
+# Yoqilganda quyidagi byudjetdan ko‘p SQL so‘rov qilgan view log’ga yoziladi;
+# FINANCE_QUERY_BUDGET_STRICT = True bo‘lsa (testlar) xato ko‘tariladi.
+FINANCE_METRICS = False
+FINANCE_QUERY_BUDGET_STRICT = False
+FINANCE_QUERY_BUDGETS = {
+    'finance:dashboard': 10,
+    'finance:monthly_report': 6,
+    'finance:analytics': 8,
+    'users:profile': 7,
+    'finance:api_transactions': 5,
+    'finance:api_accounts': 5,
+    'finance:api_monthly_summary': 5,
+    'finance:api_analytics': 6,
+}
+
+if FINANCE_METRICS:
+    MIDDLEWARE.insert(0, 'finance.metrics.QueryMetricsMiddleware')
+    TEMPLATES[0]['BACKEND'] = 'finance.metrics.TimedDjangoTemplates'
+
+
 # Password validation
 # https://docs.djangoproject.com/en/6.0/ref/settings/#auth-password-validators
 
@@ -5,8 +5,8 @@ from django.contrib import admin, messages
 from django.urls import path
 from django.shortcuts import redirect
 
-from .models import ExchangeRate
-from finance.services.cbu import update_usd_uzs
+from .models import Budget, ExchangeRate, RateRefreshJob, RecurringTransaction
+from finance.services import rate_jobs
 
 @admin.register(ExchangeRate)
 class ExchangeRateAdmin(admin.ModelAdmin):
@@ -21,17 +21,45 @@ class ExchangeRateAdmin(admin.ModelAdmin):
         ]
         return custom + urls
 
-    def update_from_cbu(self, request):
-        try:
-            obj, created = update_usd_uzs()
-            msg = f"CBU’dan yangilandi: 1 {obj.base} = {obj.rate} {obj.quote} ({obj.date})"
-            self.message_user(request, msg, level=messages.SUCCESS)
-        except Exception as e:
-            self.message_user(request, f"Xatolik: {e}", level=messages.ERROR)
+    def changelist_view(self, request, extra_context=None):
+        extra_context = {**(extra_context or {}), "rate_job": rate_jobs.latest()}
+        return super().changelist_view(request, extra_context=extra_context)
 
+    def update_from_cbu(self, request):
+        # tarmoqqa so‘rov admin oqimida emas, run_rate_jobs worker’ida bajariladi
+        job, created = rate_jobs.enqueue(request.user)
+        if created:
+            msg = f"CBU yangilash navbatga qo‘yildi (#{job.pk}). Natija shu sahifada ko‘rinadi."
+        else:
+            msg = f"CBU yangilash allaqachon navbatda (#{job.pk}, {job.get_status_display()})."
+        self.message_user(request, msg, level=messages.INFO)
         return redirect("..")
 
 
+@admin.register(RateRefreshJob)
+class RateRefreshJobAdmin(admin.ModelAdmin):
+    list_display = ("id", "kind", "status", "requested_by", "created_at", "finished_at", "rows", "message")
+    list_filter = ("status", "kind")
+    readonly_fields = [f.name for f in RateRefreshJob._meta.fields]
+
+    def has_add_permission(self, request):
+        return False
+
+
+@admin.register(RecurringTransaction)
+class RecurringTransactionAdmin(admin.ModelAdmin):
+    list_display = ("id", "user", "type", "amount", "account", "frequency", "interval", "next_date", "active")
+    list_filter = ("active", "frequency", "type")
+    readonly_fields = ("occurrences", "next_date")
+
+
+@admin.register(Budget)
+class BudgetAdmin(admin.ModelAdmin):
+    list_display = ("id", "user", "category", "month", "currency", "limit", "spent")
+    list_filter = ("month", "currency")
+    readonly_fields = ("spent",)
+
+
 admin.site.register(Account)
 admin.site.register(Category)
 admin.site.register(Transaction)
@@ -0,0 +1,186 @@
+"""
+JSON API (sessiya orqali autentifikatsiya). GET javoblari foydalanuvchining LedgerVersion’idan
+olingan ETag/Last-Modified bilan qaytadi — o‘zgarish bo‘lmasa mijoz 304 oladi va hech narsa hisoblanmaydi.
+"""
+import json
+from decimal import Decimal
+from functools import wraps
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db.models import Sum
+from django.http import JsonResponse
+from django.urls import reverse
+from django.utils.translation import gettext
+from django.views.decorators.http import condition, require_GET, require_POST
+
+from .models import Account, AccountRollup
+from . import metrics as request_metrics, page_cache
+from .services import analytics as analytics_service, ledger, search, transfers, versions
+from .services.pagination import keyset_page, page_size
+from .services.totals import ZERO
+from .views import _analytics_params, _dashboard_filters
+
+API_VERSION = 1
+
+
+def api_login_required(view):
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if not request.user.is_authenticated:
+            return JsonResponse({"errors": {"__all__": [gettext("Avval tizimga kiring.")]}}, status=401)
+        return view(request, *args, **kwargs)
+    return wrapper
+
+
+def _version(request):
+    # condition() ETag va Last-Modified uchun ikki marta so‘raydi — bitta so‘rovda bir marta o‘qiymiz
+    if not hasattr(request, "_ledger_version"):
+        request._ledger_version = versions.current(request.user)
+    return request._ledger_version
+
+
+def _etag(request, *args, **kwargs):
+    v = _version(request)
+    return f"{API_VERSION}-{v.user_id}-{v.version}"
+
+
+def _last_modified(request, *args, **kwargs):
+    return _version(request).changed_at
+
+
+def versioned(view):
+    """Login + GET + LedgerVersion bo‘yicha shartli javob (304)."""
+    return api_login_required(require_GET(condition(etag_func=_etag, last_modified_func=_last_modified)(view)))
+
+
+def _money(value):
+    # SQLite’da yig‘indilar masshtabsiz qaytadi (Decimal("70")) — javobda doim 2 xona
+    return (value or ZERO).quantize(Decimal("0.01"))
+
+
+def transaction_json(t):
+    return {
+        "id": t.pk,
+        "date": t.date.isoformat(),
+        "type": t.type,
+        "amount": t.amount,
+        "currency": t.account.currency,
+        "account": t.account_id,
+        "category": t.category.name,
+        "category_id": t.category_id,
+        "note": t.note,
+        "url": reverse("finance:transaction_detail", args=[t.pk]),
+    }
+
+
+@versioned
+def transactions(request):
+    """?q=&start=&end=&order=&size=&cursor= — dashboard bilan bir xil filtrlar, kursorli sahifalash."""
+    qs, filters = _dashboard_filters(request)
+    page = keyset_page(
+        qs.select_related("account", "category"), filters["order"],
+        request.GET.get("cursor"), page_size(request.GET.get("size")),
+    )
+    return JsonResponse({
+        "results": [transaction_json(t) for t in page],
+        "next_cursor": page.next_cursor,
+    })
+
+
+@versioned
+def accounts(request):
+    rows = ledger.with_ledger_balances(Account.objects.filter(user=request.user)).order_by("id")
+    return JsonResponse({"results": [
+        {
+            "id": a.pk,
+            "name": a.name,
+            "type": a.type,
+            "currency": a.currency,
+            "income": _money(a.calculated_income),
+            "expense": _money(a.calculated_expense),
+            "balance": _money(a.calculated_balance),
+        }
+        for a in rows
+    ]})
+
+
+@versioned
+def monthly_summary(request):
+    """?year= — AccountRollup’dan oy va valyuta bo‘yicha kirim/chiqim (tranzaksiyalarni skanerlamaydi)."""
+    year, _currency = _analytics_params(request)
+    rows = (
+        AccountRollup.objects
+        .filter(account__user=request.user, month__year=year)
+        .values("month", "account__currency")
+        .annotate(income=Sum("income"), expense=Sum("expense"))
+        .order_by("month", "account__currency")
+    )
+    return JsonResponse({"year": year, "results": [
+        {
+            "month": r["month"].strftime("%Y-%m"),
+            "currency": r["account__currency"],
+            "income": _money(r["income"]),
+            "expense": _money(r["expense"]),
+            "balance": _money(r["income"]) - _money(r["expense"]),
+        }
+        for r in rows
+    ]})
+
+
+@versioned
+def analytics(request):
+    year, currency = _analytics_params(request)
+    return JsonResponse({
+        "year": year,
+        "currency": currency,
+        **analytics_service.yearly_series(request.user.id, year, currency),
+    })
+
+
+@api_login_required
+def transaction_search(request):
+    """Qidiruv maydoni uchun avtoto‘ldirish: eng mos 10 ta tranzaksiya."""
+    results = search.ranked(request.user, request.GET.get("q", ""), limit=10)
+    return JsonResponse({"results": [transaction_json(t) for t in results]})
+
+
+def _batch(request, key, create):
+    try:
+        items = json.loads(request.body)[key]
+        if not isinstance(items, list) or not all(isinstance(item, dict) for item in items):
+            raise TypeError
+    except (ValueError, KeyError, TypeError):
+        return JsonResponse({"errors": {"__all__": [gettext("Noto‘g‘ri JSON: “%s” ro‘yxati kutilgan.") % key]}}, status=400)
+    try:
+        objs = create(request.user, items)
+    except ValidationError as e:
+        return JsonResponse({"errors": e.message_dict}, status=400)
+    return JsonResponse({"created": [obj.pk for obj in objs]}, status=201)
+
+
+@api_login_required
+@require_POST
+def transfer_batch(request):
+    """POST {"transfers": [{"from_account": id, "to_account": id, "amount_from": "100", "date": "2026-01-31", ...}]}"""
+    return _batch(request, "transfers", transfers.create_transfers)
+
+
+@api_login_required
+@require_POST
+def transaction_batch(request):
+    """POST {"transactions": [{"type": "EX", "account": id, "category": id, "amount": "100", "date": "2026-01-31"}]}"""
+    return _batch(request, "transactions", transfers.create_transactions)
+
+
+@api_login_required
+@require_GET
+def metrics(request):
+    """Staff uchun: URL nomi bo‘yicha so‘rov metrikalari (shu jarayon) va sahifa keshi statistikasi."""
+    if not request.user.is_staff:
+        return JsonResponse({"errors": {"__all__": [gettext("Ruxsat yo‘q.")]}}, status=403)
+    return JsonResponse({
+        "enabled": getattr(settings, "FINANCE_METRICS", False),
+        "views": request_metrics.snapshot(),
+        "page_cache": page_cache.stats(),
+    })
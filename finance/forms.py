@@ -1,6 +1,91 @@
 from django import forms
+from django.contrib.auth.models import User
+from django.core.exceptions import ValidationError
+from django.db.models import Exists, OuterRef
 from django.utils.translation import gettext_lazy as _
-from .models import Account, Category, Transaction, Comment, Transfer
+from .models import Account, Budget, Category, Transaction, Comment, Transfer, RecurringTransaction
+from .services import choices, search
+from .services.transfers import TRANSFER_CATEGORIES
+from .services.importer import FORMATS, STATEMENT
+from .services.pagination import DEFAULT_ORDER, MAX_PK, ORDERINGS
+
+
+class CachedModelChoiceField(forms.ChoiceField):
+    """
+    ModelChoiceField o‘rniga: variantlar oldindan yuklangan obyektlardan (services.choices keshi),
+    tanlov ro‘yxatdan pk bo‘yicha topiladi — queryset va bazaga murojaat yo‘q.
+    """
+
+    def __init__(self, *, objects=(), label_from_instance=str, empty_label="---------", **kwargs):
+        self.label_from_instance = label_from_instance
+        self.empty_label = empty_label
+        super().__init__(**kwargs)
+        self.objects = objects
+
+    @property
+    def objects(self):
+        return list(self._objects.values())
+
+    @objects.setter
+    def objects(self, objects):
+        self._objects = {str(obj.pk): obj for obj in objects}
+        empty = [("", self.empty_label)] if self.empty_label is not None else []
+        self.choices = empty + [(obj.pk, self.label_from_instance(obj)) for obj in self._objects.values()]
+
+    def prepare_value(self, value):
+        return getattr(value, "pk", value)
+
+    def to_python(self, value):
+        if value in self.empty_values:
+            return None
+        obj = self._objects.get(str(self.prepare_value(value)))
+        if obj is None:
+            raise ValidationError(self.error_messages["invalid_choice"], code="invalid_choice", params={"value": value})
+        return obj
+
+    def validate(self, value):
+        # tanlov to_python()da tekshirildi; ChoiceField.valid_value() satrlarni solishtiradi
+        forms.Field.validate(self, value)
+
+    def has_changed(self, initial, data):
+        return str(self.prepare_value(initial) or "") != str(data or "")
+
+
+class CachedChoicesMixin:
+    """
+    CachedModelChoiceField maydonlari uchun model.full_clean() FK mavjudligini qayta so‘ramaydi
+    (ForeignKey.validate() har bir FK uchun SELECT qiladi). O‘rniga clean() tanlangan obyektlar
+    hali bazada borligi va self.user’ga tegishliligini bitta so‘rov bilan tekshiradi: kesh boshqa
+    worker’da o‘chirilgan obyektni eslab qolgan bo‘lsa, save() IntegrityError bermaydi — forma xatosi
+    chiqadi va kesh tozalanadi.
+    """
+
+    def _get_validation_exclusions(self):
+        exclude = super()._get_validation_exclusions()
+        exclude.update(name for name, field in self.fields.items() if isinstance(field, CachedModelChoiceField))
+        return exclude
+
+    def clean(self):
+        cleaned = super().clean()
+        user = getattr(self, "user", None)
+        selected = [
+            (name, cleaned[name]) for name, field in self.fields.items()
+            if isinstance(field, CachedModelChoiceField) and cleaned.get(name) is not None
+        ]
+        if user is None or not selected:
+            return cleaned
+        checks = {
+            f"{name}_exists": Exists(type(obj)._base_manager.filter(pk=obj.pk, user_id=OuterRef("pk")))
+            for name, obj in selected
+        }
+        found = User.objects.filter(pk=user.pk).values(**checks).first() or {}
+        for name, obj in selected:
+            if not found.get(f"{name}_exists"):
+                choices.invalidate(type(obj), user.pk)
+                self.add_error(name, ValidationError(
+                    self.fields[name].error_messages["invalid_choice"], code="invalid_choice", params={"value": obj.pk}
+                ))
+        return cleaned
 
 
 class AccountForm(forms.ModelForm):
@@ -51,16 +136,21 @@ class CategoryForm(forms.ModelForm):
         }
 
 
-class TransactionForm(forms.ModelForm):
+def _account_label(acc):
+    return f"{acc.get_type_display()} - {acc.get_currency_display()}"
+
+
+class TransactionForm(CachedChoicesMixin, forms.ModelForm):
     currency = forms.ChoiceField(choices=Account.CURRENCY, required=True, label=_("Valyuta"))
+    category = CachedModelChoiceField(label=_("Kategoriya"))
+    # bo‘sh variantsiz: shablondagi skript valyuta bo‘yicha birinchi mos hisobni tanlaydi
+    account = CachedModelChoiceField(label=_("Hisob"), label_from_instance=_account_label, empty_label=None)
 
     class Meta:
         model = Transaction
         fields = ["type", "category", "currency", "account", "amount", "date", "note"]
         labels = {
             "type": _("Turi"),
-            "category": _("Kategoriya"),
-            "account": _("Hisob"),
             "amount": _("Summa"),
             "date": _("Sana"),
             "note": _("Izoh (note)"),
@@ -71,19 +161,18 @@ class TransactionForm(forms.ModelForm):
         self.user = kwargs.pop("user", None)
         super().__init__(*args, **kwargs)
 
+        accounts = choices.accounts(self.user) if self.user else []
         if self.user:
-            self.fields["category"].queryset = Category.objects.filter(user=self.user)
-            self.fields["account"].queryset = Account.objects.filter(user=self.user)
+            self.fields["category"].objects = choices.categories(self.user)
         if self.instance and self.instance.pk and self.instance.account_id:
-            self.fields["currency"].initial = self.instance.account.currency
+            # instance.account so‘ramasdan: valyuta keshdagi hisobdan
+            current = next((a for a in accounts if a.pk == self.instance.account_id), None)
+            if current:
+                self.fields["currency"].initial = current.currency
         cur = self.data.get("currency")
-        if cur and self.user:
-            self.fields["account"].queryset = Account.objects.filter(user=self.user, currency=cur)
-        choices = []
-        for acc in self.fields["account"].queryset:
-            label = f"{acc.get_type_display()} - {acc.get_currency_display()}"
-            choices.append((acc.pk, label))
-        self.fields["account"].choices = choices
+        if cur:
+            accounts = [a for a in accounts if a.currency == cur]
+        self.fields["account"].objects = accounts
 
     def clean(self):
         cleaned = super().clean()
@@ -106,13 +195,14 @@ class CommentForm(forms.ModelForm):
         labels = {"text": _("Izoh matni")}
 
 
-class TransferForm(forms.ModelForm):
+class TransferForm(CachedChoicesMixin, forms.ModelForm):
+    from_account = CachedModelChoiceField(label=_("Qayerdan"))
+    to_account = CachedModelChoiceField(label=_("Qayerga"))
+
     class Meta:
         model = Transfer
         fields = ["from_account", "to_account", "amount_from", "amount_to", "rate", "date", "note"]
         labels = {
-            "from_account": _("Qayerdan"),
-            "to_account": _("Qayerga"),
             "amount_from": _("Yuborilgan summa"),
             "amount_to": _("Qabul qilingan summa"),
             "rate": _("Kurs"),
@@ -125,9 +215,11 @@ class TransferForm(forms.ModelForm):
         self.user = kwargs.pop("user", None)
         super().__init__(*args, **kwargs)
         if self.user:
-            qs = Account.objects.filter(user=self.user)
-            self.fields["from_account"].queryset = qs
-            self.fields["to_account"].queryset = qs
+            # Transfer.clean() hisoblar egasini instance.user bilan solishtiradi
+            self.instance.user = self.user
+            accounts = choices.accounts(self.user)
+            self.fields["from_account"].objects = accounts
+            self.fields["to_account"].objects = accounts
 
     def clean(self):
         cleaned = super().clean()
@@ -136,3 +228,173 @@ class TransferForm(forms.ModelForm):
         if fa and ta and fa.id == ta.id:
             self.add_error("to_account", _("Bir xil hisob tanlab bo‘lmaydi."))
         return cleaned
+
+
+class RecurringTransactionForm(CachedChoicesMixin, forms.ModelForm):
+    category = CachedModelChoiceField(label=_("Kategoriya"))
+    account = CachedModelChoiceField(label=_("Hisob"))
+
+    class Meta:
+        model = RecurringTransaction
+        fields = ["type", "category", "account", "amount", "note", "frequency", "interval", "start_date", "end_date"]
+        labels = {
+            "type": _("Turi"),
+            "amount": _("Summa"),
+            "note": _("Izoh (note)"),
+            "frequency": _("Takrorlanish"),
+            "interval": _("Har nechtada"),
+            "start_date": _("Boshlanish"),
+            "end_date": _("Tugash (ixtiyoriy)"),
+        }
+        widgets = {
+            "start_date": forms.DateInput(attrs={"type": "date"}),
+            "end_date": forms.DateInput(attrs={"type": "date"}),
+        }
+
+    def __init__(self, *args, **kwargs):
+        self.user = kwargs.pop("user", None)
+        super().__init__(*args, **kwargs)
+        if self.user:
+            # RecurringTransaction.clean() egalikni instance.user bilan solishtiradi
+            self.instance.user = self.user
+            self.fields["category"].objects = choices.categories(self.user)
+            self.fields["account"].objects = choices.accounts(self.user)
+
+
+class BudgetForm(CachedChoicesMixin, forms.ModelForm):
+    category = CachedModelChoiceField(label=_("Kategoriya"))
+    month = forms.DateField(
+        label=_("Oy"), input_formats=["%Y-%m", "%Y-%m-%d"],
+        widget=forms.DateInput(attrs={"type": "month"}, format="%Y-%m"),
+    )
+
+    class Meta:
+        model = Budget
+        fields = ["category", "month", "currency", "limit"]
+        labels = {
+            "currency": _("Valyuta"),
+            "limit": _("Limit"),
+        }
+
+    def __init__(self, *args, **kwargs):
+        self.user = kwargs.pop("user", None)
+        super().__init__(*args, **kwargs)
+        if self.user:
+            self.instance.user = self.user
+            # transfer kategoriyalari chiqim emas — byudjet qo‘yilmaydi
+            self.fields["category"].objects = [
+                c for c in choices.categories(self.user)
+                if c.type == Category.EX_ and c.name != TRANSFER_CATEGORIES[Category.EX_]
+            ]
+
+    def clean(self):
+        cleaned = super().clean()
+        category, month, currency = cleaned.get("category"), cleaned.get("month"), cleaned.get("currency")
+        # category CachedChoicesMixin tufayli validate_constraints’dan chiqarilgan — unikallik shu yerda
+        if category and month and currency and Budget.objects.filter(
+            category=category, month=month.replace(day=1), currency=currency,
+        ).exclude(pk=self.instance.pk).exists():
+            raise ValidationError(_("Bu kategoriya uchun shu oyga byudjet allaqachon bor."))
+        return cleaned
+
+
+class ImportForm(forms.Form):
+    ENCODINGS = (
+        ("utf-8-sig", "UTF-8"),
+        ("cp1251", "Windows-1251"),
+    )
+
+    file = forms.FileField(label=_("Fayl (CSV)"))
+    format = forms.ChoiceField(choices=FORMATS, label=_("Format"))
+    account = forms.ModelChoiceField(
+        queryset=Account.objects.none(), required=False, label=_("Hisob"),
+        help_text=_("Ko‘chirma uchun majburiy; CSV’da bo‘sh qolsa, account ustunidan olinadi."),
+    )
+    encoding = forms.ChoiceField(choices=ENCODINGS, label=_("Kodlash"))
+
+    def __init__(self, *args, **kwargs):
+        self.user = kwargs.pop("user", None)
+        super().__init__(*args, **kwargs)
+        if self.user:
+            self.fields["account"].queryset = Account.objects.filter(user=self.user)
+
+    def clean(self):
+        cleaned = super().clean()
+        if cleaned.get("format") == STATEMENT and not cleaned.get("account"):
+            self.add_error("account", _("Ko‘chirma uchun hisobni tanlang."))
+        return cleaned
+
+
+class TransactionFilterForm(forms.Form):
+    """
+    Dashboard, oylik hisobot, CSV eksport va API uchun umumiy filtr/tartib (GET parametrlari).
+    Noto‘g‘ri qiymat xato bermaydi — o‘sha filtr e'tiborsiz qoldiriladi.
+    q qidiruvi user bilan ishlaydi (FTS so‘rovi foydalanuvchi bo‘yicha cheklanadi).
+    Tartib faqat ORDERINGS’dan (har biri indeks + id tiebreak); tenglik filtrlari (hisob, kategoriya)
+    uchun Transaction’da (account|category, date|amount, id) indekslari bor.
+    """
+    # maydon -> ORM lookup
+    LOOKUPS = {
+        "start": "date__gte",
+        "end": "date__lte",
+        "min_amount": "amount__gte",
+        "max_amount": "amount__lte",
+        "account": "account_id",
+        "category": "category_id",
+        "type": "type",
+    }
+
+    q = forms.CharField(required=False, max_length=200)
+    start = forms.DateField(required=False)
+    end = forms.DateField(required=False)
+    min_amount = forms.DecimalField(required=False, max_digits=15, decimal_places=2, min_value=0)
+    max_amount = forms.DecimalField(required=False, max_digits=15, decimal_places=2, min_value=0)
+    # yuqori chegara — pk oralig‘i: kattaroq son bazada OverflowError beradi
+    account = forms.IntegerField(required=False, min_value=1, max_value=MAX_PK)
+    category = forms.IntegerField(required=False, min_value=1, max_value=MAX_PK)
+    type = forms.ChoiceField(required=False, choices=[("", "---------"), *Transaction.TRAN_TYPES])
+    order = forms.ChoiceField(required=False, choices=[(key, key) for key in ORDERINGS])
+
+    def __init__(self, *args, **kwargs):
+        self.user = kwargs.pop("user", None)
+        super().__init__(*args, **kwargs)
+
+    def clean(self):
+        cleaned = super().clean()
+        for low, high in (("start", "end"), ("min_amount", "max_amount")):
+            if cleaned.get(low) is not None and cleaned.get(high) is not None and cleaned[low] > cleaned[high]:
+                self.add_error(high, _("Oraliq noto‘g‘ri: yuqori chegara pastkisidan kichik."))
+        return cleaned
+
+    @property
+    def values(self):
+        """Tozalangan (yaroqli) qiymatlar; yaroqsiz maydonlar tushib qoladi."""
+        if not hasattr(self, "cleaned_data"):
+            self.is_valid()
+        return self.cleaned_data
+
+    @property
+    def ordering(self):
+        return self.values.get("order") or DEFAULT_ORDER
+
+    def has_filters(self):
+        return any(self.values.get(name) not in (None, "") for name in ("q", *self.LOOKUPS))
+
+    def filter(self, qs):
+        values = self.values
+        if values.get("q") and self.user is not None:
+            qs = search.filter_transactions(qs, values["q"], self.user)
+        for name, lookup in self.LOOKUPS.items():
+            value = values.get(name)
+            if value not in (None, ""):
+                qs = qs.filter(**{lookup: value})
+        return qs
+
+    def params(self):
+        """Shablon uchun: maydon qiymatlari matn ko‘rinishida (yaroqsizlari bo‘sh)."""
+        params = {name: "" for name in self.fields}
+        for name, value in self.values.items():
+            if value not in (None, ""):
+                params[name] = value.isoformat() if hasattr(value, "isoformat") else str(value)
+        params["order"] = self.ordering
+        return params
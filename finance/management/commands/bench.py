@@ -0,0 +1,192 @@
+import json
+import platform
+import random
+import statistics
+import subprocess
+import time
+from datetime import datetime
+
+import django
+from django.conf import settings
+from django.core.cache import caches
+from django.core.management.base import BaseCommand
+from django.db import connection, reset_queries
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone, translation
+
+from finance.models import Account, Transaction
+from finance.services import exchange, seed
+from finance.services.totals import currency_totals, historical_balance, total_balance
+
+# (natija nomi, URL nomi, query string)
+PAGES = (
+    ("dashboard", "finance:dashboard", ""),
+    ("dashboard_historical", "finance:dashboard", "?valuation=historical"),
+    ("dashboard_search", "finance:dashboard", "?q=tushlik"),
+    ("monthly_report", "finance:monthly_report", ""),
+    ("analytics", "finance:analytics", ""),
+    ("profile", "users:profile", ""),
+)
+
+
+def _summary(samples):
+    ms = [s * 1000 for s in samples]
+    return {"min": round(min(ms), 2), "median": round(statistics.median(ms), 2), "max": round(max(ms), 2)}
+
+
+class Command(BaseCommand):
+    help = (
+        "Asosiy sahifalar va kurs konvertatsiyasini bir nechta hajmda o‘lchaydi, natijani JSON’ga yozadi. "
+        "Ma'lumotlar vaqtinchalik test bazasida yaratiladi — ishchi baza o‘zgarmaydi."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sizes", default="1000,10000,100000", help="Tranzaksiyalar soni, vergul bilan")
+        parser.add_argument("--repeat", type=int, default=5)
+        parser.add_argument("--accounts", type=int, default=4)
+        parser.add_argument("--output", default="", help="JSON fayl (standart: bench-<vaqt>.json)")
+        parser.add_argument("--compare", default="", help="Oldingi natija fayli — median farqini chiqaradi")
+        parser.add_argument("--seed", type=int, default=42)
+
+    def handle(self, *args, **o):
+        sizes = [int(s) for s in o["sizes"].split(",") if s.strip()]
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            results = self._run(sizes, o)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+        report = {"meta": self._meta(o), "results": results}
+        path = o["output"] or f"bench-{datetime.now():%Y%m%d-%H%M%S}.json"
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        self.stdout.write(self.style.SUCCESS(f"Natija: {path}"))
+        if o["compare"]:
+            self._compare(o["compare"], results)
+
+    def _meta(self, o):
+        try:
+            commit = subprocess.run(
+                ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, cwd=settings.BASE_DIR
+            ).stdout.strip()
+        except OSError:
+            commit = ""
+        return {
+            "time": timezone.now().isoformat(),
+            "commit": commit,
+            "python": platform.python_version(),
+            "django": django.get_version(),
+            "database": connection.vendor,
+            "repeat": o["repeat"],
+        }
+
+    def _run(self, sizes, o):
+        rng = random.Random(o["seed"])
+        rate_days = 730
+        seed.seed_rates(rate_days, rng=rng)
+        results = []
+        for size in sizes:
+            self.stdout.write(f"— {size} ta tranzaksiya: ma'lumot yaratilmoqda...")
+            user = seed.seed_user(
+                f"bench{size}", accounts=o["accounts"], transactions=size,
+                transfers_count=max(size // 100, 1), comments=max(size // 100, 1), rng=rng,
+            )
+            client = Client(SERVER_NAME="localhost")
+            client.force_login(user)
+            with translation.override(settings.LANGUAGE_CODE):
+                for name, url_name, query in PAGES:
+                    results.append(self._page(client, size, name, reverse(url_name) + query, o["repeat"]))
+                transfer_url = reverse("finance:transfer_create")
+            if o["accounts"] > 1:  # transfer uchun ikki hisob kerak
+                results.append(self._transfer(client, user, size, transfer_url, o["repeat"]))
+            results.extend(self._conversions(user, size, o["repeat"]))
+        return results
+
+    def _measure(self, fn, repeat, cold=None):
+        samples, queries = [], 0
+        for _ in range(repeat):
+            if cold:
+                cold()
+            with CaptureQueriesContext(connection) as ctx:
+                started = time.perf_counter()
+                fn()
+                samples.append(time.perf_counter() - started)
+            queries = len(ctx.captured_queries)
+            reset_queries()
+        return _summary(samples), queries
+
+    def _clear_caches(self):
+        for alias in settings.CACHES:
+            caches[alias].clear()
+        exchange.invalidate()
+
+    def _page(self, client, size, name, url, repeat):
+        def get():
+            response = client.get(url)
+            assert response.status_code == 200, f"{url}: {response.status_code}"
+
+        cold, queries = self._measure(get, repeat, cold=self._clear_caches)
+        get()
+        warm, warm_queries = self._measure(get, repeat)
+        row = {"size": size, "name": name, "cold_ms": cold, "warm_ms": warm,
+               "queries": queries, "warm_queries": warm_queries}
+        self._print(row)
+        return row
+
+    def _transfer(self, client, user, size, url, repeat):
+        accounts = list(Account.objects.filter(user=user).order_by("id")[:2])
+        data = {
+            "from_account": accounts[0].pk, "to_account": accounts[-1].pk,
+            "amount_from": "100", "amount_to": "1", "date": timezone.localdate().isoformat(), "note": "bench",
+        }
+
+        def post():
+            response = client.post(url, data)
+            assert response.status_code == 302, f"transfer_create: {response.status_code}"
+
+        timing, queries = self._measure(post, repeat)
+        row = {"size": size, "name": "transfer_create", "cold_ms": timing, "queries": queries}
+        self._print(row)
+        return row
+
+    def _conversions(self, user, size, repeat):
+        qs = Transaction.objects.filter(user=user)
+        # --accounts 1 da USD hisob yo‘q — zip(*[]) ikki qiymat bermaydi
+        usd = list(qs.filter(currency=Account.USD).values_list("amount", "date"))
+        amounts, dates = zip(*usd) if usd else ((), ())
+        cases = (
+            ("convert_many", lambda: exchange.convert_many(amounts, dates, Account.USD, Account.UZS)),
+            ("total_balance", lambda: total_balance(currency_totals(qs), Account.UZS)),
+            ("historical_balance", lambda: historical_balance(qs, Account.UZS)),
+        )
+        rows = []
+        for name, fn in cases:
+            cold, queries = self._measure(fn, repeat, cold=exchange.invalidate)
+            warm, warm_queries = self._measure(fn, repeat)
+            row = {"size": size, "name": name, "cold_ms": cold, "warm_ms": warm,
+                   "queries": queries, "warm_queries": warm_queries}
+            self._print(row)
+            rows.append(row)
+        return rows
+
+    def _print(self, row):
+        warm = row.get("warm_ms")
+        self.stdout.write(
+            f"  {row['name']:<22} {row['cold_ms']['median']:>9.1f} ms"
+            + (f"  (kesh: {warm['median']:.1f} ms)" if warm else "")
+            + f"  {row['queries']} so‘rov"
+        )
+
+    def _compare(self, path, results):
+        with open(path, encoding="utf-8") as f:
+            old = {(r["size"], r["name"]): r for r in json.load(f)["results"]}
+        self.stdout.write(f"Taqqoslash: {path}")
+        for row in results:
+            prev = old.get((row["size"], row["name"]))
+            if not prev:
+                continue
+            before, after = prev["cold_ms"]["median"], row["cold_ms"]["median"]
+            change = (after - before) / before * 100 if before else 0.0
+            self.stdout.write(f"  {row['size']:>8} {row['name']:<22} {before:>9.1f} -> {after:>9.1f} ms ({change:+.0f}%)")
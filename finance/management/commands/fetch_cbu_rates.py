@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+from requests import RequestException
+
+from finance.services import cbu
+
+
+class Command(BaseCommand):
+    help = "CBU’dan barcha valyuta kurslarini yuklaydi; --start/--end bilan arxivni to‘ldiradi."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--start", help="YYYY-MM-DD, arxiv boshlanishi")
+        parser.add_argument("--end", help="YYYY-MM-DD, arxiv oxiri (standart: start)")
+        parser.add_argument("--workers", type=int, default=cbu.MAX_WORKERS)
+
+    def handle(self, *args, **options):
+        try:
+            if options["start"]:
+                start = parse_date(options["start"])
+                end = parse_date(options["end"] or options["start"])
+                if not start or not end or start > end:
+                    raise CommandError("Sana oralig‘i noto‘g‘ri")
+                count = cbu.backfill(start, end, max_workers=options["workers"])
+            else:
+                count = cbu.ingest()
+        except RequestException as e:
+            raise CommandError(f"CBU xatosi: {e}")
+
+        if count:
+            self.stdout.write(self.style.SUCCESS(f"{count} ta kurs yozildi"))
+        else:
+            self.stdout.write("O‘zgarish yo‘q (304)")
@@ -0,0 +1,44 @@
+import csv
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from finance.models import Account
+from finance.services import importer
+
+
+class Command(BaseCommand):
+    help = "CSV yoki Uzcard/Humo ko‘chirmasidan tranzaksiyalarni ommaviy import qiladi."
+
+    def add_arguments(self, parser):
+        parser.add_argument("username")
+        parser.add_argument("path")
+        parser.add_argument("--format", choices=[f for f, _ in importer.FORMATS], default=importer.CSV)
+        parser.add_argument("--account", type=int, help="Barcha qatorlar yoziladigan hisob ID (ko‘chirma uchun majburiy)")
+        parser.add_argument("--batch-size", type=int, default=importer.BATCH_SIZE)
+        parser.add_argument("--encoding", default="utf-8-sig", help="Masalan: cp1251 (eski bank eksportlari)")
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(username=options["username"])
+        except User.DoesNotExist:
+            raise CommandError(f"Foydalanuvchi topilmadi: {options['username']}")
+
+        account = None
+        if options["account"]:
+            account = Account.objects.filter(pk=options["account"], user=user).first()
+            if account is None:
+                raise CommandError(f"Hisob topilmadi: {options['account']}")
+
+        try:
+            with open(options["path"], "rb") as f:
+                result = importer.import_transactions(
+                    user, f, options["format"], account=account,
+                    batch_size=options["batch_size"], encoding=options["encoding"],
+                )
+        except (OSError, UnicodeDecodeError, csv.Error) as e:
+            raise CommandError(e)
+
+        for error in result.errors:
+            self.stderr.write(error)
+        self.stdout.write(self.style.SUCCESS(str(result)))
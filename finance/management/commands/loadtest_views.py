@@ -0,0 +1,115 @@
+import asyncio
+import inspect
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.test import RequestFactory
+
+from finance import views
+from users import views as user_views
+
+VIEWS = {
+    "dashboard": ("/", views.dashboard, views.adashboard),
+    "monthly_report": ("/report/monthly/", views.monthly_report, views.amonthly_report),
+    "analytics": ("/analytics/", views.analytics, views.aanalytics),
+    "profile": ("/users/profile/", user_views.profile, user_views.aprofile),
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Sync va async view’larni bir xil parallellikda chaqirib, so‘rov/s va kechikishni solishtiradi. "
+        "Sync — WSGI kabi N ta oqim, async — ASGI kabi bitta event loop. "
+        "Standart holatda view’lar dekoratorlarsiz (login_required, cached_page) chaqiriladi — "
+        "sahifa keshi emas, ORM yo‘li o‘lchanadi."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("username")
+        parser.add_argument("--requests", type=int, default=200)
+        parser.add_argument("--concurrency", type=int, default=20)
+        parser.add_argument("--views", default=",".join(VIEWS), help="Vergul bilan: " + ", ".join(VIEWS))
+        parser.add_argument("--query", default="", help="Masalan: valuation=historical")
+        parser.add_argument(
+            "--page-cache", action="store_true",
+            help="cached_page bilan chaqirish: birinchi so‘rovdan keyin hammasi kesh urilishi bo‘ladi",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(username=options["username"])
+        except User.DoesNotExist:
+            raise CommandError(f"Foydalanuvchi topilmadi: {options['username']}")
+        names = [n.strip() for n in options["views"].split(",") if n.strip()]
+        unknown = set(names) - set(VIEWS)
+        if unknown:
+            raise CommandError(f"Noma'lum view: {', '.join(sorted(unknown))}")
+
+        self.factory = RequestFactory()
+        self.user = user
+        total, concurrency = options["requests"], options["concurrency"]
+
+        page_cache = options["page_cache"]
+        self.stdout.write(
+            "Sahifa keshi: yoqilgan (cached_page orqali, asosan kesh urilishlari)" if page_cache
+            else "Sahifa keshi: chetlab o‘tilgan (view.__wrapped__ — har bir so‘rov ORM’ga boradi)"
+        )
+        self.stdout.write(f"{'view':<16}{'rejim':<8}{'so‘rov/s':>10}{'p50 ms':>10}{'p95 ms':>10}")
+        for name in names:
+            path, sync_view, async_view = VIEWS[name]
+            if not page_cache:
+                # login_required va cached_page’ni olib tashlaydi; request.user _request()da qo‘yiladi
+                sync_view, async_view = inspect.unwrap(sync_view), inspect.unwrap(async_view)
+            path = f"{path}?{options['query']}" if options["query"] else path
+            for mode, run in (("sync", self._run_sync), ("async", self._run_async)):
+                seconds, latencies = run(sync_view if mode == "sync" else async_view, path, total, concurrency)
+                latencies.sort()
+                p95 = latencies[max(0, int(len(latencies) * 0.95) - 1)]
+                self.stdout.write(
+                    f"{name:<16}{mode:<8}{total / seconds:>10.1f}"
+                    f"{statistics.median(latencies) * 1000:>10.1f}{p95 * 1000:>10.1f}"
+                )
+
+    def _request(self, path):
+        request = self.factory.get(path)
+        request.user = self.user
+
+        async def auser():
+            return self.user
+
+        request.auser = auser
+        return request
+
+    def _check(self, response):
+        if response.status_code != 200:
+            raise CommandError(f"Kutilmagan javob: {response.status_code}")
+
+    def _run_sync(self, view, path, total, concurrency):
+        def one(_):
+            started = time.perf_counter()
+            self._check(view(self._request(path)))
+            return time.perf_counter() - started
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            latencies = list(pool.map(one, range(total)))
+        return time.perf_counter() - started, latencies
+
+    def _run_async(self, view, path, total, concurrency):
+        async def main():
+            limit = asyncio.Semaphore(concurrency)
+
+            async def one():
+                async with limit:
+                    started = time.perf_counter()
+                    self._check(await view(self._request(path)))
+                    return time.perf_counter() - started
+
+            return await asyncio.gather(*(one() for _ in range(total)))
+
+        started = time.perf_counter()
+        latencies = asyncio.run(main())
+        return time.perf_counter() - started, list(latencies)
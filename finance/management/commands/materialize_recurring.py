@@ -0,0 +1,27 @@
+import time
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from finance.services import recurring
+
+
+class Command(BaseCommand):
+    help = "Muddati kelgan takroriy tranzaksiyalarni barcha foydalanuvchilar uchun yaratadi (kunlik cron)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--until", help="YYYY-MM-DD, standart: bugun")
+
+    def handle(self, *args, **options):
+        until = None
+        if options["until"]:
+            try:
+                until = date.fromisoformat(options["until"])
+            except ValueError:
+                raise CommandError("--until: YYYY-MM-DD formatida bo‘lishi kerak")
+
+        started = time.perf_counter()
+        created = recurring.materialize(until)
+        self.stdout.write(self.style.SUCCESS(
+            f"Yaratildi: {created} ta tranzaksiya ({time.perf_counter() - started:.2f} s)"
+        ))
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from finance import page_cache
+
+
+class Command(BaseCommand):
+    help = "Sahifa keshining hit/miss hisoblagichlari (view bo‘yicha)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--reset", action="store_true", help="Hisoblagichlarni nolga qaytaradi")
+
+    def handle(self, *args, **options):
+        for name, s in page_cache.stats().items():
+            self.stdout.write(f"{name:<16}{s['hits']:>8} hit{s['misses']:>8} miss{s['hit_rate']:>8.1%}")
+        if options["reset"]:
+            page_cache.reset_stats()
+            self.stdout.write("Hisoblagichlar tozalandi.")
@@ -0,0 +1,36 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from finance.models import Account
+from finance.services import ledger
+
+
+class Command(BaseCommand):
+    help = "AccountBalance va AccountRollup jadvallarini Transaction’dan qayta quradi va tekshiradi."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--user", help="Faqat shu foydalanuvchi (username) hisoblari")
+        parser.add_argument(
+            "--verify-only", action="store_true",
+            help="Qayta qurmasdan faqat solishtiradi; farq bo‘lsa xato bilan chiqadi",
+        )
+
+    def handle(self, *args, **options):
+        accounts = Account.objects.all()
+        if options["user"]:
+            try:
+                user = User.objects.get(username=options["user"])
+            except User.DoesNotExist:
+                raise CommandError(f"Foydalanuvchi topilmadi: {options['user']}")
+            accounts = accounts.filter(user=user)
+
+        if not options["verify_only"]:
+            balances, rollups = ledger.rebuild(accounts)
+            self.stdout.write(f"Qayta qurildi: {balances} ta balans, {rollups} ta oylik rollup")
+
+        problems = ledger.verify(accounts)
+        for p in problems:
+            self.stderr.write(p)
+        if problems:
+            raise CommandError(f"{len(problems)} ta farq topildi")
+        self.stdout.write(self.style.SUCCESS("Ledger xom tranzaksiyalar bilan mos"))
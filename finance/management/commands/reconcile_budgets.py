@@ -0,0 +1,35 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from finance.models import Budget
+from finance.services import budgets as budget_service
+
+
+class Command(BaseCommand):
+    help = "Budget.spent hisoblagichlarini Transaction’dan qayta quradi va tekshiradi."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--user", help="Faqat shu foydalanuvchi (username) byudjetlari")
+        parser.add_argument(
+            "--verify-only", action="store_true",
+            help="Qayta qurmasdan faqat solishtiradi; farq bo‘lsa xato bilan chiqadi",
+        )
+
+    def handle(self, *args, **options):
+        budgets = Budget.objects.all()
+        if options["user"]:
+            try:
+                user = User.objects.get(username=options["user"])
+            except User.DoesNotExist:
+                raise CommandError(f"Foydalanuvchi topilmadi: {options['user']}")
+            budgets = budgets.filter(user=user)
+
+        if not options["verify_only"]:
+            self.stdout.write(f"Qayta qurildi: {budget_service.rebuild(budgets)} ta byudjet")
+
+        problems = budget_service.verify(budgets)
+        for p in problems:
+            self.stderr.write(p)
+        if problems:
+            raise CommandError(f"{len(problems)} ta farq topildi")
+        self.stdout.write(self.style.SUCCESS("Byudjetlar xom tranzaksiyalar bilan mos"))
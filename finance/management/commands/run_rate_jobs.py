@@ -0,0 +1,28 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from finance.services import rate_jobs
+
+
+class Command(BaseCommand):
+    help = "Navbatdagi kurs yangilash ishlarini bajaradi (cron yoki --loop bilan doimiy worker)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--enqueue", action="store_true", help="Avval yangi ish qo‘shadi (kunlik cron uchun)")
+        parser.add_argument("--loop", action="store_true", help="To‘xtamasdan navbatni kuzatadi")
+        parser.add_argument("--interval", type=float, default=15.0, help="--loop uchun tekshirish oralig‘i (s)")
+
+    def handle(self, *args, **options):
+        if options["enqueue"]:
+            job, created = rate_jobs.enqueue()
+            self.stdout.write(f"{'Qo‘shildi' if created else 'Allaqachon navbatda'}: {job}")
+
+        while True:
+            job = rate_jobs.run_pending()
+            if job:
+                self.stdout.write(f"{job}: {job.message}")
+            if not options["loop"]:
+                break
+            if job is None:
+                time.sleep(options["interval"])
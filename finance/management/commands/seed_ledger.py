@@ -0,0 +1,49 @@
+import random
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from finance.services import seed
+
+
+class Command(BaseCommand):
+    help = "Sintetik foydalanuvchilar, hisoblar, tranzaksiyalar, transferlar, kommentlar va kurslar tarixini yaratadi."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=1)
+        parser.add_argument("--prefix", default="seed", help="Foydalanuvchi nomi: <prefix>1, <prefix>2, ...")
+        parser.add_argument("--accounts", type=int, default=4)
+        parser.add_argument("--categories", type=int, default=10)
+        parser.add_argument("--transactions", type=int, default=10000, help="Har bir foydalanuvchi uchun")
+        parser.add_argument("--transfers", type=int, default=100)
+        parser.add_argument("--comments", type=int, default=100)
+        parser.add_argument("--days", type=int, default=730, help="Tranzaksiyalar sanasi oralig‘i (kun)")
+        parser.add_argument("--rate-days", type=int, default=730, help="Kurslar tarixi (kun), 0 — yaratilmaydi")
+        parser.add_argument("--batch-size", type=int, default=seed.BATCH_SIZE)
+        parser.add_argument("--seed", type=int, default=42)
+
+    def handle(self, *args, **o):
+        names = [f"{o['prefix']}{i + 1}" for i in range(o["users"])]
+        taken = list(User.objects.filter(username__in=names).values_list("username", flat=True))
+        if taken:
+            raise CommandError(f"Foydalanuvchilar allaqachon bor: {', '.join(taken)} (--prefix’ni o‘zgartiring)")
+
+        rng = random.Random(o["seed"])
+        started = time.perf_counter()
+        if o["rate_days"]:
+            self.stdout.write(f"Kurslar: {seed.seed_rates(o['rate_days'], rng=rng)} ta")
+
+        for name in names:
+            def progress(n, name=name):
+                self.stdout.write(f"\r{name}: {n}/{o['transactions']}", ending="")
+                self.stdout.flush()
+
+            seed.seed_user(
+                name, accounts=o["accounts"], categories=o["categories"], transactions=o["transactions"],
+                transfers_count=o["transfers"], comments=o["comments"], days=o["days"], rng=rng,
+                batch_size=o["batch_size"], progress=progress,
+            )
+            self.stdout.write("")
+
+        self.stdout.write(self.style.SUCCESS(f"Tayyor: {len(names)} foydalanuvchi, {time.perf_counter() - started:.1f} s"))
@@ -0,0 +1,149 @@
+"""
+So‘rov metrikalari: SQL so‘rovlar soni va vaqti, shablon render vaqti, javob hajmi — URL nomi bo‘yicha.
+Yoqish: settings.MIDDLEWARE ga "finance.metrics.QueryMetricsMiddleware" (FINANCE_METRICS = True),
+shablon vaqti uchun TEMPLATES BACKEND — "finance.metrics.TimedDjangoTemplates".
+Yig‘indilar har bir jarayonda alohida saqlanadi (/metrics shu jarayonnikini ko‘rsatadi).
+"""
+import logging
+import threading
+import time
+from contextlib import ExitStack
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import connections
+from django.template.backends.django import DjangoTemplates, Template
+
+logger = logging.getLogger("finance.metrics")
+
+_current = ContextVar("finance_request_metrics", default=None)
+_totals = {}
+_lock = threading.Lock()
+
+
+class QueryBudgetExceeded(AssertionError):
+    """FINANCE_QUERY_BUDGET_STRICT = True bo‘lsa (testlarda) ko‘tariladi."""
+
+
+class RequestMetrics:
+    def __init__(self):
+        self.queries = 0
+        self.db = 0.0
+        self.template = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        # connection.execute_wrapper() — har bir SQL shu yerdan o‘tadi
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db += time.perf_counter() - started
+            self.queries += 1
+
+
+class TimedTemplate(Template):
+    def render(self, context=None, request=None):
+        metrics = _current.get()
+        if metrics is None:
+            return super().render(context, request)
+        started = time.perf_counter()
+        try:
+            return super().render(context, request)
+        finally:
+            metrics.template += time.perf_counter() - started
+
+
+class TimedDjangoTemplates(DjangoTemplates):
+    """DjangoTemplates + render vaqti (faqat middleware yoqilgan so‘rovlarda o‘lchanadi)."""
+
+    def from_string(self, template_code):
+        return TimedTemplate(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        template = super().get_template(template_name)
+        return TimedTemplate(template.template, self)
+
+
+def budget(name):
+    return getattr(settings, "FINANCE_QUERY_BUDGETS", {}).get(name)
+
+
+def _record(name, metrics, seconds, size):
+    with _lock:
+        row = _totals.setdefault(name, {
+            "requests": 0, "queries": 0, "max_queries": 0, "db_ms": 0.0,
+            "template_ms": 0.0, "total_ms": 0.0, "bytes": 0,
+        })
+        row["requests"] += 1
+        row["queries"] += metrics.queries
+        row["max_queries"] = max(row["max_queries"], metrics.queries)
+        row["db_ms"] += metrics.db * 1000
+        row["template_ms"] += metrics.template * 1000
+        row["total_ms"] += seconds * 1000
+        row["bytes"] += size
+
+
+def snapshot():
+    """Return: {url_name: {requests, avg_queries, max_queries, avg_db_ms, avg_template_ms, avg_total_ms, avg_bytes, budget}}"""
+    with _lock:
+        rows = {name: dict(row) for name, row in _totals.items()}
+    result = {}
+    for name, row in sorted(rows.items()):
+        n = row["requests"]
+        result[name] = {
+            "requests": n,
+            "avg_queries": round(row["queries"] / n, 2),
+            "max_queries": row["max_queries"],
+            "avg_db_ms": round(row["db_ms"] / n, 2),
+            "avg_template_ms": round(row["template_ms"] / n, 2),
+            "avg_total_ms": round(row["total_ms"] / n, 2),
+            "avg_bytes": row["bytes"] // n,
+            "budget": budget(name),
+        }
+    return result
+
+
+def reset():
+    with _lock:
+        _totals.clear()
+
+
+class QueryMetricsMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        metrics = RequestMetrics()
+        token = _current.set(metrics)
+        started = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for alias in connections:
+                    stack.enter_context(connections[alias].execute_wrapper(metrics))
+                response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        seconds = time.perf_counter() - started
+
+        match = getattr(request, "resolver_match", None)
+        name = match.view_name if match else "unresolved"
+        size = 0 if response.streaming else len(response.content)
+        _record(name, metrics, seconds, size)
+
+        response["Server-Timing"] = ", ".join([
+            f'db;dur={metrics.db * 1000:.1f};desc="{metrics.queries} queries"',
+            f"tpl;dur={metrics.template * 1000:.1f}",
+            f"total;dur={seconds * 1000:.1f}",
+        ])
+        logger.info(
+            "%s %s queries=%d db=%.1fms tpl=%.1fms total=%.1fms bytes=%d",
+            name, request.path, metrics.queries, metrics.db * 1000, metrics.template * 1000, seconds * 1000, size,
+        )
+
+        limit = budget(name)
+        if limit is not None and metrics.queries > limit:
+            message = f"{name}: {metrics.queries} ta SQL so‘rov (byudjet {limit}) — {request.get_full_path()}"
+            if getattr(settings, "FINANCE_QUERY_BUDGET_STRICT", False):
+                raise QueryBudgetExceeded(message)
+            logger.warning(message)
+        return response
@@ -0,0 +1,77 @@
+# Generated by Django 6.0.1 on 2026-10-17 18:57
+
+import django.db.models.deletion
+from decimal import Decimal
+
+from django.db import migrations, models
+from django.db.models import Q, Sum
+from django.db.models.functions import TruncMonth
+
+
+def build_ledger(apps, schema_editor):
+    Transaction = apps.get_model("finance", "Transaction")
+    AccountBalance = apps.get_model("finance", "AccountBalance")
+    AccountRollup = apps.get_model("finance", "AccountRollup")
+    zero = Decimal("0")
+
+    sums = dict(
+        income=Sum("amount", filter=Q(type="IN")),
+        expense=Sum("amount", filter=Q(type="EX")),
+    )
+    balances = Transaction.objects.values("account_id").annotate(**sums).order_by()
+    AccountBalance.objects.bulk_create(
+        [
+            AccountBalance(account_id=r["account_id"], income=r["income"] or zero, expense=r["expense"] or zero)
+            for r in balances
+        ],
+        batch_size=1000,
+    )
+    rollups = (
+        Transaction.objects.annotate(m=TruncMonth("date"))
+        .values("account_id", "m").annotate(**sums).order_by()
+    )
+    AccountRollup.objects.bulk_create(
+        [
+            AccountRollup(
+                account_id=r["account_id"], month=r["m"],
+                income=r["income"] or zero, expense=r["expense"] or zero,
+            )
+            for r in rollups
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finance', '0005_transaction_currency_exchangerate_transfer'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AccountBalance',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('income', models.DecimalField(decimal_places=2, default=0, max_digits=17)),
+                ('expense', models.DecimalField(decimal_places=2, default=0, max_digits=17)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('account', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='ledger_balance', to='finance.account')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='AccountRollup',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField()),
+                ('income', models.DecimalField(decimal_places=2, default=0, max_digits=17)),
+                ('expense', models.DecimalField(decimal_places=2, default=0, max_digits=17)),
+                ('account', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='rollups', to='finance.account')),
+            ],
+            options={
+                'ordering': ['-month'],
+                'unique_together': {('account', 'month')},
+            },
+        ),
+        migrations.RunPython(build_ledger, migrations.RunPython.noop),
+    ]
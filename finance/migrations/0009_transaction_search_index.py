@@ -0,0 +1,100 @@
+# Generated by Django 6.0.1 on 2026-10-17 19:40
+
+from django.db import migrations
+
+# SQLite FTS5: har bir tranzaksiya uchun bitta qator (rowid = finance_transaction.id).
+# Triggerlar SQL darajasida ishlaydi — save(), bulk_create(), update() va kaskad o‘chirishlar ham qamrab olinadi.
+CREATE = [
+    """
+    CREATE VIRTUAL TABLE finance_transaction_fts USING fts5(
+        note, category, comments, user_id UNINDEXED,
+        tokenize = 'unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER finance_transaction_fts_ai AFTER INSERT ON finance_transaction BEGIN
+        INSERT INTO finance_transaction_fts (rowid, note, category, comments, user_id)
+        VALUES (new.id, new.note, (SELECT name FROM finance_category WHERE id = new.category_id), '', new.user_id);
+    END
+    """,
+    """
+    CREATE TRIGGER finance_transaction_fts_au AFTER UPDATE OF note, category_id, user_id ON finance_transaction BEGIN
+        UPDATE finance_transaction_fts
+        SET note = new.note,
+            category = (SELECT name FROM finance_category WHERE id = new.category_id),
+            user_id = new.user_id
+        WHERE rowid = new.id;
+    END
+    """,
+    """
+    CREATE TRIGGER finance_transaction_fts_ad AFTER DELETE ON finance_transaction BEGIN
+        DELETE FROM finance_transaction_fts WHERE rowid = old.id;
+    END
+    """,
+    """
+    CREATE TRIGGER finance_category_fts_au AFTER UPDATE OF name ON finance_category BEGIN
+        UPDATE finance_transaction_fts SET category = new.name
+        WHERE rowid IN (SELECT id FROM finance_transaction WHERE category_id = new.id);
+    END
+    """,
+    """
+    CREATE TRIGGER finance_comment_fts_ai AFTER INSERT ON finance_comment BEGIN
+        UPDATE finance_transaction_fts
+        SET comments = (SELECT group_concat(text, ' ') FROM finance_comment WHERE transaction_id = new.transaction_id)
+        WHERE rowid = new.transaction_id;
+    END
+    """,
+    """
+    CREATE TRIGGER finance_comment_fts_au AFTER UPDATE OF text, transaction_id ON finance_comment BEGIN
+        UPDATE finance_transaction_fts
+        SET comments = coalesce((SELECT group_concat(text, ' ') FROM finance_comment WHERE transaction_id = finance_transaction_fts.rowid), '')
+        WHERE rowid IN (old.transaction_id, new.transaction_id);
+    END
+    """,
+    """
+    CREATE TRIGGER finance_comment_fts_ad AFTER DELETE ON finance_comment BEGIN
+        UPDATE finance_transaction_fts
+        SET comments = coalesce((SELECT group_concat(text, ' ') FROM finance_comment WHERE transaction_id = old.transaction_id), '')
+        WHERE rowid = old.transaction_id;
+    END
+    """,
+    """
+    INSERT INTO finance_transaction_fts (rowid, note, category, comments, user_id)
+    SELECT t.id, t.note, c.name,
+           coalesce((SELECT group_concat(text, ' ') FROM finance_comment WHERE transaction_id = t.id), ''),
+           t.user_id
+    FROM finance_transaction t LEFT JOIN finance_category c ON c.id = t.category_id
+    """,
+]
+
+DROP = [
+    "DROP TRIGGER IF EXISTS finance_comment_fts_ad",
+    "DROP TRIGGER IF EXISTS finance_comment_fts_au",
+    "DROP TRIGGER IF EXISTS finance_comment_fts_ai",
+    "DROP TRIGGER IF EXISTS finance_category_fts_au",
+    "DROP TRIGGER IF EXISTS finance_transaction_fts_ad",
+    "DROP TRIGGER IF EXISTS finance_transaction_fts_au",
+    "DROP TRIGGER IF EXISTS finance_transaction_fts_ai",
+    "DROP TABLE IF EXISTS finance_transaction_fts",
+]
+
+
+def _run(statements):
+    def run(apps, schema_editor):
+        # boshqa bazalarda finance.services.search icontains’ga qaytadi
+        if schema_editor.connection.vendor != "sqlite":
+            return
+        for sql in statements:
+            schema_editor.execute(sql)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finance', '0008_rate_refresh_job'),
+    ]
+
+    operations = [
+        migrations.RunPython(_run(CREATE), _run(DROP)),
+    ]
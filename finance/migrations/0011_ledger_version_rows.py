@@ -0,0 +1,26 @@
+# Generated by Django 6.0.1 on 2026-10-17 19:55
+
+from django.conf import settings
+from django.db import migrations
+
+
+def create_versions(apps, schema_editor):
+    User = apps.get_model(*settings.AUTH_USER_MODEL.split("."))
+    LedgerVersion = apps.get_model("finance", "LedgerVersion")
+    existing = set(LedgerVersion.objects.values_list("user_id", flat=True))
+    LedgerVersion.objects.bulk_create(
+        [LedgerVersion(user_id=pk) for pk in User.objects.values_list("pk", flat=True) if pk not in existing],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finance', '0010_ledger_version'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(create_versions, migrations.RunPython.noop),
+    ]
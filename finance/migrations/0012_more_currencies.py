@@ -0,0 +1,33 @@
+# Generated by Django 6.0.1 on 2026-10-17 19:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finance', '0011_ledger_version_rows'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='account',
+            name='currency',
+            field=models.CharField(blank=True, choices=[('UZS', "So'm"), ('USD', 'Dollar'), ('EUR', 'Yevro'), ('RUB', 'Rubl')], max_length=3, null=True),
+        ),
+        migrations.AlterField(
+            model_name='exchangerate',
+            name='base',
+            field=models.CharField(choices=[('UZS', "So'm"), ('USD', 'Dollar'), ('EUR', 'Yevro'), ('RUB', 'Rubl')], default='USD', max_length=3),
+        ),
+        migrations.AlterField(
+            model_name='exchangerate',
+            name='quote',
+            field=models.CharField(choices=[('UZS', "So'm"), ('USD', 'Dollar'), ('EUR', 'Yevro'), ('RUB', 'Rubl')], default='UZS', max_length=3),
+        ),
+        migrations.AlterField(
+            model_name='transaction',
+            name='currency',
+            field=models.CharField(blank=True, choices=[('UZS', "So'm"), ('USD', 'Dollar'), ('EUR', 'Yevro'), ('RUB', 'Rubl')], max_length=3, null=True),
+        ),
+    ]
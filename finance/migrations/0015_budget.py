@@ -0,0 +1,34 @@
+# Generated by Django 6.0.1 on 2026-10-17 19:36
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finance', '0014_recurring_transaction'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Budget',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField()),
+                ('currency', models.CharField(choices=[('UZS', "So'm"), ('USD', 'Dollar'), ('EUR', 'Yevro'), ('RUB', 'Rubl')], default='UZS', max_length=3)),
+                ('limit', models.DecimalField(decimal_places=2, max_digits=15)),
+                ('spent', models.DecimalField(decimal_places=2, default=0, editable=False, max_digits=17)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('category', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='budgets', to='finance.category')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='budgets', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-month', 'category_id'],
+                'indexes': [models.Index(fields=['user', 'month'], name='budget_user_month_idx')],
+                'constraints': [models.UniqueConstraint(fields=('category', 'month', 'currency'), name='budget_cat_month_cur_uniq')],
+            },
+        ),
+    ]
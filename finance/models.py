@@ -1,6 +1,10 @@
-from django.db import models
+from calendar import monthrange
+from datetime import date, timedelta
+
+from django.db import models, transaction as db_transaction
 from django.contrib.auth.models import User
 from django.core.exceptions import ValidationError
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 
 
@@ -14,9 +18,13 @@ class Account(models.Model):
 
     UZS = "UZS"
     USD = "USD"
+    EUR = "EUR"
+    RUB = "RUB"
     CURRENCY = (
         (UZS, _("So'm")),
         (USD, _("Dollar")),
+        (EUR, _("Yevro")),
+        (RUB, _("Rubl")),
     )
 
     UZCARD = "UZCARD"
@@ -38,6 +46,11 @@ class Account(models.Model):
     bank_name = models.CharField(max_length=80, blank=True, null=True)
     last4 = models.CharField(max_length=4, blank=True, null=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=["user", "currency"], name="acc_user_currency_idx"),
+        ]
+
     def __str__(self):
         parts = [self.name or self.get_type_display()]
         if self.currency:
@@ -59,6 +72,11 @@ class Category(models.Model):
     name = models.CharField(max_length=120)
     type = models.CharField(max_length=3, choices=CATEGORY_TYPES)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=["user", "type", "name"], name="cat_user_type_name_idx"),
+        ]
+
     def __str__(self):
         return f"{self.name} ({self.get_type_display()})"
 
@@ -79,19 +97,124 @@ class Transaction(models.Model):
     date = models.DateField()
     note = models.CharField(max_length=200, blank=True)
     currency = models.CharField(max_length=3, choices=Account.CURRENCY, blank=True, null=True)
+    # takroriy qoidadan yaratilgan bo‘lsa (manage.py materialize_recurring)
+    recurring = models.ForeignKey(
+        "RecurringTransaction", on_delete=models.SET_NULL, null=True, blank=True, related_name="transactions"
+    )
 
     class Meta:
         ordering = ["-date", "-id"]
+        indexes = [
+            # ro‘yxat va sana oralig‘i: WHERE user, date BETWEEN .. ORDER BY date, id
+            models.Index(fields=["user", "date", "id"], name="tx_user_date_id_idx"),
+            # summa bo‘yicha tartiblash: ORDER BY amount, id
+            models.Index(fields=["user", "amount", "id"], name="tx_user_amount_id_idx"),
+            # kirim/chiqim yig‘indilari jadvalga tegmasdan indeksdan o‘qiladi
+            models.Index(fields=["user", "type", "account", "amount"], name="tx_user_type_acc_amt_idx"),
+            # analytics: WHERE user, date BETWEEN .. GROUP BY oy, type / category
+            models.Index(fields=["user", "date", "type", "account", "category", "amount"], name="tx_user_date_cover_idx"),
+            # hisob/kategoriya filtri + tartib: WHERE account = .. ORDER BY date|amount, id
+            models.Index(fields=["account", "date", "id"], name="tx_acc_date_id_idx"),
+            models.Index(fields=["account", "amount", "id"], name="tx_acc_amount_id_idx"),
+            models.Index(fields=["category", "date", "id"], name="tx_cat_date_id_idx"),
+            models.Index(fields=["category", "amount", "id"], name="tx_cat_amount_id_idx"),
+        ]
+        constraints = [
+            # bitta qoida bir sanada bitta tranzaksiya — qayta ishga tushirish dublikat yaratmaydi
+            models.UniqueConstraint(
+                fields=["recurring", "date"], condition=models.Q(recurring__isnull=False),
+                name="tx_recurring_date_uniq",
+            ),
+        ]
+
+    LEDGER_FIELDS = ("account_id", "type", "amount", "date")
+    BUDGET_FIELDS = ("user_id", "category_id", "currency", "type", "amount", "date")
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        obj = super().from_db(db, field_names, values)
+        if set(cls.LEDGER_FIELDS) <= set(field_names):
+            obj._ledger_state = obj.ledger_entry()
+        if set(cls.BUDGET_FIELDS) <= set(field_names):
+            obj._budget_state = obj.budget_entry()
+        return obj
+
+    def ledger_entry(self):
+        """Balansga ta'sir qiladigan qiymatlar: (account_id, type, amount, date)."""
+        return tuple(getattr(self, f) for f in self.LEDGER_FIELDS)
+
+    def budget_entry(self):
+        """Byudjet hisoblagichiga ta'sir qiladigan qiymatlar: (user_id, category_id, currency, type, amount, date)."""
+        return tuple(getattr(self, f) for f in self.BUDGET_FIELDS)
 
     def save(self, *args, **kwargs):
+        from finance.services import budgets, ledger
+
         if self.account_id and not self.currency:
             self.currency = self.account.currency
-        super().save(*args, **kwargs)
+        with db_transaction.atomic():
+            old = getattr(self, "_ledger_state", None)
+            old_budget = getattr(self, "_budget_state", None)
+            if (old is None or old_budget is None) and not self._state.adding:
+                # .only()/bulk_create orqali olingan obyekt: eski holatni bazadan o‘qiymiz
+                row = Transaction.objects.filter(pk=self.pk).values_list(*self.LEDGER_FIELDS, *self.BUDGET_FIELDS).first()
+                if old is None:
+                    old = self._ledger_state = row and row[:len(self.LEDGER_FIELDS)]
+                if old_budget is None:
+                    old_budget = self._budget_state = row and row[len(self.LEDGER_FIELDS):]
+            super().save(*args, **kwargs)
+            ledger.post_change(old, self.ledger_entry())
+            budgets.post_change(old_budget, self.budget_entry())
+        self._ledger_state = self.ledger_entry()
+        self._budget_state = self.budget_entry()
 
     def __str__(self):
         return f"{self.get_type_display()} - {self.amount}"
 
 
+class AccountBalance(models.Model):
+    """Hisob balansining saqlangan nusxasi; Transaction yozilganda ledger servisi yangilaydi."""
+    account = models.OneToOneField(Account, on_delete=models.CASCADE, related_name="ledger_balance")
+    income = models.DecimalField(max_digits=17, decimal_places=2, default=0)
+    expense = models.DecimalField(max_digits=17, decimal_places=2, default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    @property
+    def balance(self):
+        return self.income - self.expense
+
+    def __str__(self):
+        return f"{self.account}: {self.balance}"
+
+
+class AccountRollup(models.Model):
+    """Hisob bo‘yicha oylik kirim/chiqim yig‘indisi (month = oyning 1-kuni)."""
+    account = models.ForeignKey(Account, on_delete=models.CASCADE, related_name="rollups")
+    month = models.DateField()
+    income = models.DecimalField(max_digits=17, decimal_places=2, default=0)
+    expense = models.DecimalField(max_digits=17, decimal_places=2, default=0)
+
+    class Meta:
+        unique_together = ("account", "month")
+        ordering = ["-month"]
+
+    def __str__(self):
+        return f"{self.account} {self.month:%Y-%m}: +{self.income} / -{self.expense}"
+
+
+class LedgerVersion(models.Model):
+    """
+    Foydalanuvchi ma'lumotlari (tranzaksiya, hisob, kategoriya, transfer) har o‘zgarganda oshadigan hisoblagich.
+    API’ning ETag/Last-Modified qiymatlari shundan olinadi. Qator foydalanuvchi yaratilganda qo‘shiladi (signals).
+    """
+    user = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True, related_name="ledger_version")
+    version = models.PositiveBigIntegerField(default=0)
+    changed_at = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return f"{self.user_id}: v{self.version}"
+
+
 class Comment(models.Model):
     transaction = models.ForeignKey(Transaction, on_delete=models.CASCADE, related_name="comments")
     user = models.ForeignKey(User, on_delete=models.CASCADE)
@@ -116,6 +239,8 @@ class Transfer(models.Model):
     )
 
     def clean(self):
+        if self.from_account_id is None or self.to_account_id is None:
+            return  # maydon xatosi allaqachon qayd etilgan (forma yoki full_clean)
         if self.from_account_id == self.to_account_id:
             raise ValidationError(_("Bir xil hisobga transfer qilib bo‘lmaydi."))
 
@@ -145,3 +270,185 @@ class ExchangeRate(models.Model):
 
     def __str__(self):
         return f"{self.date}: 1 {self.base} = {self.rate} {self.quote}"
+
+
+class RateRefreshJob(models.Model):
+    """CBU kurslarini yangilash navbati. Worker: manage.py run_rate_jobs."""
+    PENDING = "PENDING"
+    RUNNING = "RUNNING"
+    DONE = "DONE"
+    FAILED = "FAILED"
+    STATUSES = (
+        (PENDING, _("Navbatda")),
+        (RUNNING, _("Bajarilmoqda")),
+        (DONE, _("Tayyor")),
+        (FAILED, _("Xato")),
+    )
+    ACTIVE = (PENDING, RUNNING)
+
+    CBU = "CBU"
+    KINDS = (
+        (CBU, _("CBU kurslari")),
+    )
+
+    kind = models.CharField(max_length=8, choices=KINDS, default=CBU)
+    status = models.CharField(max_length=8, choices=STATUSES, default=PENDING)
+    requested_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    rows = models.PositiveIntegerField(default=0)
+    message = models.CharField(max_length=255, blank=True)
+
+    class Meta:
+        ordering = ["-created_at", "-id"]
+        constraints = [
+            # har bir turdan bir vaqtda faqat bitta faol (navbatdagi yoki bajarilayotgan) ish
+            models.UniqueConstraint(
+                fields=["kind"], condition=models.Q(status__in=["PENDING", "RUNNING"]),
+                name="one_active_rate_job",
+            ),
+        ]
+
+    def __str__(self):
+        return f"#{self.pk} {self.kind} {self.status}"
+
+
+class RecurringTransaction(models.Model):
+    """
+    Takroriy kirim/chiqim (oylik, ijara, obunalar). n-chi sana start_date + n * interval
+    birlikdan hisoblanadi (31-sana qisqa oylarda oy oxiriga tushadi, keyingi oyda yana 31).
+    next_date — hali yaratilmagan birinchi sana; tranzaksiyalarni materialize_recurring yaratadi.
+    """
+    DAILY = "DAILY"
+    WEEKLY = "WEEKLY"
+    MONTHLY = "MONTHLY"
+    YEARLY = "YEARLY"
+    FREQUENCIES = (
+        (DAILY, _("Har kuni")),
+        (WEEKLY, _("Har hafta")),
+        (MONTHLY, _("Har oy")),
+        (YEARLY, _("Har yil")),
+    )
+    MAX_INTERVAL = 365
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="recurring_transactions")
+    type = models.CharField(max_length=3, choices=Transaction.TRAN_TYPES)
+    account = models.ForeignKey(Account, on_delete=models.CASCADE)
+    category = models.ForeignKey(Category, on_delete=models.CASCADE)
+    amount = models.DecimalField(max_digits=15, decimal_places=2)
+    note = models.CharField(max_length=200, blank=True)
+    frequency = models.CharField(max_length=8, choices=FREQUENCIES, default=MONTHLY)
+    interval = models.PositiveSmallIntegerField(default=1)
+    start_date = models.DateField()
+    end_date = models.DateField(null=True, blank=True)
+    occurrences = models.PositiveIntegerField(default=0, editable=False)
+    next_date = models.DateField(null=True, blank=True, editable=False)
+    active = models.BooleanField(default=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ["next_date", "id"]
+        indexes = [
+            # generator: WHERE active AND next_date <= bugun
+            models.Index(fields=["active", "next_date"], name="recurring_due_idx"),
+        ]
+
+    def clean(self):
+        if self.amount is not None and self.amount <= 0:
+            raise ValidationError({"amount": _("Summa musbat bo‘lishi kerak.")})
+        if self.interval is not None and not 1 <= self.interval <= self.MAX_INTERVAL:
+            raise ValidationError({"interval": _("Interval 1 dan %(max)d gacha bo‘lishi kerak.") % {"max": self.MAX_INTERVAL}})
+        if self.start_date and self.end_date and self.end_date < self.start_date:
+            raise ValidationError({"end_date": _("Tugash sanasi boshlanishdan oldin bo‘lmaydi.")})
+        if self.account_id and self.category_id:
+            if self.account.user_id != self.user_id or self.category.user_id != self.user_id:
+                raise ValidationError(_("Hisob va kategoriya sizga tegishli bo‘lishi shart."))
+            if self.category.type != self.type:
+                raise ValidationError({"category": _("Kategoriya turi tranzaksiya turiga mos emas.")})
+
+    def nth(self, n):
+        """n-chi (0 dan) sana; end_date’dan yoki date.max’dan keyin bo‘lsa None (qoida tugaydi)."""
+        step = n * self.interval
+        start = self.start_date
+        try:
+            if self.frequency == self.DAILY:
+                value = start + timedelta(days=step)
+            elif self.frequency == self.WEEKLY:
+                value = start + timedelta(weeks=step)
+            else:
+                months = step * 12 if self.frequency == self.YEARLY else step
+                year, month = divmod(start.month - 1 + months, 12)
+                year += start.year
+                value = date(year, month + 1, min(start.day, monthrange(year, month + 1)[1]))
+        except (OverflowError, ValueError):
+            return None
+        if self.end_date and value > self.end_date:
+            return None
+        return value
+
+    def save(self, *args, **kwargs):
+        if self._state.adding and self.next_date is None:
+            self.next_date = self.nth(0)
+        super().save(*args, **kwargs)
+
+    def __str__(self):
+        return f"{self.get_frequency_display()}: {self.amount} {self.account.currency} ({self.category.name})"
+
+
+class Budget(models.Model):
+    """
+    Kategoriya bo‘yicha oylik chiqim limiti (month = oyning 1-kuni).
+    spent — shu oy va valyutadagi chiqimlar yig‘indisi; Transaction yozilganda budgets servisi
+    yangilaydi, manage.py reconcile_budgets qayta quradi.
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="budgets")
+    category = models.ForeignKey(Category, on_delete=models.CASCADE, related_name="budgets")
+    month = models.DateField()
+    currency = models.CharField(max_length=3, choices=Account.CURRENCY, default=Account.UZS)
+    limit = models.DecimalField(max_digits=15, decimal_places=2)
+    spent = models.DecimalField(max_digits=17, decimal_places=2, default=0, editable=False)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ["-month", "category_id"]
+        constraints = [
+            models.UniqueConstraint(fields=["category", "month", "currency"], name="budget_cat_month_cur_uniq"),
+        ]
+        indexes = [
+            # sahifa: WHERE user, month
+            models.Index(fields=["user", "month"], name="budget_user_month_idx"),
+        ]
+
+    @property
+    def remaining(self):
+        return self.limit - self.spent
+
+    @property
+    def percent(self):
+        return int(self.spent * 100 / self.limit) if self.limit else 0
+
+    @property
+    def over(self):
+        return self.spent > self.limit
+
+    def clean(self):
+        if self.limit is not None and self.limit <= 0:
+            raise ValidationError({"limit": _("Limit musbat bo‘lishi kerak.")})
+        if self.category_id:
+            if self.category.user_id != self.user_id:
+                raise ValidationError({"category": _("Kategoriya sizga tegishli bo‘lishi shart.")})
+            if self.category.type != Category.EX_:
+                raise ValidationError({"category": _("Byudjet faqat chiqim kategoriyasiga qo‘yiladi.")})
+
+    def save(self, *args, **kwargs):
+        from finance.services import budgets
+
+        if self.month:
+            self.month = self.month.replace(day=1)
+        # kategoriya/oy/valyuta o‘zgargan bo‘lishi mumkin — hisoblagich xom ma'lumotdan olinadi
+        self.spent = budgets.raw_spent(self)
+        super().save(*args, **kwargs)
+
+    def __str__(self):
+        return f"{self.category.name} {self.month:%Y-%m}: {self.spent}/{self.limit} {self.currency}"
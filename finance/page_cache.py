@@ -0,0 +1,157 @@
+"""
+Per-user sahifa keshi. Kalit: foydalanuvchi + uning LedgerVersion’i + kurslar versiyasi + til,
+sessiya/CSRF cookie, bugungi sana, yo‘l va so‘rov satri. Ma'lumot o‘zgarsa versiya oshadi va
+eski yozuvlar shunchaki ishlatilmay qoladi (FINANCE_PAGE_CACHE_TIMEOUT’dan keyin o‘chadi).
+"""
+import asyncio
+import hashlib
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from django.http import HttpResponse
+from django.utils import timezone
+from django.utils.cache import patch_cache_control, patch_vary_headers
+
+from finance.services import versions
+
+STATS_KEY = "finance:page_cache:stats:{view}:{outcome}"
+HIT = "hit"
+MISS = "miss"
+
+
+def _cache():
+    return caches[getattr(settings, "FINANCE_PAGE_CACHE", "default")]
+
+
+def _timeout():
+    return getattr(settings, "FINANCE_PAGE_CACHE_TIMEOUT", 600)
+
+
+def cache_key(request, name):
+    version = versions.current(request.user)
+    parts = [
+        name,
+        request.user.pk,
+        version.version,
+        version.changed_at.isoformat(),
+        versions.rates(),
+        getattr(request, "LANGUAGE_CODE", ""),
+        request.COOKIES.get(settings.SESSION_COOKIE_NAME, ""),
+        request.COOKIES.get(settings.CSRF_COOKIE_NAME, ""),
+        timezone.localdate().isoformat(),
+        request.path,
+        sorted(request.GET.lists()),
+    ]
+    digest = hashlib.sha256(repr(parts).encode()).hexdigest()
+    # foydalanuvchi id ochiq qoladi: xesh to‘qnashuvi bo‘lsa ham boshqa foydalanuvchi sahifasi chiqmaydi
+    return f"finance:page:{request.user.pk}:{digest}"
+
+
+def _cacheable(request):
+    if request.method != "GET":
+        return False
+    # yo‘lda turgan flash xabarlar sahifada chiqishi kerak
+    storage = getattr(request, "_messages", None)
+    return not (storage is not None and len(storage))
+
+
+def _store(key, response):
+    if response.status_code != 200 or response.streaming or response.cookies:
+        return
+    headers = {k: v for k, v in response.items() if k.lower() in ("content-type", "content-language")}
+    _cache().set(key, (response.content, headers), _timeout())
+
+
+def _hit(cached):
+    content, headers = cached
+    response = HttpResponse(content)
+    for k, v in headers.items():
+        response[k] = v
+    return response
+
+
+def _finish(response, outcome):
+    response["X-Cache"] = outcome.upper()
+    patch_vary_headers(response, ("Cookie",))
+    patch_cache_control(response, private=True)
+    return response
+
+
+def _count(name, outcome):
+    cache = _cache()
+    key = STATS_KEY.format(view=name, outcome=outcome)
+    if not cache.add(key, 1, timeout=None):
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, 1, timeout=None)
+
+
+def _lookup(request, name):
+    key = cache_key(request, name)
+    cached = _cache().get(key)
+    _count(name, HIT if cached is not None else MISS)
+    return key, cached
+
+
+def cached_page(name):
+    """
+    View dekoratori (login_required ichida qo‘llanadi). Sync va async view’lar uchun ishlaydi.
+    Javobga X-Cache: HIT/MISS sarlavhasi qo‘shiladi.
+    """
+    def decorator(view):
+        if asyncio.iscoroutinefunction(view):
+            @wraps(view)
+            async def async_wrapper(request, *args, **kwargs):
+                if not _cacheable(request):
+                    return await view(request, *args, **kwargs)
+                key, cached = await sync_to_async(_lookup)(request, name)
+                if cached is not None:
+                    return _finish(_hit(cached), HIT)
+                response = await view(request, *args, **kwargs)
+                await sync_to_async(_store)(key, response)
+                return _finish(response, MISS)
+            return async_wrapper
+
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if not _cacheable(request):
+                return view(request, *args, **kwargs)
+            key, cached = _lookup(request, name)
+            if cached is not None:
+                return _finish(_hit(cached), HIT)
+            response = view(request, *args, **kwargs)
+            _store(key, response)
+            return _finish(response, MISS)
+        return wrapper
+    return decorator
+
+
+VIEWS = ("dashboard", "monthly_report", "analytics", "profile")
+
+
+def stats(names=VIEWS):
+    """Return: {view: {"hits": n, "misses": n, "hit_rate": 0..1}} (+ "total")."""
+    cache = _cache()
+    keys = {(n, o): STATS_KEY.format(view=n, outcome=o) for n in names for o in (HIT, MISS)}
+    values = cache.get_many(list(keys.values()))
+    result = {}
+    for name in list(names) + ["total"]:
+        if name == "total":
+            hits = sum(r["hits"] for r in result.values())
+            misses = sum(r["misses"] for r in result.values())
+        else:
+            hits = values.get(keys[(name, HIT)], 0)
+            misses = values.get(keys[(name, MISS)], 0)
+        result[name] = {
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": hits / (hits + misses) if hits + misses else 0.0,
+        }
+    return result
+
+
+def reset_stats(names=VIEWS):
+    _cache().delete_many([STATS_KEY.format(view=n, outcome=o) for n in names for o in (HIT, MISS)])
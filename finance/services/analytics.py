@@ -0,0 +1,107 @@
+import asyncio
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db.models import Sum
+from django.db.models.functions import TruncMonth
+
+from finance.models import Transaction
+from finance.services.totals import currencies
+
+
+def _cache():
+    # settings.FINANCE_ANALYTICS_CACHE — CACHES dagi istalgan alias (locmem/file/db/redis)
+    return caches[getattr(settings, "FINANCE_ANALYTICS_CACHE", "default")]
+
+
+def cache_key(user_id, year, currency):
+    return f"finance:analytics:{user_id}:{year}:{currency}"
+
+
+def _monthly(user_id, year, currency):
+    return (
+        Transaction.objects
+        .filter(user_id=user_id, date__year=year, account__currency=currency)
+        .annotate(m=TruncMonth("date"))
+        .values("m", "type")
+        .annotate(total=Sum("amount"))
+        .order_by("m")
+    )
+
+
+def _top_categories(user_id, year, currency):
+    return (
+        Transaction.objects
+        .filter(user_id=user_id, type="EX", date__year=year, account__currency=currency)
+        .values("category__name")
+        .annotate(total=Sum("amount"))
+        .order_by("-total")[:10]
+    )
+
+
+def _series(monthly, cat_qs):
+    bucket = {}
+    for r in monthly:
+        m = r["m"].strftime("%Y-%m")
+        bucket.setdefault(m, {"IN": 0, "EX": 0})
+        bucket[m][r["type"]] = float(r["total"] or 0)
+
+    labels = sorted(bucket.keys())
+    return {
+        "labels": labels,
+        "income": [bucket[m]["IN"] for m in labels],
+        "expense": [bucket[m]["EX"] for m in labels],
+        "cat_labels": [x["category__name"] for x in cat_qs],
+        "cat_values": [float(x["total"] or 0) for x in cat_qs],
+    }
+
+
+def compute(user_id, year, currency):
+    return _series(_monthly(user_id, year, currency), _top_categories(user_id, year, currency))
+
+
+async def acompute(user_id, year, currency):
+    async def rows(qs):
+        return [r async for r in qs]
+
+    monthly, cat_qs = await asyncio.gather(
+        rows(_monthly(user_id, year, currency)), rows(_top_categories(user_id, year, currency))
+    )
+    return _series(monthly, cat_qs)
+
+
+def yearly_series(user_id, year, currency):
+    """
+    Yil/valyuta bo‘yicha grafik ma'lumotlari. Keshdan o‘qiladi; muddati yo‘q —
+    shu yildagi Transaction o‘zgarganda invalidate(), kategoriya nomi yoki hisob valyutasi
+    o‘zgarganda invalidate_user() o‘chiradi.
+    """
+    key = cache_key(user_id, year, currency)
+    cache = _cache()
+    data = cache.get(key)
+    if data is None:
+        data = compute(user_id, year, currency)
+        cache.set(key, data, timeout=None)
+    return data
+
+
+async def ayearly_series(user_id, year, currency):
+    key = cache_key(user_id, year, currency)
+    cache = _cache()
+    data = await cache.aget(key)
+    if data is None:
+        data = await acompute(user_id, year, currency)
+        await cache.aset(key, data, timeout=None)
+    return data
+
+
+def invalidate(user_id, years):
+    keys = [cache_key(user_id, y, c) for y in set(years) if y for c in currencies()]
+    if keys:
+        _cache().delete_many(keys)
+
+
+def invalidate_user(user_id):
+    """Foydalanuvchining tranzaksiyasi bor barcha yillari (Category/Account o‘zgarganda; 1 so‘rov)."""
+    years = Transaction.objects.filter(user_id=user_id).dates("date", "year").order_by()
+    invalidate(user_id, [d.year for d in years])
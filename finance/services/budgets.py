@@ -0,0 +1,169 @@
+"""
+Byudjetlarning spent hisoblagichi (Budget.spent).
+Chiqim tranzaksiyasi yozilganda/o‘chirilganda yoki transactions_created’da deltalar bitta
+UPDATE bilan qo‘shiladi. Byudjetli kategoriyalar foydalanuvchi bo‘yicha keshda — byudjeti yo‘q
+kategoriyalar uchun so‘rov umuman bajarilmaydi. Kesh settings.FINANCE_LOOKUP_CACHE alias’ida va
+FINANCE_LOOKUP_CACHE_TIMEOUT bilan: boshqa worker’da qo‘shilgan byudjet ko‘pi bilan shu vaqtgacha
+ko‘rinmay qolishi mumkin. Farq bo‘lsa manage.py reconcile_budgets tuzatadi.
+"""
+from calendar import monthrange
+from collections import defaultdict
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction as db_transaction
+from django.db.models import Case, F, Q, Sum, Value, When
+from django.db.models.functions import TruncMonth
+from django.utils import timezone
+
+from finance.models import Budget, Transaction
+from finance.services.ledger import MONEY, month_start
+from finance.services.totals import ZERO
+
+
+def _cache():
+    return caches[getattr(settings, "FINANCE_LOOKUP_CACHE", "default")]
+
+
+def _key(user_id):
+    return f"finance:budget_categories:{user_id}"
+
+
+def invalidate(user_id):
+    _cache().delete(_key(user_id))
+
+
+def budgeted_categories(user_ids):
+    """Return: {user_id: {category_id, ...}} — byudjeti bor kategoriyalar (keshsizlari uchun 1 so‘rov)."""
+    keys = {_key(u): u for u in user_ids}
+    found = {keys[k]: v for k, v in _cache().get_many(keys).items()}
+    missing = set(user_ids) - set(found)
+    if missing:
+        rows = Budget.objects.filter(user_id__in=missing).values_list("user_id", "category_id").distinct()
+        loaded = {u: set() for u in missing}
+        for user_id, category_id in rows:
+            loaded[user_id].add(category_id)
+        _cache().set_many(
+            {_key(u): v for u, v in loaded.items()},
+            timeout=getattr(settings, "FINANCE_LOOKUP_CACHE_TIMEOUT", 300),
+        )
+        found.update(loaded)
+    return found
+
+
+def _collect(entries):
+    """
+    entries: [((user_id, category_id, currency, type, amount, date), sign), ...]
+    Return: {(category_id, currency, month): delta} — faqat byudjetli kategoriyalardagi chiqimlar.
+    """
+    entries = [
+        (entry, sign) for entry, sign in entries
+        if entry and entry[3] == Transaction.EX_ and entry[1] and entry[4] is not None and entry[5] is not None
+    ]
+    if not entries:
+        return {}
+    budgeted = budgeted_categories({entry[0] for entry, _sign in entries})
+
+    deltas = defaultdict(lambda: ZERO)
+    for (user_id, category_id, currency, _type, amount, on_date), sign in entries:
+        if category_id in budgeted.get(user_id, ()):
+            deltas[(category_id, currency, month_start(on_date))] += Decimal(amount) * sign
+    return {k: v for k, v in deltas.items() if v}
+
+
+def post(entries):
+    """Deltalarni mos Budget qatorlariga F() orqali qo‘shadi: ko‘pi bilan 1 so‘rov, qatorlar yaratilmaydi."""
+    deltas = _collect(entries)
+    if not deltas:
+        return
+    Budget.objects.filter(
+        category_id__in={c for c, _cur, _m in deltas},
+        currency__in={cur for _c, cur, _m in deltas},
+        month__in={m for _c, _cur, m in deltas},
+    ).update(
+        spent=F("spent") + Case(
+            *[When(Q(category_id=c, currency=cur, month=m), then=Value(d)) for (c, cur, m), d in deltas.items()],
+            default=Value(ZERO),
+            output_field=MONEY,
+        ),
+        updated_at=timezone.now(),
+    )
+
+
+def post_change(old, new):
+    post([(old, -1), (new, 1)])
+
+
+def post_created(transactions):
+    post([(t.budget_entry(), 1) for t in transactions])
+
+
+def post_deleted(entry):
+    post([(entry, -1)])
+
+
+def _raw(budgets):
+    """Return: {(category_id, currency, month): chiqimlar yig‘indisi} — budgets’dagi kategoriyalar bo‘yicha."""
+    rows = (
+        Transaction.objects
+        .filter(type=Transaction.EX_, category__in=budgets.values("category_id"))
+        .annotate(m=TruncMonth("date"))
+        .values("category_id", "currency", "m")
+        .annotate(s=Sum("amount"))
+        .order_by()
+    )
+    return {(r["category_id"], r["currency"], r["m"]): r["s"] for r in rows}
+
+
+def _month_end(month):
+    return month.replace(day=monthrange(month.year, month.month)[1])
+
+
+def raw_spent(budget):
+    """Bitta byudjet uchun spent’ni Transaction jadvalidan hisoblaydi (Budget.save ishlatadi)."""
+    if not (budget.category_id and budget.month):
+        return ZERO
+    month = month_start(budget.month)
+    return Transaction.objects.filter(
+        type=Transaction.EX_, category_id=budget.category_id, currency=budget.currency,
+        date__gte=month, date__lte=_month_end(month),
+    ).aggregate(s=Sum("amount"))["s"] or ZERO
+
+
+def rebuild(budgets=None):
+    """Hisoblagichlarni xom Transaction jadvalidan qaytadan quradi (1 guruhlangan so‘rov + bulk_update). Return: soni."""
+    if budgets is None:
+        budgets = Budget.objects.all()
+    raw = _raw(budgets)
+    rows = list(budgets.only("id", "category_id", "currency", "month"))
+    now = timezone.now()
+    for b in rows:
+        b.spent = raw.get((b.category_id, b.currency, b.month), ZERO)
+        b.updated_at = now
+    with db_transaction.atomic():
+        Budget.objects.bulk_update(rows, ["spent", "updated_at"], batch_size=1000)
+    return len(rows)
+
+
+def verify(budgets=None):
+    """Saqlangan spent’ni xom ma'lumot bilan solishtiradi. Return: farqlar ro‘yxati (bo‘sh = hammasi to‘g‘ri)."""
+    if budgets is None:
+        budgets = Budget.objects.all()
+    raw = _raw(budgets)
+    problems = []
+    for b in budgets.only("id", "category_id", "currency", "month", "spent"):
+        expected = raw.get((b.category_id, b.currency, b.month), ZERO)
+        if b.spent != expected:
+            problems.append(f"budget={b.pk} {b.month:%Y-%m}: saqlangan {b.spent}, haqiqiy {expected}")
+    return problems
+
+
+def overview(user, month):
+    """Oy byudjetlari — faqat hisoblagichlar o‘qiladi (tranzaksiyalar jadvaliga murojaat yo‘q)."""
+    return list(
+        Budget.objects
+        .filter(user=user, month=month_start(month))
+        .select_related("category")
+        .order_by("category__name", "currency")
+    )
@@ -1,33 +1,146 @@
 # finance/services/cbu.py
-from decimal import Decimal
-from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from decimal import Decimal, ROUND_HALF_UP
+import threading
+
 import requests
+from django.core.cache import cache
+from django.db import transaction as db_transaction
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from finance.models import Account, ExchangeRate
+from finance.services import exchange, versions
+
+CBU_URL = "https://cbu.uz/uz/arkhiv-kursov-valyut/json/"  # rasmiy JSON
+CBU_ARCHIVE_URL = CBU_URL + "all/{date}/"  # {date} = YYYY-MM-DD
+
+TIMEOUT = (3.05, 10)  # (ulanish, o‘qish) soniya
+MAX_WORKERS = 4
+RETRIES = Retry(
+    total=3,
+    backoff_factor=0.5,
+    status_forcelist=(429, 500, 502, 503, 504),
+    allowed_methods=("GET",),
+)
+
+_session = None
+_session_lock = threading.Lock()
+
 
-from finance.models import ExchangeRate
+def get_session():
+    """Jarayon bo‘yicha bitta Session: TCP/TLS ulanishlari qayta ishlatiladi, 5xx/timeout’da backoff bilan qayta uriniladi."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=2, pool_maxsize=MAX_WORKERS, max_retries=RETRIES)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            _session = session
+    return _session
 
-CBU_URL = "https://cbu.uz/uz/arkhiv-kursov-valyut/json/"  # rasmiy JSON :contentReference[oaicite:1]{index=1}
 
-def update_usd_uzs():
+def _validators_key(url):
+    return f"finance:cbu:validators:{url}"
+
+
+def fetch(url=CBU_URL, conditional=True):
     """
-    CBU’dan USD kursini olib, ExchangeRate(base='USD', quote='UZS') qilib saqlaydi.
-    Return: (obj, created)
+    Return: (JSON ro‘yxat, validators). conditional=True bo‘lsa, oldingi ETag/Last-Modified
+    yuboriladi va javob 304 bo‘lsa data None bo‘ladi (o‘zgarish yo‘q).
+    validators faqat ma'lumot bazaga yozilgandan keyin remember() orqali saqlanadi.
     """
-    resp = requests.get(CBU_URL, timeout=20)
+    headers = {}
+    if conditional:
+        validators = cache.get(_validators_key(url)) or {}
+        if validators.get("etag"):
+            headers["If-None-Match"] = validators["etag"]
+        if validators.get("last_modified"):
+            headers["If-Modified-Since"] = validators["last_modified"]
+
+    resp = get_session().get(url, headers=headers, timeout=TIMEOUT)
+    if resp.status_code == 304:
+        return None, None
     resp.raise_for_status()
-    data = resp.json()
+    validators = {
+        "etag": resp.headers.get("ETag"),
+        "last_modified": resp.headers.get("Last-Modified"),
+    }
+    return resp.json(), validators
 
-    usd = next((x for x in data if x.get("Ccy") == "USD"), None)
-    if not usd:
-        raise RuntimeError("CBU javobida USD topilmadi")
 
-    # CBU odatda: Rate="11969.66", Date="16.01.2026"
-    rate = Decimal(str(usd["Rate"]).replace(",", "."))
-    rate_date = datetime.strptime(usd["Date"], "%d.%m.%Y").date()
+def remember(url, validators):
+    if validators and any(validators.values()):
+        cache.set(_validators_key(url), validators, timeout=None)
 
-    obj, created = ExchangeRate.objects.update_or_create(
-        base="USD",
-        quote="UZS",
-        date=rate_date,
-        defaults={"rate": rate},
+
+def parse(data):
+    """
+    CBU qatorlari: {"Ccy": "USD", "Nominal": "1", "Rate": "11969.66", "Date": "16.01.2026", ...}
+    Return: saqlanmagan ExchangeRate(base=Ccy, quote=UZS) ro‘yxati, kurs 1 birlik uchun.
+    """
+    rates = []
+    for item in data:
+        ccy = (item.get("Ccy") or "").upper()
+        if not ccy or ccy == Account.UZS:
+            continue
+        nominal = Decimal(str(item.get("Nominal") or "1"))
+        rate = Decimal(str(item["Rate"]).replace(",", ".")) / nominal
+        rates.append(ExchangeRate(
+            base=ccy,
+            quote=Account.UZS,
+            rate=rate.quantize(Decimal("0.000001"), rounding=ROUND_HALF_UP),
+            date=datetime.strptime(item["Date"], "%d.%m.%Y").date(),
+        ))
+    return rates
+
+
+def upsert(rates):
+    """Barcha kurslarni bitta INSERT .. ON CONFLICT DO UPDATE bilan yozadi."""
+    if not rates:
+        return 0
+    ExchangeRate.objects.bulk_create(
+        rates,
+        update_conflicts=True,
+        unique_fields=["base", "quote", "date"],
+        update_fields=["rate"],
+        batch_size=500,
     )
-    return obj, created
+    # bulk_create post_save yubormaydi
+    exchange.invalidate()
+    versions.bump_rates()
+    db_transaction.on_commit(exchange.invalidate)
+    return len(rates)
+
+
+def ingest(url=CBU_URL):
+    """Bugungi kurslarni yangilaydi. Return: yozilgan qatorlar soni (0 — CBU’da o‘zgarish yo‘q)."""
+    data, validators = fetch(url)
+    if data is None:
+        return 0
+    count = upsert(parse(data))
+    remember(url, validators)
+    return count
+
+
+def backfill(start, end, url=CBU_ARCHIVE_URL, max_workers=MAX_WORKERS):
+    """
+    [start, end] oralig‘idagi arxiv kunlarini cheklangan thread pool’da parallel yuklab,
+    barchasini bitta upsert bilan yozadi. Bazaga faqat asosiy oqim yozadi.
+    """
+    days = [start + timedelta(days=i) for i in range((end - start).days + 1)]
+
+    def load(day):
+        data, _validators = fetch(url.format(date=day.isoformat()), conditional=False)
+        return data
+
+    rates = []
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        for data in pool.map(load, days):
+            rates.extend(parse(data))
+
+    # dam olish kunlari arxiv oldingi ish kuni kursini qaytaradi — takrorlarni olib tashlaymiz
+    unique = {(r.base, r.quote, r.date): r for r in rates}
+    return upsert(list(unique.values()))
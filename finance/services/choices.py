@@ -0,0 +1,45 @@
+"""
+Formalar uchun foydalanuvchi hisoblari va kategoriyalari keshi (TransactionForm, TransferForm).
+Keshda qatorlar saqlanadi, obyektlar Model.from_db() bilan tiklanadi — kesh urilganda formani
+qurish va chizish bazaga murojaat qilmaydi. Account/Category yozilganda signals tozalaydi; kesh
+settings.FINANCE_LOOKUP_CACHE alias’ida FINANCE_LOOKUP_CACHE_TIMEOUT bilan. Boshqa worker’da
+o‘chirilgan obyekt keshda qolishi mumkin — POST’da CachedChoicesMixin uni bitta so‘rov bilan tekshiradi.
+"""
+from django.conf import settings
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS
+
+from finance.models import Account, Category
+
+
+def _cache():
+    return caches[getattr(settings, "FINANCE_LOOKUP_CACHE", "default")]
+
+
+def _key(model, user_id):
+    return f"finance:choices:{model._meta.model_name}:{user_id}"
+
+
+def invalidate(model, user_id):
+    _cache().delete(_key(model, user_id))
+
+
+def _objects(model, user_id):
+    names = tuple(f.attname for f in model._meta.concrete_fields)
+    cache = _cache()
+    cached = cache.get(_key(model, user_id))
+    # ustunlar ro‘yxati ham saqlanadi: migratsiyadan keyin eski qatorlar ishlatilmaydi
+    if cached is None or cached[0] != names:
+        rows = list(model.objects.filter(user_id=user_id).order_by("pk").values_list(*names))
+        cached = (names, rows)
+        cache.set(_key(model, user_id), cached, timeout=getattr(settings, "FINANCE_LOOKUP_CACHE_TIMEOUT", 300))
+    return [model.from_db(DEFAULT_DB_ALIAS, names, row) for row in cached[1]]
+
+
+def accounts(user):
+    """Return: foydalanuvchining hisoblari (pk bo‘yicha), bazadan yuklangan Account obyektlari kabi."""
+    return _objects(Account, user.pk)
+
+
+def categories(user):
+    return _objects(Category, user.pk)
@@ -1,10 +1,89 @@
+import threading
+from bisect import bisect_right
 from decimal import Decimal, ROUND_HALF_UP
 from django.utils import timezone
-from finance.models import ExchangeRate
+from finance.models import Account, ExchangeRate
+
+# Kurslar matritsasi: (base, quote) -> "oyoqlar" kortezhi, har biri (sanalar, kurslar, teskari).
+# To‘g‘ridan-to‘g‘ri juftlik bo‘lmasa teskarisi (1 / kurs), u ham bo‘lmasa UZS orqali
+# triangulyatsiya (base -> UZS -> quote). Barcha kurslar bitta so‘rovda yuklanadi — valyuta qo‘shish
+# sahifaga qo‘shimcha so‘rov qo‘shmaydi. Har bir jarayon o‘z nusxasini saqlaydi;
+# ExchangeRate yozilganda signals orqali tozalanadi.
+PIVOT = Account.UZS
+_matrix = None
+_generation = 0
+_lock = threading.Lock()
 
 def _q(d: Decimal) -> Decimal:
     return d.quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
 
+def invalidate():
+    global _generation, _matrix
+    with _lock:
+        _generation += 1
+        _matrix = None
+
+def _direct_legs(series, base, quote):
+    if (base, quote) in series:
+        return ((*series[base, quote], False),)
+    if (quote, base) in series:
+        return ((*series[quote, base], True),)
+    return ()
+
+def _build(series, codes):
+    matrix = {}
+    for base in codes:
+        for quote in codes:
+            if base == quote:
+                continue
+            legs = _direct_legs(series, base, quote)
+            if not legs and PIVOT not in (base, quote):
+                first = _direct_legs(series, base, PIVOT)
+                second = _direct_legs(series, PIVOT, quote)
+                legs = first + second if first and second else ()
+            matrix[base, quote] = legs
+    return matrix
+
+def _load_matrix():
+    global _matrix
+    matrix = _matrix
+    if matrix is not None:
+        return matrix
+
+    generation = _generation
+    codes = [code for code, _label in Account.CURRENCY]
+    series = {}
+    rows = (
+        ExchangeRate.objects
+        .filter(base__in=codes, quote__in=codes)
+        .order_by("base", "quote", "date")
+        .values_list("base", "quote", "date", "rate")
+    )
+    for base, quote, on_date, rate in rows:
+        dates, rates = series.setdefault((base, quote), ([], []))
+        dates.append(on_date)
+        rates.append(rate)
+    matrix = _build(series, codes)
+    with _lock:
+        # yuklash paytida invalidate() chaqirilgan bo‘lsa, eskirgan matritsani saqlamaymiz
+        if generation == _generation:
+            _matrix = matrix
+    return matrix
+
+def _legs(base: str, quote: str):
+    return _load_matrix().get((base, quote), ())
+
+def _rate_on(legs, on_date, base, quote) -> Decimal:
+    if not legs:
+        raise ValueError(f"Kurs topilmadi: {base}->{quote}")
+    result = Decimal("1")
+    for dates, rates, inverse in legs:
+        i = bisect_right(dates, on_date)
+        if i == 0:
+            raise ValueError(f"Kurs topilmadi: {base}->{quote}")
+        result = result / rates[i - 1] if inverse else result * rates[i - 1]
+    return result
+
 def get_rate(base: str, quote: str, on_date=None) -> Decimal:
     if base == quote:
         return Decimal("1")
@@ -12,16 +91,31 @@ def get_rate(base: str, quote: str, on_date=None) -> Decimal:
     if on_date is None:
         on_date = timezone.localdate()
 
-    rate_obj = (
-        ExchangeRate.objects
-        .filter(base=base, quote=quote, date__lte=on_date)
-        .first()
-    )
-
-    if not rate_obj:
-        raise ValueError(f"Kurs topilmadi: {base}->{quote}")
+    return _rate_on(_legs(base, quote), on_date, base, quote)
 
-    return rate_obj.rate
+def first_rate_date(base: str, quote: str):
+    if base == quote:
+        return None
+    legs = _legs(base, quote)
+    if not legs or not all(dates for dates, _rates, _inverse in legs):
+        return None
+    # triangulyatsiyada ikkala oyoqning kursi ham bo‘lishi kerak
+    return max(dates[0] for dates, _rates, _inverse in legs)
 
 def convert(amount: Decimal, base: str, quote: str, on_date=None) -> Decimal:
     return _q(amount * get_rate(base, quote, on_date))
+
+def convert_many(amounts, dates, base: str, quote: str) -> list:
+    """
+    amounts[i] ni dates[i] sanasidagi (yoki undan oldingi eng yaqin) kurs bo‘yicha o‘giradi.
+    Kurslar matritsasi bir marta yuklanadi, har bir qiymat uchun bisect — qo‘shimcha so‘rovsiz.
+    """
+    if base == quote:
+        return [_q(Decimal(a)) for a in amounts]
+
+    today = timezone.localdate()
+    legs = _legs(base, quote)
+    return [
+        _q(amount * _rate_on(legs, on_date or today, base, quote))
+        for amount, on_date in zip(amounts, dates)
+    ]
@@ -0,0 +1,61 @@
+import csv
+import re
+
+from django.http import StreamingHttpResponse
+from django.utils.http import content_disposition_header
+
+from finance.services.pagination import ORDERINGS
+from finance.services.totals import currency_totals
+
+CHUNK_SIZE = 2000
+
+HEADER = ("date", "type", "category", "account", "currency", "amount", "note")
+COLUMNS = ("date", "type", "category__name", "account__name", "account__currency", "amount", "note")
+# Excel/LibreOffice bu belgilar bilan boshlangan katakni formula deb bajaradi (CSV injection)
+FORMULA_PREFIXES = ("=", "+", "-", "@", "\t", "\r")
+
+
+class _Echo:
+    """csv.writer uchun psevdo-bufer: yozilgan qatorni saqlamay qaytaradi."""
+
+    def write(self, value):
+        return value
+
+
+def _cell(value):
+    """Foydalanuvchi matni formula bo‘lib ochilmasligi uchun oldiga ' qo‘yiladi; sonlar o‘zgarmaydi."""
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+def safe_filename(name):
+    """Content-Disposition uchun: faqat harf, raqam, nuqta, chiziqcha va pastki chiziq."""
+    return re.sub(r"[^A-Za-z0-9.-]+", "_", name).strip("._") or "export.csv"
+
+
+def csv_rows(qs, order, with_totals=False):
+    """
+    Model obyektlari yaratmasdan (values_list + iterator) qatorlarni birma-bir CSV satr sifatida beradi.
+    Boshidagi BOM — Excel UTF-8 faylni to‘g‘ri ochishi uchun.
+    """
+    writer = csv.writer(_Echo())
+    yield "\ufeff"
+    yield writer.writerow(HEADER)
+    rows = qs.order_by(*ORDERINGS[order]).values_list(*COLUMNS).iterator(chunk_size=CHUNK_SIZE)
+    for row in rows:
+        yield writer.writerow([_cell(v) for v in row])
+
+    if with_totals:
+        yield writer.writerow(())
+        yield writer.writerow(("currency", "income", "expense", "balance"))
+        for code, t in currency_totals(qs).items():
+            yield writer.writerow((code, t["income"], t["expense"], t["balance"]))
+
+
+def csv_response(qs, order, filename, with_totals=False):
+    response = StreamingHttpResponse(
+        csv_rows(qs, order, with_totals), content_type="text/csv; charset=utf-8"
+    )
+    response["Content-Disposition"] = content_disposition_header(True, safe_filename(filename))
+    return response
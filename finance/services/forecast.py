@@ -0,0 +1,167 @@
+"""
+Hisoblar balansining keyingi oylar uchun prognozi (analytics sahifasi).
+Hisob × kun sof oqimi bitta values_list so‘rovi bilan olinadi va NumPy massivlarida oylarga
+yig‘iladi. Daraja — oxirgi WINDOW oyning mavsumiylikdan tozalangan o‘rtachasi (moving average),
+mavsumiylik — markazlashgan 12 oylik o‘rtachadan yil oyi bo‘yicha o‘rtacha og‘ish.
+Hisob-kitobda hisoblar yoki kunlar bo‘yicha Python sikli yo‘q.
+NumPy ixtiyoriy: o‘rnatilmagan bo‘lsa available() False va sahifa prognozsiz chiqadi.
+"""
+from datetime import date
+
+from django.db.models import Case, CharField, F, FloatField, Sum, When
+from django.db.models.functions import Cast
+from django.utils import timezone
+
+from finance.models import Account, Transaction
+from finance.services.ledger import with_ledger_balances
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover
+    np = None
+
+HISTORY_MONTHS = 120  # 10 yil
+WINDOW = 6
+SEASON = 12
+DEFAULT_MONTHS = 6
+MAX_MONTHS = 24
+
+
+def available():
+    return np is not None
+
+
+def _add_months(d, n):
+    year, month = divmod(d.month - 1 + n, 12)
+    return date(d.year + year, month + 1, 1)
+
+
+def _daily_rows(user, account_ids, start, end):
+    """
+    (account_id, "YYYY-MM-DD", sof summa) — hisob × kun bo‘yicha guruhlangan.
+    Sana matn, summa float: Django’ning qatorma-qator date/Decimal konvertorlari ishlamaydi
+    (10 yil × o‘nlab hisobda ular so‘rovning o‘zidan sekinroq).
+    """
+    signed = Case(When(type=Transaction.IN_, then=F("amount")), default=-F("amount"))
+    return (
+        Transaction.objects
+        .filter(user=user, account_id__in=account_ids, date__gte=start, date__lt=end)
+        .values("account_id", day=Cast("date", CharField()))
+        .annotate(net=Cast(Sum(signed), FloatField()))
+        .values_list("account_id", "day", "net")
+        .order_by()
+    )
+
+
+def monthly_matrix(rows, account_ids, start, months):
+    """
+    rows: [(account_id, "YYYY-MM-DD", net), ...] — kunlik qatorlar.
+    Return: (hisoblar, oylar) matritsa; start oyidan oldin/keyingi qatorlar tashlanadi.
+    """
+    if not rows:
+        return np.zeros((len(account_ids), months))
+    acc, days, net = zip(*rows)
+    ids = np.asarray(account_ids)
+    order = np.argsort(ids)
+    acc_idx = order[np.searchsorted(ids, np.asarray(acc), sorter=order)]
+    month_idx = (
+        np.array(days, dtype="datetime64[D]").astype("datetime64[M]") - np.datetime64(start, "M")
+    ).astype(int)
+    keep = (month_idx >= 0) & (month_idx < months)
+    values = np.fromiter(net, dtype=float, count=len(net))
+    flat = acc_idx[keep] * months + month_idx[keep]
+    return np.bincount(flat, weights=values[keep], minlength=len(account_ids) * months).reshape(-1, months)
+
+
+def _moving_average(x, window):
+    """Qatorlar bo‘yicha oxirgi `window` ustun o‘rtachasi; oynada NaN bo‘lsa NaN."""
+    valid = ~np.isnan(x)
+    pad = ((0, 0), (1, 0))
+    sums = np.cumsum(np.pad(np.where(valid, x, 0.0), pad), axis=1)
+    counts = np.cumsum(np.pad(valid, pad), axis=1)
+    out = np.full(x.shape, np.nan)
+    window_counts = counts[:, window:] - counts[:, :-window]
+    out[:, window - 1:] = np.where(
+        window_counts == window, (sums[:, window:] - sums[:, :-window]) / window, np.nan
+    )
+    return out
+
+
+def decompose(matrix, first_month, window=WINDOW):
+    """
+    matrix: (hisoblar, oylar) oylik sof oqim, first_month — birinchi ustunning yil oyi (0..11).
+    Hisob birinchi harakatidan oldingi oylar hisobga olinmaydi.
+    Return: (level[hisob], seasonal[hisob, 12]).
+    """
+    n_acc, n = matrix.shape
+    data = np.where(np.cumsum(matrix != 0, axis=1) > 0, matrix, np.nan)
+    moy = (first_month + np.arange(n)) % 12
+    onehot = np.eye(12)[moy]
+
+    seasonal = np.zeros((n_acc, 12))
+    if n >= 2 * SEASON:
+        ma = _moving_average(data, SEASON)
+        # 2×12 markazlashgan o‘rtacha: t uchun (ma[t+5] + ma[t+6]) / 2
+        trend = np.full(data.shape, np.nan)
+        trend[:, 6:n - 6] = (ma[:, 11:n - 1] + ma[:, 12:n]) / 2
+        resid = data - trend
+        valid = ~np.isnan(resid)
+        sums = np.where(valid, resid, 0.0) @ onehot
+        counts = valid.astype(float) @ onehot
+        seasonal = np.divide(sums, counts, out=np.zeros_like(sums), where=counts > 0)
+        # to‘liq yil ma'lumoti bor hisoblarda og‘ishlar yig‘indisi 0 bo‘lishi kerak
+        full = (counts > 0).all(axis=1)
+        seasonal[full] -= seasonal[full].mean(axis=1, keepdims=True)
+        seasonal[~full] = 0.0
+
+    w = min(window, n)
+    recent = data[:, n - w:] - seasonal[:, moy[n - w:]]
+    valid = ~np.isnan(recent)
+    counts = valid.sum(axis=1)
+    level = np.divide(
+        np.where(valid, recent, 0.0).sum(axis=1), counts, out=np.zeros(n_acc), where=counts > 0
+    )
+    return level, seasonal
+
+
+def project(level, seasonal, balances, current_month, months, remaining=1.0):
+    """
+    Har bir oy oxiridagi balans: joriy oy (qolgan `remaining` ulushi) va keyingi months-1 oy.
+    Return: (hisoblar, months) matritsa.
+    """
+    moy = (current_month + np.arange(months)) % 12
+    flows = level[:, None] + seasonal[:, moy]
+    flows[:, 0] *= remaining
+    return np.asarray(balances, dtype=float)[:, None] + np.cumsum(flows, axis=1)
+
+
+def forecast(user, currency, months=DEFAULT_MONTHS, today=None):
+    """
+    Tanlangan valyutadagi hisoblar prognozi: 2 so‘rov (hisoblar saqlangan balans bilan, kunlik qatorlar).
+    Return: {"labels", "accounts": [{"name", "points"}], "total"} yoki None (NumPy yo‘q / hisob yo‘q).
+    """
+    if not available():
+        return None
+    accounts = list(with_ledger_balances(Account.objects.filter(user=user, currency=currency)).order_by("id"))
+    if not accounts:
+        return None
+    months = max(1, min(months, MAX_MONTHS))
+    today = today or timezone.localdate()
+    current = today.replace(day=1)
+    start = _add_months(current, -HISTORY_MONTHS)
+
+    ids = [a.pk for a in accounts]
+    rows = list(_daily_rows(user, ids, start, current))
+    matrix = monthly_matrix(rows, ids, start, HISTORY_MONTHS)
+    level, seasonal = decompose(matrix, start.month - 1)
+
+    balances = [a.calculated_balance for a in accounts]
+    days = (_add_months(current, 1) - current).days
+    remaining = (days - today.day + 1) / days
+    points = np.round(project(level, seasonal, balances, current.month - 1, months, remaining), 2)
+
+    return {
+        "labels": [f"{_add_months(current, h):%Y-%m}" for h in range(months)],
+        "accounts": [{"name": str(a), "points": p} for a, p in zip(accounts, points.tolist())],
+        "total": np.round(points.sum(axis=0), 2).tolist(),
+    }
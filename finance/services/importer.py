@@ -0,0 +1,232 @@
+import csv
+import io
+import time
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+
+from django.db import transaction as db_transaction
+
+from finance.models import Account, Category, Transaction
+from finance.signals import transactions_created
+
+BATCH_SIZE = 1000
+MAX_ERRORS = 50
+MAX_AMOUNT = Decimal("1e13")  # Transaction.amount: max_digits=15, decimal_places=2
+
+CSV = "csv"
+STATEMENT = "statement"
+FORMATS = (
+    (CSV, "CSV (date, type, amount, category, account, note)"),
+    (STATEMENT, "Uzcard/Humo ko‘chirma (Sana, Summa, Tavsif)"),
+)
+
+_TYPES = {
+    "in": Transaction.IN_, "kirim": Transaction.IN_, "income": Transaction.IN_, "приход": Transaction.IN_,
+    "ex": Transaction.EX_, "chiqim": Transaction.EX_, "expense": Transaction.EX_, "расход": Transaction.EX_,
+}
+_DATE_FORMATS = ("%Y-%m-%d", "%d.%m.%Y", "%d.%m.%Y %H:%M", "%d.%m.%Y %H:%M:%S", "%d/%m/%Y")
+
+# ko‘chirma ustunlari: bank eksportlarida nomlar til/bank bo‘yicha farq qiladi
+_STATEMENT_COLUMNS = {
+    "date": ("sana", "дата", "date", "дата операции", "operatsiya sanasi"),
+    "amount": ("summa", "сумма", "amount"),
+    "note": ("tavsif", "izoh", "описание", "назначение", "description", "details"),
+    "category": ("kategoriya", "категория", "category"),
+}
+
+IMPORT_CATEGORIES = {
+    Transaction.IN_: "Import (kirim)",
+    Transaction.EX_: "Import (chiqim)",
+}
+
+
+class RowError(ValueError):
+    pass
+
+
+class ImportResult:
+    def __init__(self):
+        self.created = 0
+        self.skipped = 0
+        self.errors = []
+        self.seconds = 0.0
+
+    def add_error(self, line, message):
+        self.skipped += 1
+        if len(self.errors) < MAX_ERRORS:
+            self.errors.append(f"{line}-qator: {message}")
+
+    @property
+    def rows_per_second(self):
+        return self.created / self.seconds if self.seconds else 0.0
+
+    def __str__(self):
+        return (
+            f"{self.created} ta qo‘shildi, {self.skipped} ta o‘tkazib yuborildi, "
+            f"{self.seconds:.2f} s ({self.rows_per_second:.0f} qator/s)"
+        )
+
+
+def parse_amount(value):
+    cleaned = (value or "").replace("\xa0", "").replace(" ", "").replace(",", ".")
+    try:
+        amount = Decimal(cleaned)
+    except InvalidOperation:
+        raise RowError(f"summa noto‘g‘ri: {value!r}")
+    if not amount.is_finite() or abs(amount) >= MAX_AMOUNT:
+        raise RowError(f"summa noto‘g‘ri: {value!r}")
+    return amount.quantize(Decimal("0.01"))
+
+
+def parse_date(value):
+    value = (value or "").strip()
+    for fmt in _DATE_FORMATS:
+        try:
+            return datetime.strptime(value, fmt).date()
+        except ValueError:
+            continue
+    raise RowError(f"sana noto‘g‘ri: {value!r}")
+
+
+def read_rows(fileobj, encoding="utf-8-sig"):
+    """
+    Fayldan qatorlarni birma-bir o‘qiydi (generator) — fayl hajmidan qat'i nazar xotira o‘zgarmaydi.
+    fileobj: binar yoki matnli fayl. Yield: (qator raqami, {kichik harfli ustun: qiymat}).
+    """
+    if not isinstance(fileobj, io.TextIOBase):
+        fileobj = io.TextIOWrapper(fileobj, encoding=encoding, newline="")
+    sample = fileobj.read(4096)
+    fileobj.seek(0)
+    try:
+        dialect = csv.Sniffer().sniff(sample, delimiters=",;\t")
+    except csv.Error:
+        dialect = csv.excel
+    reader = csv.reader(fileobj, dialect)
+    header = [h.strip().lower() for h in next(reader, [])]
+    for line, values in enumerate(reader, start=2):
+        if not any(v.strip() for v in values):
+            continue
+        yield line, dict(zip(header, (v.strip() for v in values)))
+
+
+class Lookup:
+    """Foydalanuvchi kategoriya va hisoblarini bir marta yuklab, yangilarini faqat birinchi uchraganda yaratadi."""
+
+    def __init__(self, user):
+        self.user = user
+        self.categories = {
+            (c.name.lower(), c.type): c for c in Category.objects.filter(user=user)
+        }
+        self.accounts = {}
+        accounts = list(Account.objects.filter(user=user).order_by("pk"))
+        # ustuvorlik: nom, karta oxirgi 4 raqami, so‘ng id — "12" nomli hisob 12-id’li hisobga aylanib ketmaydi
+        for a in accounts:
+            if a.name:
+                self.accounts.setdefault(a.name.lower(), a)
+        for a in accounts:
+            if a.last4:
+                self.accounts.setdefault(a.last4, a)
+        for a in accounts:
+            self.accounts.setdefault(str(a.pk), a)
+
+    def category(self, name, tx_type):
+        name = (name or IMPORT_CATEGORIES[tx_type])[:120]
+        key = (name.lower(), tx_type)
+        if key not in self.categories:
+            self.categories[key] = Category.objects.create(user=self.user, name=name, type=tx_type)
+        return self.categories[key]
+
+    def account(self, name, currency=None):
+        if not name:
+            raise RowError("hisob ko‘rsatilmagan")
+        key = name.lower()
+        if key not in self.accounts:
+            currency = (currency or Account.UZS).upper()
+            if currency not in dict(Account.CURRENCY):
+                raise RowError(f"valyuta noma'lum: {currency!r}")
+            self.accounts[key] = Account.objects.create(
+                user=self.user, name=name[:120], type=Account.CASH, currency=currency
+            )
+        return self.accounts[key]
+
+
+def _csv_transaction(row, lookup, account):
+    tx_type = _TYPES.get(row.get("type", "").lower())
+    if tx_type is None:
+        raise RowError(f"tur noto‘g‘ri: {row.get('type')!r}")
+    amount = parse_amount(row.get("amount"))
+    if amount <= 0:
+        raise RowError("summa musbat bo‘lishi kerak")
+    on_date = parse_date(row.get("date"))
+    if account is None:
+        account = lookup.account(row.get("account"), row.get("currency"))
+    category = lookup.category(row.get("category"), tx_type)
+    return tx_type, amount, on_date, category, account, row.get("note", "")
+
+
+def _statement_value(row, name):
+    for column in _STATEMENT_COLUMNS[name]:
+        if column in row:
+            return row[column]
+    return ""
+
+
+def _statement_transaction(row, lookup, account):
+    if account is None:
+        raise RowError("ko‘chirma uchun hisob tanlanishi shart")
+    amount = parse_amount(_statement_value(row, "amount"))
+    if amount == 0:
+        raise RowError("summa nol")
+    on_date = parse_date(_statement_value(row, "date"))
+    tx_type = Transaction.IN_ if amount > 0 else Transaction.EX_
+    category = lookup.category(_statement_value(row, "category"), tx_type)
+    return tx_type, abs(amount), on_date, category, account, _statement_value(row, "note")
+
+
+_BUILDERS = {
+    CSV: _csv_transaction,
+    STATEMENT: _statement_transaction,
+}
+
+
+def _flush(batch):
+    with db_transaction.atomic():
+        Transaction.objects.bulk_create(batch)
+        transactions_created.send(sender=Transaction, transactions=batch)
+
+
+def import_transactions(user, fileobj, fmt=CSV, account=None, batch_size=BATCH_SIZE, encoding="utf-8-sig"):
+    """
+    Faylni oqim bilan o‘qib, tranzaksiyalarni batch_size bo‘laklarda bulk_create qiladi.
+    Xato qator butun importni to‘xtatmaydi, o‘tkazib yuboriladi. Butun import bitta atomic blokda:
+    fayl o‘rtasida kodlash xatosi (UnicodeDecodeError) yoki buzilgan CSV (csv.Error) bo‘lsa hech narsa
+    yozilmaydi — xato chaqiruvchiga o‘tadi, tuzatilgan fayl bilan qayta yuklash dublikat bermaydi. Bo‘laklar xotirani cheklash uchun qoladi.
+    account berilsa, barcha qatorlar shu hisobga yoziladi (ko‘chirma uchun majburiy).
+    """
+    build = _BUILDERS[fmt]
+    result = ImportResult()
+    started = time.perf_counter()
+
+    with db_transaction.atomic():
+        lookup = Lookup(user)
+        batch = []
+        for line, row in read_rows(fileobj, encoding):
+            try:
+                tx_type, amount, on_date, category, acc, note = build(row, lookup, account)
+            except RowError as e:
+                result.add_error(line, e)
+                continue
+            batch.append(Transaction(
+                user=user, type=tx_type, category=category, account=acc,
+                amount=amount, date=on_date, note=(note or "")[:200], currency=acc.currency,
+            ))
+            if len(batch) >= batch_size:
+                _flush(batch)
+                result.created += len(batch)
+                batch = []
+        if batch:
+            _flush(batch)
+            result.created += len(batch)
+
+    result.seconds = time.perf_counter() - started
+    return result
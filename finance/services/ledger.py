@@ -0,0 +1,209 @@
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import transaction as db_transaction
+from django.db.models import Case, DecimalField, F, Q, Sum, Value, When
+from django.db.models.functions import Coalesce, TruncMonth
+from django.utils import timezone
+
+from finance.models import Account, AccountBalance, AccountRollup, Transaction
+from finance.services.totals import ZERO, totals_from_rows, with_balances
+
+MONEY = DecimalField(max_digits=17, decimal_places=2)
+
+
+def month_start(d):
+    return d.replace(day=1)
+
+
+def _collect(entries):
+    """
+    entries: [((account_id, type, amount, date), sign), ...]
+    Return: balans va oylik rollup bo‘yicha {kalit: [income_delta, expense_delta]}
+    """
+    balances = defaultdict(lambda: [ZERO, ZERO])
+    rollups = defaultdict(lambda: [ZERO, ZERO])
+    for entry, sign in entries:
+        if not entry:
+            continue
+        account_id, tx_type, amount, on_date = entry
+        if not account_id or amount is None or on_date is None:
+            continue
+        idx = 0 if tx_type == Transaction.IN_ else 1
+        delta = Decimal(amount) * sign
+        balances[account_id][idx] += delta
+        rollups[(account_id, month_start(on_date))][idx] += delta
+
+    balances = {k: v for k, v in balances.items() if any(v)}
+    rollups = {k: v for k, v in rollups.items() if any(v)}
+    return balances, rollups
+
+
+def _case(whens, idx):
+    return Case(
+        *[When(cond, then=Value(d[idx])) for cond, d in whens],
+        default=Value(ZERO),
+        output_field=MONEY,
+    )
+
+
+def _increment(qs, whens, **extra):
+    qs.update(
+        income=F("income") + _case(whens, 0),
+        expense=F("expense") + _case(whens, 1),
+        **extra,
+    )
+
+
+def post(entries, create=True):
+    """
+    Deltalarni AccountBalance va AccountRollup ga F() orqali qo‘shadi.
+    Nechta yozuv bo‘lishidan qat'i nazar, 4 tadan ortiq so‘rov bajarilmaydi.
+    create=False — yo‘q qatorlar yaratilmaydi (o‘chirish paytida, hisob ham o‘chayotgan bo‘lishi mumkin).
+    """
+    balances, rollups = _collect(entries)
+    # sana boshqa oyga ko‘chsa balans o‘zgarmaydi, lekin ikki rollup o‘zgaradi
+    if not balances and not rollups:
+        return
+
+    with db_transaction.atomic():
+        if create:
+            if balances:
+                AccountBalance.objects.bulk_create(
+                    [AccountBalance(account_id=a) for a in balances], ignore_conflicts=True
+                )
+            AccountRollup.objects.bulk_create(
+                [AccountRollup(account_id=a, month=m) for a, m in rollups], ignore_conflicts=True
+            )
+
+        if balances:
+            _increment(
+                AccountBalance.objects.filter(account_id__in=list(balances)),
+                [(Q(account_id=a), d) for a, d in balances.items()],
+                updated_at=timezone.now(),
+            )
+
+        if rollups:
+            # account × month to‘plami aniq kalitlardan kengroq bo‘lishi mumkin — ortiqcha qatorlarga Case 0 qo‘shadi
+            _increment(
+                AccountRollup.objects.filter(
+                    account_id__in={a for a, _m in rollups}, month__in={m for _a, m in rollups}
+                ),
+                [(Q(account_id=a, month=m), d) for (a, m), d in rollups.items()],
+            )
+
+
+def post_change(old, new):
+    post([(old, -1), (new, 1)])
+
+
+def post_created(transactions):
+    post([(t.ledger_entry(), 1) for t in transactions])
+
+
+def post_deleted(entry):
+    post([(entry, -1)], create=False)
+
+
+def _balance_rows(user):
+    return (
+        AccountBalance.objects
+        .filter(account__user=user)
+        .values("account__currency")
+        .annotate(income=Sum("income"), expense=Sum("expense"))
+        .order_by()
+    )
+
+
+def currency_totals(user):
+    """
+    totals.currency_totals() bilan bir xil shakl, lekin tranzaksiyalar emas,
+    AccountBalance qatorlari (hisoblar soni) bo‘yicha yig‘iladi.
+    """
+    return totals_from_rows(_balance_rows(user))
+
+
+async def acurrency_totals(user):
+    return totals_from_rows([r async for r in _balance_rows(user)])
+
+
+def with_ledger_balances(accounts):
+    """Account querysetiga saqlangan balansni calculated_balance sifatida qo‘shadi (JOIN, GROUP BY’siz)."""
+    return accounts.annotate(
+        calculated_income=Coalesce(F("ledger_balance__income"), ZERO, output_field=MONEY),
+        calculated_expense=Coalesce(F("ledger_balance__expense"), ZERO, output_field=MONEY),
+    ).annotate(
+        calculated_balance=F("calculated_income") - F("calculated_expense"),
+    )
+
+
+def _raw_balances(accounts):
+    return {
+        a.pk: (a.calculated_income, a.calculated_expense)
+        for a in with_balances(accounts).order_by()
+    }
+
+
+def _raw_rollups(accounts):
+    rows = (
+        Transaction.objects
+        .filter(account__in=accounts)
+        .annotate(m=TruncMonth("date"))
+        .values("account_id", "m")
+        .annotate(
+            income=Coalesce(Sum("amount", filter=Q(type=Transaction.IN_)), ZERO, output_field=MONEY),
+            expense=Coalesce(Sum("amount", filter=Q(type=Transaction.EX_)), ZERO, output_field=MONEY),
+        )
+        .order_by()
+    )
+    return {(r["account_id"], r["m"]): (r["income"], r["expense"]) for r in rows}
+
+
+def rebuild(accounts=None):
+    """Snapshot va rolluplarni xom Transaction jadvalidan qaytadan quradi. Return: (balances, rollups) soni."""
+    if accounts is None:
+        accounts = Account.objects.all()
+    balances = _raw_balances(accounts)
+    rollups = _raw_rollups(accounts)
+
+    with db_transaction.atomic():
+        AccountBalance.objects.filter(account__in=accounts).delete()
+        AccountRollup.objects.filter(account__in=accounts).delete()
+        AccountBalance.objects.bulk_create(
+            [AccountBalance(account_id=a, income=i, expense=e) for a, (i, e) in balances.items()],
+            batch_size=1000,
+        )
+        AccountRollup.objects.bulk_create(
+            [AccountRollup(account_id=a, month=m, income=i, expense=e) for (a, m), (i, e) in rollups.items()],
+            batch_size=1000,
+        )
+    return len(balances), len(rollups)
+
+
+def verify(accounts=None):
+    """Saqlangan qiymatlarni xom ledger bilan solishtiradi. Return: farqlar ro‘yxati (bo‘sh = hammasi to‘g‘ri)."""
+    if accounts is None:
+        accounts = Account.objects.all()
+    problems = []
+
+    stored = {
+        b.account_id: (b.income, b.expense)
+        for b in AccountBalance.objects.filter(account__in=accounts)
+    }
+    for account_id, raw in _raw_balances(accounts).items():
+        got = stored.get(account_id, (ZERO, ZERO))
+        if got != raw:
+            problems.append(f"account={account_id}: saqlangan {got}, haqiqiy {raw}")
+
+    stored = {
+        (r.account_id, r.month): (r.income, r.expense)
+        for r in AccountRollup.objects.filter(account__in=accounts)
+    }
+    raw_rollups = _raw_rollups(accounts)
+    for key in set(stored) | set(raw_rollups):
+        got = stored.get(key, (ZERO, ZERO))
+        raw = raw_rollups.get(key, (ZERO, ZERO))
+        if got != raw:
+            account_id, month = key
+            problems.append(f"account={account_id} {month:%Y-%m}: saqlangan {got}, haqiqiy {raw}")
+    return problems
@@ -0,0 +1,116 @@
+import base64
+import binascii
+import json
+from datetime import date
+from decimal import Decimal, InvalidOperation
+
+from django.db.models import Q
+
+# Har bir tartib (sort key, id) juftligi bo‘yicha — id tenglikni buzadi va kursorni yagona qiladi.
+ORDERINGS = {
+    "-date": ("-date", "-id"),
+    "date": ("date", "id"),
+    "-amount": ("-amount", "-id"),
+    "amount": ("amount", "id"),
+}
+DEFAULT_ORDER = "-date"
+
+PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+MAX_PK = 2 ** 63 - 1  # SQLite/PostgreSQL bigint; kattaroq qiymat bazada OverflowError beradi
+
+
+def _amount(value):
+    amount = Decimal(value)
+    # "NaN"/"Infinity" Decimal’ga o‘tadi, lekin DecimalField.to_python ularni ValidationError bilan rad etadi
+    if not amount.is_finite():
+        raise ValueError(value)
+    return amount
+
+
+_PARSERS = {
+    "date": date.fromisoformat,
+    "amount": _amount,
+}
+
+
+class Page:
+    def __init__(self, object_list, next_cursor, size):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.size = size
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+
+def page_size(value):
+    try:
+        size = int(value)
+    except (TypeError, ValueError):
+        return PAGE_SIZE
+    return max(1, min(size, MAX_PAGE_SIZE))
+
+
+def encode_cursor(obj, order):
+    field = ORDERINGS[order][0].lstrip("-")
+    raw = json.dumps([str(getattr(obj, field)), obj.pk]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor, order):
+    """Return: (qiymat, id) yoki buzilgan/eskirgan kursor uchun None."""
+    if not cursor:
+        return None
+    field = ORDERINGS[order][0].lstrip("-")
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        value, pk = json.loads(raw)
+        pk = int(pk)
+        if not 0 < pk <= MAX_PK:
+            return None
+        return _PARSERS[field](value), pk
+    except (binascii.Error, ValueError, TypeError, InvalidOperation):
+        return None
+
+
+def _keyset(qs, order, cursor):
+    if order not in ORDERINGS:
+        order = DEFAULT_ORDER
+    key, tiebreak = ORDERINGS[order]
+    field = key.lstrip("-")
+    op = "lt" if key.startswith("-") else "gt"
+
+    qs = qs.order_by(key, tiebreak)
+    after = decode_cursor(cursor, order)
+    if after:
+        value, pk = after
+        qs = qs.filter(Q(**{f"{field}__{op}": value}) | Q(**{field: value, f"id__{op}": pk}))
+    return qs, order
+
+
+def _page(rows, order, size):
+    next_cursor = encode_cursor(rows[size - 1], order) if len(rows) > size else None
+    return Page(rows[:size], next_cursor, size)
+
+
+def keyset_page(qs, order=DEFAULT_ORDER, cursor=None, size=PAGE_SIZE):
+    """
+    OFFSET’siz sahifalash: oldingi sahifaning oxirgi (qiymat, id) juftligidan keyingi
+    qatorlarni WHERE orqali oladi, shuning uchun chuqur sahifalar ham indeks bo‘yicha tez.
+    """
+    qs, order = _keyset(qs, order, cursor)
+    return _page(list(qs[:size + 1]), order, size)
+
+
+async def akeyset_page(qs, order=DEFAULT_ORDER, cursor=None, size=PAGE_SIZE):
+    qs, order = _keyset(qs, order, cursor)
+    return _page([obj async for obj in qs[:size + 1]], order, size)
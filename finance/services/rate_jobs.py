@@ -0,0 +1,68 @@
+from datetime import timedelta
+
+from django.db import IntegrityError, transaction as db_transaction
+from django.utils import timezone
+
+from finance.models import RateRefreshJob
+from finance.services import cbu
+
+# shu vaqtdan uzoq RUNNING bo‘lib qolgan ish (worker o‘lgan) FAILED deb belgilanadi
+STALE_AFTER = timedelta(minutes=10)
+
+
+def enqueue(user=None, kind=RateRefreshJob.CBU):
+    """Faol ish bo‘lsa o‘shani qaytaradi, aks holda yangisini yaratadi. Return: (job, created)"""
+    active = RateRefreshJob.objects.filter(kind=kind, status__in=RateRefreshJob.ACTIVE).first()
+    if active:
+        return active, False
+    try:
+        with db_transaction.atomic():
+            return RateRefreshJob.objects.create(kind=kind, requested_by=user), True
+    except IntegrityError:
+        # boshqa so‘rov bizdan oldin yaratdi
+        return RateRefreshJob.objects.get(kind=kind, status__in=RateRefreshJob.ACTIVE), False
+
+
+def latest(kind=RateRefreshJob.CBU):
+    return RateRefreshJob.objects.filter(kind=kind).first()
+
+
+def _expire_stale(kind):
+    RateRefreshJob.objects.filter(
+        kind=kind, status=RateRefreshJob.RUNNING, started_at__lt=timezone.now() - STALE_AFTER
+    ).update(status=RateRefreshJob.FAILED, finished_at=timezone.now(), message="Vaqt tugadi (worker javob bermadi)")
+
+
+def claim(kind=RateRefreshJob.CBU):
+    """
+    Navbatdagi ishni PENDING -> RUNNING shartli UPDATE bilan egallaydi. Bir nechta worker
+    bir vaqtda chaqirsa ham faqat bittasi 1 qator yangilaydi — qolganlari None oladi.
+    """
+    _expire_stale(kind)
+    job = RateRefreshJob.objects.filter(kind=kind, status=RateRefreshJob.PENDING).first()
+    if job is None:
+        return None
+    claimed = RateRefreshJob.objects.filter(pk=job.pk, status=RateRefreshJob.PENDING).update(
+        status=RateRefreshJob.RUNNING, started_at=timezone.now()
+    )
+    if not claimed:
+        return None
+    job.refresh_from_db()
+    return job
+
+
+def run_pending(kind=RateRefreshJob.CBU, url=cbu.CBU_URL):
+    """Bitta navbatdagi ishni bajaradi. Return: bajarilgan ish yoki None."""
+    job = claim(kind)
+    if job is None:
+        return None
+    try:
+        job.rows = cbu.ingest(url)
+        job.status = RateRefreshJob.DONE
+        job.message = f"{job.rows} ta kurs yozildi" if job.rows else "O‘zgarish yo‘q"
+    except Exception as e:
+        job.status = RateRefreshJob.FAILED
+        job.message = str(e)[:255]
+    job.finished_at = timezone.now()
+    job.save(update_fields=["rows", "status", "message", "finished_at"])
+    return job
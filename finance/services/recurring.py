@@ -0,0 +1,93 @@
+"""
+Takroriy qoidalardan tranzaksiyalar yaratish (manage.py materialize_recurring, qoida qo‘shilganda ham).
+Har bir qoidalar bo‘lagi uchun: muddati kelgan qoidalar (1 so‘rov), allaqachon bor (qoida, sana)
+juftliklari (1 so‘rov), so‘ng bitta atomic blokda bulk_create + transactions_created + qoidalar bulk_update.
+(recurring, date) unikal — qayta ishga tushirish yoki parallel worker dublikat yaratmaydi.
+"""
+from django.db import IntegrityError, transaction as db_transaction
+from django.utils import timezone
+
+from finance.models import RecurringTransaction, Transaction
+from finance.signals import transactions_created
+
+CHUNK_SIZE = 100  # bir atomic blokdagi qoidalar
+BATCH_SIZE = 2000
+# bir o‘tishda bitta qoidadan ko‘pi bilan shuncha sana (bir yil kunlik) — atomic blok va
+# HTTP so‘rov (qoida qo‘shilganda) hajmi start_date qanchalik eski bo‘lishiga bog‘liq emas
+PER_PASS = 366
+
+
+def due_dates(rule, until, limit=PER_PASS):
+    """Return: (until’gacha yaratilmagan sanalar — ko‘pi bilan limit ta, yangi occurrences, yangi next_date)."""
+    n = rule.occurrences
+    dates = []
+    while True:
+        value = rule.nth(n)
+        if value is None or value > until or len(dates) >= limit:
+            return dates, n, value
+        dates.append(value)
+        n += 1
+
+
+def _materialize(rules, until):
+    plans = [(rule, *due_dates(rule, until)) for rule in rules]
+    first = min((dates[0] for _rule, dates, _n, _next in plans if dates), default=None)
+    existing = set()
+    if first:
+        existing = set(
+            Transaction.objects
+            .filter(recurring__in=rules, date__gte=first)
+            .values_list("recurring_id", "date")
+        )
+
+    transactions = []
+    for rule, dates, n, next_date in plans:
+        transactions += [
+            Transaction(
+                user_id=rule.user_id, type=rule.type, account=rule.account, category_id=rule.category_id,
+                currency=rule.account.currency, amount=rule.amount, date=value, note=rule.note, recurring=rule,
+            )
+            for value in dates
+            if (rule.pk, value) not in existing
+        ]
+        rule.occurrences = n
+        rule.next_date = next_date
+        rule.active = next_date is not None
+
+    try:
+        with db_transaction.atomic():
+            Transaction.objects.bulk_create(transactions, batch_size=BATCH_SIZE)
+            transactions_created.send(sender=Transaction, transactions=transactions)
+            RecurringTransaction.objects.bulk_update(rules, ["occurrences", "next_date", "active"])
+    except IntegrityError:
+        # boshqa worker shu qoidalarni bir vaqtda yaratdi — uning natijasi qoladi
+        return None
+    return len(transactions)
+
+
+def materialize(until=None, rules=None, catch_up=True):
+    """
+    until (standart: bugun) gacha barcha foydalanuvchilarning muddati kelgan qoidalarini yaratadi.
+    rules — faqat shu qoidalar (masalan, yangi qo‘shilgan). catch_up=False — har bir qoidadan
+    bitta o‘tish (PER_PASS ta sana), qolganini cron yaratadi. Return: yaratilgan tranzaksiyalar soni.
+    """
+    until = until or timezone.localdate()
+    qs = (
+        RecurringTransaction.objects
+        .filter(active=True, next_date__lte=until)
+        .select_related("account")
+        .order_by("id")
+    )
+    if rules is not None:
+        qs = qs.filter(pk__in=[rule.pk for rule in rules])
+
+    created, last_id = 0, 0
+    while True:
+        chunk = list(qs.filter(pk__gt=last_id)[:CHUNK_SIZE])
+        if not chunk:
+            return created
+        written = _materialize(chunk, until)
+        created += written or 0
+        # PER_PASS’ga yetgan qoidalar hali muddatli — shu bo‘lak qayta o‘qiladi
+        if written is None or not catch_up or not any(r.next_date and r.next_date <= until for r in chunk):
+            last_id = chunk[-1].pk
@@ -0,0 +1,76 @@
+import re
+
+from django.db import connection
+from django.db.models import Case, IntegerField, Q, Value, When
+from django.db.models.expressions import RawSQL
+
+from finance.models import Transaction
+
+FTS_TABLE = "finance_transaction_fts"
+# bm25 og‘irliklari: izoh, kategoriya, kommentlar
+WEIGHTS = (1.0, 2.0, 0.5)
+MAX_TERMS = 8
+
+_available = None
+
+
+def available():
+    """FTS5 jadvali bormi (faqat SQLite; migratsiya boshqa bazalarda uni yaratmaydi)."""
+    global _available
+    if _available is None:
+        _available = connection.vendor == "sqlite" and FTS_TABLE in connection.introspection.table_names()
+    return _available
+
+
+def match_query(q):
+    """
+    Foydalanuvchi matnidan FTS5 so‘rovi: har bir so‘z qo‘shtirnoqda va prefiks (*) bilan,
+    so‘zlar orasida AND. Maxsus belgilar tashlab yuboriladi. Bo‘sh bo‘lsa None.
+    """
+    terms = re.findall(r"\w+", q or "")[:MAX_TERMS]
+    if not terms:
+        return None
+    return " ".join(f'"{t}"*' for t in terms)
+
+
+def filter_transactions(qs, q, user):
+    """
+    qs ni user’ning q ga mos tranzaksiyalari bilan cheklaydi (dashboard qidiruvi).
+    FTS ichki so‘rovi ham user_id bo‘yicha cheklanadi — boshqa foydalanuvchilar mosliklari id ro‘yxatiga tushmaydi.
+    """
+    if not available():
+        return qs.filter(
+            Q(note__icontains=q) | Q(category__name__icontains=q) | Q(comments__text__icontains=q)
+        ).distinct()
+    query = match_query(q)
+    if query is None:
+        return qs
+    return qs.filter(id__in=RawSQL(
+        f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s AND user_id = %s", [query, user.pk]
+    ))
+
+
+def ranked(user, q, limit=10):
+    """Eng mos tranzaksiyalar (bm25 bo‘yicha), avtoto‘ldirish uchun. Return: Transaction ro‘yxati."""
+    if not available():
+        return list(filter_transactions(Transaction.objects.filter(user=user), q, user)
+                    .select_related("account", "category")[:limit])
+    query = match_query(q)
+    if query is None:
+        return []
+    weights = ", ".join(str(w) for w in WEIGHTS)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s AND user_id = %s "
+            f"ORDER BY bm25({FTS_TABLE}, {weights}) LIMIT %s",
+            [query, user.pk, limit],
+        )
+        ids = [row[0] for row in cursor.fetchall()]
+    if not ids:
+        return []
+    position = Case(*[When(pk=pk, then=Value(i)) for i, pk in enumerate(ids)], output_field=IntegerField())
+    return list(
+        Transaction.objects.filter(pk__in=ids, user=user)
+        .select_related("account", "category")
+        .order_by(position)
+    )
@@ -0,0 +1,118 @@
+"""
+Sintetik ma'lumotlar generatori (seed_ledger va bench buyruqlari uchun).
+Hamma narsa bulk_create bilan yoziladi; ledger, analitika keshi va qidiruv indeksi
+oddiy yozuvlardagidek transactions_created signali va triggerlar orqali yangilanadi.
+"""
+import random
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.db import transaction as db_transaction
+from django.utils import timezone
+
+from finance.models import Account, Category, Comment, ExchangeRate, Transaction
+from finance.services import cbu, transfers
+from finance.services.totals import currencies
+from finance.signals import transactions_created
+
+BATCH_SIZE = 5000
+NOTES = ("tushlik", "taksi", "bozor", "kommunal", "internet", "kafe", "dorixona", "kitob", "sovg‘a", "")
+COMMENTS = ("chek bor", "qaytarish kerak", "bonus", "ish bilan bog‘liq", "oylik avans")
+# taxminiy boshlang‘ich kurslar (1 birlik = N UZS)
+START_RATES = {"UZS": 1.0, "USD": 11500.0, "EUR": 12500.0, "RUB": 130.0}
+
+
+def seed_rates(days, end=None, rng=None):
+    """USD/EUR/RUB -> UZS kunlik kurslari (oxirgi `days` kun). Return: yozilgan qatorlar soni."""
+    rng = rng or random.Random(0)
+    end = end or timezone.localdate()
+    rates = []
+    for base in currencies():
+        if base == Account.UZS or base not in START_RATES:
+            continue
+        value = START_RATES[base]
+        for i in range(days):
+            value *= 1 + rng.uniform(-0.004, 0.005)
+            rates.append(ExchangeRate(
+                base=base, quote=Account.UZS, rate=Decimal(f"{value:.6f}"),
+                date=end - timedelta(days=days - 1 - i),
+            ))
+    return cbu.upsert(rates)
+
+
+def _amount(rng, currency):
+    # ~20 USD atrofida log-normal taqsimot, hisob valyutasida
+    usd = rng.lognormvariate(3, 1)
+    value = usd * START_RATES["USD"] / START_RATES.get(currency, 1.0)
+    return max(Decimal(f"{min(value, 1e12):.2f}"), Decimal("0.01"))
+
+
+def _converted(amount, base, quote):
+    value = float(amount) * START_RATES.get(base, 1.0) / START_RATES.get(quote, 1.0)
+    return max(Decimal(f"{value:.2f}"), Decimal("0.01"))
+
+
+def seed_user(username, accounts=4, categories=10, transactions=10000, transfers_count=100,
+              comments=100, days=730, rng=None, batch_size=BATCH_SIZE, progress=None):
+    """
+    Bitta foydalanuvchi va uning ma'lumotlarini yaratadi. Return: User.
+    progress(yozilgan_tranzaksiyalar) — katta hajmlar uchun ixtiyoriy callback.
+    """
+    rng = rng or random.Random(0)
+    today = timezone.localdate()
+    user = User.objects.create_user(username, password="bench-parol")
+
+    codes = currencies()
+    accs = Account.objects.bulk_create([
+        Account(user=user, name=f"Hisob {i + 1}", type=Account.CARD if i % 2 else Account.CASH,
+                currency=codes[i % len(codes)])
+        for i in range(max(accounts, 1))
+    ])
+    cats = Category.objects.bulk_create([
+        Category(user=user, name=f"Kategoriya {i + 1}", type=Category.IN_ if i % 4 == 0 else Category.EX_)
+        for i in range(max(categories, 2))
+    ])
+    by_type = {
+        Transaction.IN_: [c for c in cats if c.type == Category.IN_],
+        Transaction.EX_: [c for c in cats if c.type == Category.EX_],
+    }
+
+    written = 0
+    while written < transactions:
+        batch = []
+        for _ in range(min(batch_size, transactions - written)):
+            tx_type = Transaction.IN_ if rng.random() < 0.25 else Transaction.EX_
+            account = rng.choice(accs)
+            batch.append(Transaction(
+                user=user, type=tx_type, category=rng.choice(by_type[tx_type]), account=account,
+                currency=account.currency, amount=_amount(rng, account.currency),
+                date=today - timedelta(days=rng.randrange(days)), note=rng.choice(NOTES),
+            ))
+        with db_transaction.atomic():
+            Transaction.objects.bulk_create(batch)
+            transactions_created.send(sender=Transaction, transactions=batch)
+        written += len(batch)
+        if progress:
+            progress(written)
+
+    if len(accs) > 1:
+        items = []
+        for _ in range(transfers_count):
+            src, dst = rng.sample(accs, 2)
+            amount = _amount(rng, src.currency)
+            items.append({
+                "from_account": src, "to_account": dst, "amount_from": amount,
+                "amount_to": _converted(amount, src.currency, dst.currency),
+                "date": today - timedelta(days=rng.randrange(days)),
+            })
+        for i in range(0, len(items), transfers.MAX_ITEMS):
+            transfers.create_transfers(user, items[i:i + transfers.MAX_ITEMS])
+
+    ids = list(Transaction.objects.filter(user=user).values_list("id", flat=True)[:comments * 10]) if comments else []
+    if ids:
+        Comment.objects.bulk_create(
+            [Comment(transaction_id=rng.choice(ids), user=user, text=rng.choice(COMMENTS)) for _ in range(comments)],
+            batch_size=batch_size,
+        )
+    return user
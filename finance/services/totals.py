@@ -0,0 +1,154 @@
+from decimal import Decimal
+
+from asgiref.sync import sync_to_async
+from django.db.models import DecimalField, F, Q, Sum
+from django.db.models.functions import Coalesce
+
+from finance.models import Account, Transaction
+from finance.services import exchange
+
+ZERO = Decimal("0")
+
+CURRENT = "current"
+HISTORICAL = "historical"
+VALUATIONS = (CURRENT, HISTORICAL)
+
+
+def _money_sum(field="amount", **filters):
+    return Coalesce(
+        Sum(field, filter=Q(**filters)),
+        ZERO,
+        output_field=DecimalField(max_digits=15, decimal_places=2),
+    )
+
+
+def currencies():
+    return [code for code, _label in Account.CURRENCY]
+
+
+def currency_label(code):
+    return dict(Account.CURRENCY).get(code, code)
+
+
+def totals_from_rows(rows):
+    """
+    [{"account__currency", "income", "expense"}, ...] (GROUP BY valyuta) -> har bir ma'lum valyuta
+    uchun {"income", "expense", "balance"}; qatori yo‘q valyuta nol bilan to‘ldiriladi.
+    """
+    by_code = {r["account__currency"]: r for r in rows}
+    totals = {}
+    for code in currencies():
+        r = by_code.get(code) or {}
+        income = r.get("income") or ZERO
+        expense = r.get("expense") or ZERO
+        totals[code] = {"income": income, "expense": expense, "balance": income - expense}
+    return totals
+
+
+def _grouped(qs):
+    return (
+        qs.order_by()
+        .values("account__currency")
+        .annotate(income=_money_sum(type=Transaction.IN_), expense=_money_sum(type=Transaction.EX_))
+        .order_by()
+    )
+
+
+def currency_totals(qs):
+    """
+    Har bir valyuta bo‘yicha kirim/chiqim/balans — bitta GROUP BY account.currency so‘rovi,
+    valyutalar soni so‘rovni kengaytirmaydi.
+    Return: {"UZS": {"income": .., "expense": .., "balance": ..}, ...}
+    """
+    return totals_from_rows(_grouped(qs))
+
+
+async def acurrency_totals(qs):
+    return totals_from_rows([r async for r in _grouped(qs)])
+
+
+def currency_list(totals, keep=(Account.UZS,)):
+    """
+    Shablonlar uchun: [{"code", "label", "income", "expense", "balance"}, ...] — Account.CURRENCY tartibida.
+    Kirim ham, chiqim ham bo‘lmagan valyutalar (keep’dan tashqari) ko‘rsatilmaydi.
+    """
+    return [
+        {"code": code, "label": currency_label(code), **t}
+        for code, t in totals.items()
+        if code in keep or t["income"] or t["expense"]
+    ]
+
+
+def with_balances(accounts):
+    """
+    Account querysetiga har bir hisob bo‘yicha kirim/chiqim/balansni bitta
+    GROUP BY so‘rovida qo‘shadi (calculated_income, calculated_expense, calculated_balance).
+    """
+    return accounts.annotate(
+        calculated_income=_money_sum("transaction__amount", transaction__type=Transaction.IN_),
+        calculated_expense=_money_sum("transaction__amount", transaction__type=Transaction.EX_),
+    ).annotate(
+        calculated_balance=F("calculated_income") - F("calculated_expense"),
+    )
+
+
+def total_balance(totals, quote=Account.UZS):
+    """Barcha valyutalardagi balansni bugungi kurs bo‘yicha quote valyutada jamlaydi (kursi yo‘q valyuta tashlab ketiladi)."""
+    total = ZERO
+    for code, t in totals.items():
+        try:
+            total += exchange.convert(t["balance"], code, quote)
+        except ValueError:
+            pass
+    return total
+
+
+# kurs seriyasi birinchi murojaatda bazadan yuklanadi — sync kod, alohida oqimda
+atotal_balance = sync_to_async(total_balance)
+
+
+def _daily_rows(qs):
+    return (
+        qs.order_by()
+        .values("account__currency", "date")
+        .annotate(
+            income=_money_sum(type=Transaction.IN_),
+            expense=_money_sum(type=Transaction.EX_),
+        )
+        .order_by("account__currency", "date")
+    )
+
+
+def _convert_daily(rows, quote):
+    series = {}
+    for r in rows:
+        dates, nets = series.setdefault(r["account__currency"], ([], []))
+        dates.append(r["date"])
+        nets.append(r["income"] - r["expense"])
+
+    total = ZERO
+    for code, (dates, nets) in series.items():
+        if code == quote:
+            total += sum(nets, ZERO)
+            continue
+        first = exchange.first_rate_date(code, quote) if code else None
+        if first is None:
+            continue
+        # birinchi kursdan oldingi sanalar eng erta kurs bilan o‘giriladi
+        total += sum(exchange.convert_many(nets, [max(d, first) for d in dates], code, quote), ZERO)
+    return total
+
+
+def historical_balance(qs, quote=Account.UZS):
+    """
+    Har bir tranzaksiyani o‘z sanasidagi kurs bo‘yicha quote valyutaga o‘girib jamlaydi.
+    Bitta GROUP BY (valyuta, sana) so‘rovi + har bir valyuta uchun convert_many() — qator boshiga so‘rov yo‘q.
+    Birinchi kursdan oldingi sanalar eng erta kurs bo‘yicha o‘giriladi; umuman kursi yo‘q valyuta
+    (total_balance’dagi kabi) tashlab ketiladi.
+    """
+    return _convert_daily(_daily_rows(qs), quote)
+
+
+async def ahistorical_balance(qs, quote=Account.UZS):
+    rows = [r async for r in _daily_rows(qs)]
+    return await sync_to_async(_convert_daily)(rows, quote)
@@ -0,0 +1,204 @@
+from django.conf import settings
+from django.core.cache import caches
+from django.core.exceptions import ValidationError
+from django.db import transaction as db_transaction
+
+from finance.models import Account, Category, Transaction, Transfer
+from finance.services.pagination import MAX_PK
+from finance.signals import transactions_created
+
+TRANSFER_CATEGORIES = {
+    Transaction.EX_: "Transfer (chiqim)",
+    Transaction.IN_: "Transfer (kirim)",
+}
+MAX_ITEMS = 500
+
+# Transfer/Transaction.full_clean() uchun: FK’lar oldindan yuklangan, ularni qayta tekshirish so‘rov qiladi
+_TRANSFER_FK = ["user", "from_account", "to_account", "out_tx", "in_tx"]
+_TRANSACTION_FK = ["user", "account", "category"]
+
+
+def _cache():
+    return caches[getattr(settings, "FINANCE_LOOKUP_CACHE", "default")]
+
+
+def _categories_key(user_id):
+    return f"finance:transfer_categories:{user_id}"
+
+
+def invalidate_categories(user_id):
+    _cache().delete(_categories_key(user_id))
+
+
+def transfer_categories(user):
+    """
+    Return: {type: category_id}. settings.FINANCE_LOOKUP_CACHE’da FINANCE_LOOKUP_CACHE_TIMEOUT bilan
+    saqlanadi; kategoriya o‘zgarsa signals tozalaydi (boshqa worker’niki — umumiy backend yoki timeout).
+    """
+    cache = _cache()
+    key = _categories_key(user.pk)
+    ids = cache.get(key)
+    if ids is None:
+        names = {name: tx_type for tx_type, name in TRANSFER_CATEGORIES.items()}
+        ids = {
+            c.type: c.pk
+            for c in Category.objects.filter(user=user, name__in=names)
+            if names.get(c.name) == c.type
+        }
+        for tx_type, name in TRANSFER_CATEGORIES.items():
+            if tx_type not in ids:
+                ids[tx_type] = Category.objects.get_or_create(user=user, type=tx_type, name=name)[0].pk
+        cache.set(key, ids, timeout=getattr(settings, "FINANCE_LOOKUP_CACHE_TIMEOUT", 300))
+    return ids
+
+
+def _pk(value):
+    """Model obyekti, butun son yoki raqamli satr -> id; JSON’dagi ro‘yxat/obyekt/bool va h.k. uchun None."""
+    value = getattr(value, "pk", value)
+    if isinstance(value, str) and value.strip().isdigit():
+        value = int(value)
+    if isinstance(value, int) and not isinstance(value, bool) and 0 < value <= MAX_PK:
+        return value
+    return None
+
+
+def _ids(values):
+    """So‘rov uchun to‘plam — faqat yaroqli id’lar (qolganlari _lookup’da o‘z indeksi bilan xato beradi)."""
+    return {pk for pk in map(_pk, values) if pk is not None}
+
+
+def _accounts(user, ids):
+    return {a.pk: a for a in Account.objects.filter(user=user, pk__in=_ids(ids))}
+
+
+def _check(items):
+    if len(items) > MAX_ITEMS:
+        raise ValidationError({"__all__": [f"Bir so‘rovda ko‘pi bilan {MAX_ITEMS} ta yozuv"]})
+
+
+def _positive(*amounts):
+    if any(a is not None and a <= 0 for a in amounts):
+        raise ValidationError({"amount": ["Summa musbat bo‘lishi kerak."]})
+
+
+def _check_scalars(item):
+    """JSON ro‘yxat/obyekti maydon qiymati bo‘la olmaydi — o‘sha indeks uchun maydon xatosi."""
+    bad = {name: ["Qiymat noto‘g‘ri."] for name, value in item.items() if isinstance(value, (list, dict))}
+    if bad:
+        raise ValidationError(bad)
+
+
+def _full_clean(obj, exclude):
+    try:
+        obj.full_clean(exclude=exclude)
+    except (TypeError, ValueError):
+        # masalan, date: 20260101 — DateField.to_python satr kutadi va ValidationError o‘rniga TypeError beradi
+        raise ValidationError({"__all__": ["Qiymat turi noto‘g‘ri."]})
+
+
+def _lookup(objects, value, name):
+    try:
+        return objects[_pk(value)]
+    except KeyError:
+        raise ValidationError({name: ["Topilmadi yoki sizga tegishli emas."]})
+
+
+def _save(transactions, transfers=()):
+    with db_transaction.atomic():
+        Transaction.objects.bulk_create(transactions)
+        if transfers:
+            # out_tx/in_tx pk’lari yuqoridagi bulk_create’dan keyin ma'lum — Django ularni o‘zi ko‘chiradi
+            Transfer.objects.bulk_create(transfers)
+        transactions_created.send(sender=Transaction, transactions=transactions)
+
+
+def create_transfers(user, items):
+    """
+    items: [{"from_account", "to_account", "amount_from", "amount_to"?, "rate"?, "date", "note"?}, ...]
+    (hisoblar — id yoki Account). Hammasi tekshiriladi, xato bo‘lsa hech narsa yozilmaydi:
+    ValidationError({"<indeks>": [...]}). Aks holda bitta atomic blokda bulk_create.
+    So‘rovlar soni yozuvlar soniga bog‘liq emas: kategoriyalar keshda bo‘lsa 12 ta (testda qayd etilgan).
+    """
+    _check(items)
+    accounts = _accounts(user, [v for item in items for v in (item.get("from_account"), item.get("to_account"))])
+    categories = transfer_categories(user) if items else {}
+
+    transfers, transactions, errors = [], [], {}
+    for i, item in enumerate(items):
+        try:
+            _check_scalars(item)
+            transfer = Transfer(
+                user=user,
+                from_account=_lookup(accounts, item.get("from_account"), "from_account"),
+                to_account=_lookup(accounts, item.get("to_account"), "to_account"),
+                amount_from=item.get("amount_from"),
+                # bo‘sh satr null maydonda clean_fields()dan o‘zgarmay o‘tadi — None qilamiz
+                amount_to=item.get("amount_to") if item.get("amount_to") != "" else None,
+                rate=item.get("rate") if item.get("rate") != "" else None,
+                date=item.get("date"),
+                note=item.get("note") or "",
+            )
+            _full_clean(transfer, _TRANSFER_FK)
+            _positive(transfer.amount_from, transfer.amount_to)
+        except ValidationError as e:
+            errors[str(i)] = e.messages
+            continue
+
+        note = transfer.note[:200]
+        transfer.out_tx = Transaction(
+            user=user, type=Transaction.EX_, category_id=categories[Transaction.EX_],
+            account=transfer.from_account, currency=transfer.from_account.currency,
+            amount=transfer.amount_from, date=transfer.date, note=note,
+        )
+        transfer.in_tx = Transaction(
+            user=user, type=Transaction.IN_, category_id=categories[Transaction.IN_],
+            account=transfer.to_account, currency=transfer.to_account.currency,
+            amount=transfer.amount_to, date=transfer.date, note=note,
+        )
+        transfers.append(transfer)
+        transactions += [transfer.out_tx, transfer.in_tx]
+
+    if errors:
+        raise ValidationError(errors)
+    if transfers:
+        _save(transactions, transfers)
+    return transfers
+
+
+def create_transactions(user, items):
+    """
+    items: [{"type", "account", "category", "amount", "date", "note"?}, ...].
+    create_transfers() kabi: avval hammasi tekshiriladi, keyin bitta bulk_create.
+    """
+    _check(items)
+    accounts = _accounts(user, [item.get("account") for item in items])
+    category_ids = _ids(item.get("category") for item in items)
+    categories = {c.pk: c for c in Category.objects.filter(user=user, pk__in=category_ids)} if items else {}
+
+    transactions, errors = [], {}
+    for i, item in enumerate(items):
+        try:
+            _check_scalars(item)
+            account = _lookup(accounts, item.get("account"), "account")
+            tx = Transaction(
+                user=user,
+                type=item.get("type"),
+                account=account,
+                category=_lookup(categories, item.get("category"), "category"),
+                currency=account.currency,
+                amount=item.get("amount"),
+                date=item.get("date"),
+                note=item.get("note") or "",
+            )
+            _full_clean(tx, _TRANSACTION_FK)
+            _positive(tx.amount)
+        except ValidationError as e:
+            errors[str(i)] = e.messages
+            continue
+        transactions.append(tx)
+
+    if errors:
+        raise ValidationError(errors)
+    if transactions:
+        _save(transactions)
+    return transactions
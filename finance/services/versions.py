@@ -0,0 +1,52 @@
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import IntegrityError, transaction as db_transaction
+from django.db.models import F
+from django.utils import timezone
+
+from finance.models import LedgerVersion
+
+RATES_KEY = "finance:rates_version"
+
+
+def bump(user_ids):
+    """
+    Foydalanuvchilar versiyasini bitta UPDATE bilan oshiradi. Qatori yo‘q foydalanuvchi
+    (eski) hali versiyani o‘qimagan — unga ETag berilmagan, yaratish shart emas.
+    """
+    user_ids = {u for u in user_ids if u}
+    if user_ids:
+        LedgerVersion.objects.filter(user_id__in=user_ids).update(
+            version=F("version") + 1, changed_at=timezone.now()
+        )
+
+
+def current(user):
+    """Return: LedgerVersion (yo‘q bo‘lsa hozirgi vaqt bilan yaratiladi)."""
+    obj = LedgerVersion.objects.filter(user=user).first()
+    if obj is None:
+        try:
+            with db_transaction.atomic():
+                obj = LedgerVersion.objects.create(user=user)
+        except IntegrityError:
+            obj = LedgerVersion.objects.get(user=user)
+    return obj
+
+
+def _cache():
+    # sahifa keshi bilan bir joyda: worker’lar umumiy keshni ko‘rsa, versiyani ham ko‘radi
+    return caches[getattr(settings, "FINANCE_PAGE_CACHE", "default")]
+
+
+def bump_rates():
+    """Kurslar barcha foydalanuvchilar uchun umumiy — bitta global versiya (noyob qiymat)."""
+    _cache().set(RATES_KEY, time.time_ns(), timeout=None)
+
+
+def rates():
+    # kalit keshdan chiqib ketsa ham yangi noyob qiymat olinadi — eski sahifalar qaytmaydi
+    cache = _cache()
+    cache.add(RATES_KEY, time.time_ns(), timeout=None)
+    return cache.get(RATES_KEY)
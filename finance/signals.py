@@ -0,0 +1,103 @@
+from django.contrib.auth.models import User
+from django.db import transaction as db_transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import Signal, receiver
+
+from finance.models import Account, Budget, Category, ExchangeRate, LedgerVersion, Transaction, Transfer
+from finance.services import analytics, budgets, choices, exchange, ledger, versions
+
+# bulk_create save()/post_save’ni chaqirmaydi — ommaviy yozuvchilar (import va h.k.)
+# shu signalni o‘sha atomic blok ichida yuboradi: send(sender=Transaction, transactions=[...])
+transactions_created = Signal()
+
+
+def _years(instance):
+    # _ledger_state — bazadagi eski holat (Transaction.save uni signaldan keyin yangilaydi)
+    old = getattr(instance, "_ledger_state", None)
+    dates = [instance.date, old[3] if old else None]
+    return [d.year for d in dates if d]
+
+
+@receiver(post_save, sender=Transaction)
+def transaction_saved(sender, instance, **kwargs):
+    analytics.invalidate(instance.user_id, _years(instance))
+    versions.bump([instance.user_id])
+
+
+@receiver(post_delete, sender=Transaction)
+def transaction_deleted(sender, instance, **kwargs):
+    # Kaskad o‘chirishlar (Account/Category) ham shu yerdan o‘tadi.
+    ledger.post_deleted(getattr(instance, "_ledger_state", None) or instance.ledger_entry())
+    budgets.post_deleted(getattr(instance, "_budget_state", None) or instance.budget_entry())
+    analytics.invalidate(instance.user_id, _years(instance))
+    versions.bump([instance.user_id])
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def category_changed(sender, instance, **kwargs):
+    from finance.services import transfers  # transfers bu moduldan transactions_created’ni import qiladi
+
+    transfers.invalidate_categories(instance.user_id)
+    choices.invalidate(Category, instance.user_id)
+    # kategoriya nomlari grafik belgilarida (cat_labels)
+    analytics.invalidate_user(instance.user_id)
+    versions.bump([instance.user_id])
+
+
+@receiver(post_save, sender=User)
+def user_saved(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    if created:
+        # versiya qatori oldindan bo‘lsa, sahifa keshi/API birinchi so‘rovda uni yaratib o‘tirmaydi
+        LedgerVersion.objects.get_or_create(user=instance)
+    else:
+        # profil sahifasida ism/familiya bor — admin’dagi tahrir ham keshlangan sahifani eskirtiradi
+        versions.bump([instance.pk])
+
+
+@receiver(post_save, sender=Account)
+@receiver(post_delete, sender=Account)
+def account_changed(sender, instance, **kwargs):
+    choices.invalidate(Account, instance.user_id)
+    # hisob valyutasi qaysi grafikka tushishini belgilaydi
+    analytics.invalidate_user(instance.user_id)
+    versions.bump([instance.user_id])
+
+
+@receiver(post_save, sender=Transfer)
+@receiver(post_delete, sender=Transfer)
+def ledger_object_changed(sender, instance, **kwargs):
+    versions.bump([instance.user_id])
+
+
+@receiver(post_save, sender=ExchangeRate)
+@receiver(post_delete, sender=ExchangeRate)
+def exchange_rate_changed(sender, **kwargs):
+    exchange.invalidate()
+    versions.bump_rates()
+    # commitdan oldin boshqa oqim eski qiymatni qayta yuklagan bo‘lishi mumkin
+    db_transaction.on_commit(exchange.invalidate)
+
+
+@receiver(post_save, sender=Budget)
+@receiver(post_delete, sender=Budget)
+def budget_changed(sender, instance, **kwargs):
+    # byudjetli kategoriyalar to‘plami o‘zgardi; commitdan oldin boshqa oqim eskisini keshlagan bo‘lishi mumkin
+    budgets.invalidate(instance.user_id)
+    db_transaction.on_commit(lambda: budgets.invalidate(instance.user_id))
+
+
+@receiver(transactions_created, sender=Transaction)
+def transactions_bulk_created(sender, transactions, **kwargs):
+    ledger.post_created(transactions)
+    budgets.post_created(transactions)
+    years = {}
+    for t in transactions:
+        t._ledger_state = t.ledger_entry()
+        t._budget_state = t.budget_entry()
+        years.setdefault(t.user_id, set()).add(t.date.year)
+    for user_id, user_years in years.items():
+        analytics.invalidate(user_id, user_years)
+    versions.bump(years)
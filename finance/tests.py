@@ -1,3 +1,1386 @@
-from django.test import TestCase
+import base64
+import csv
+import json
+import random
+import re
+import tempfile
+import threading
+from datetime import date
+from decimal import Decimal
+from io import BytesIO, StringIO
+from itertools import combinations
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import skipUnless
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache, caches
+from django.core.exceptions import ValidationError
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.db.models import Sum
+from django.db.models.functions import TruncMonth
+from django.test import RequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from . import metrics, page_cache, views
+from .forms import BudgetForm, RecurringTransactionForm, TransactionFilterForm, TransactionForm, TransferForm
+from .models import (Account, AccountBalance, AccountRollup, Budget, Category, Comment, ExchangeRate, RateRefreshJob, RecurringTransaction,
+                     Transaction, Transfer)
+from .services import (analytics, budgets, cbu, choices, exchange, export, forecast, importer, ledger, rate_jobs,
+                       recurring, search, seed, transfers)
+from .services.pagination import ORDERINGS, decode_cursor, encode_cursor, keyset_page
+from .services.totals import (_money_sum, currencies, currency_list, currency_totals, historical_balance,
+                              total_balance, with_balances)
+from .signals import transactions_created
+
+
+class LedgerTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user("ali", password="parol12345")
+        cls.cash = Account.objects.create(user=cls.user, name="Naqd", type=Account.CASH, currency=Account.UZS)
+        cls.card = Account.objects.create(user=cls.user, name="Visa", type=Account.CARD, currency=Account.USD)
+        cls.salary = Category.objects.create(user=cls.user, name="Oylik", type=Category.IN_)
+        cls.food = Category.objects.create(user=cls.user, name="Ovqat", type=Category.EX_)
+        ExchangeRate.objects.create(base=Account.USD, quote=Account.UZS, rate=Decimal("12000"), date=date(2026, 1, 1))
+
+    def setUp(self):
+        # jarayon ichidagi keshlar test tranzaksiyalari rollback qilinishini bilmaydi
+        exchange.invalidate()
+        cache.clear()
+
+    @classmethod
+    def add_tx(cls, type, account, amount, on_date, category=None, note=""):
+        if category is None:
+            category = cls.salary if type == Transaction.IN_ else cls.food
+        return Transaction.objects.create(
+            user=cls.user, type=type, category=category, account=account,
+            amount=Decimal(amount), date=on_date, note=note,
+        )
+
+
+@skipUnless(connection.vendor == "sqlite", "EXPLAIN QUERY PLAN — SQLite")
+class IndexUsageTests(LedgerTestCase):
+    def assertUsesIndex(self, qs, index):
+        plan = qs.explain()
+        self.assertIn(f"INDEX {index}", plan)
+
+    def test_dashboard_pages_use_sort_indexes(self):
+        qs = Transaction.objects.filter(user=self.user).select_related("account", "category")
+        self.assertUsesIndex(qs.order_by(*ORDERINGS["-date"])[:51], "tx_user_date_id_idx")
+        self.assertUsesIndex(qs.order_by(*ORDERINGS["amount"])[:51], "tx_user_amount_id_idx")
+
+    def test_report_range_uses_date_index(self):
+        qs = Transaction.objects.filter(user=self.user, date__gte=date(2026, 1, 1), date__lte=date(2026, 1, 31))
+        self.assertUsesIndex(qs.order_by(*ORDERINGS["-date"])[:51], "tx_user_date_id_idx")
+
+    def test_totals_are_covered(self):
+        qs = Transaction.objects.filter(user=self.user, type=Transaction.IN_, account__currency=Account.UZS)
+        self.assertUsesIndex(
+            qs.values("user").annotate(s=_money_sum()), "tx_user_type_acc_amt_idx"
+        )
+        qs = Transaction.objects.filter(user=self.user, date__gte=date(2026, 1, 1), date__lte=date(2026, 1, 31))
+        self.assertUsesIndex(
+            qs.values("user").annotate(s=_money_sum(type=Transaction.IN_, account__currency=Account.UZS)),
+            "tx_user_date_cover_idx",
+        )
+
+    def test_analytics_uses_covering_index(self):
+        base = Transaction.objects.filter(user=self.user, date__year=2026, account__currency=Account.UZS)
+        monthly = base.annotate(m=TruncMonth("date")).values("m", "type").annotate(total=Sum("amount"))
+        self.assertUsesIndex(monthly, "tx_user_date_cover_idx")
+        by_category = base.filter(type=Transaction.EX_).values("category__name").annotate(total=Sum("amount"))
+        self.assertUsesIndex(by_category, "tx_user_date_cover_idx")
+
+    def test_every_filter_combination_uses_an_index(self):
+        params = {"start": "2026-01-01", "end": "2026-02-01", "min_amount": "1", "max_amount": "100",
+                  "account": str(self.cash.pk), "category": str(self.food.pk), "type": "EX", "q": "tushlik"}
+        for n in range(4):
+            for combo in combinations(sorted(params), n):
+                for order in ORDERINGS:
+                    with self.subTest(filters=combo, order=order):
+                        form = TransactionFilterForm({**{k: params[k] for k in combo}, "order": order}, user=self.user)
+                        qs = form.filter(Transaction.objects.filter(user=self.user)).order_by(*ORDERINGS[order])
+                        plan = qs[:51].explain()
+                        self.assertNotRegex(plan, r"SCAN finance_transaction\b(?! USING)")
+                        # boshqa ustun bo‘yicha oraliq + tartib bitta indeksdan chiqmaydi — qolganlari saralashsiz
+                        sort = ORDERINGS[order][0].lstrip("-")
+                        ranges = ("min_amount", "max_amount") if sort == "date" else ("start", "end")
+                        if not set(combo) & set(ranges):
+                            self.assertNotIn("TEMP B-TREE FOR ORDER BY", plan)
+
+    def test_rate_lookup_uses_unique_index(self):
+        qs = ExchangeRate.objects.filter(base=Account.USD, quote=Account.UZS, date__lte=date(2026, 1, 1))[:1]
+        self.assertUsesIndex(qs, "finance_exchangerate_base_quote_date")
+
+
+class LedgerSnapshotTests(LedgerTestCase):
+    def assertLedgerMatchesRaw(self):
+        """Saqlangan AccountBalance/AccountRollup’ni Transaction jadvalidan Python’da hisoblangan yig‘indi bilan solishtiradi."""
+        balances, rollups = {}, {}
+        for t in Transaction.objects.all():
+            idx = 0 if t.type == Transaction.IN_ else 1
+            for totals, key in ((balances, t.account_id), (rollups, (t.account_id, t.date.replace(day=1)))):
+                pair = totals.setdefault(key, [Decimal(0), Decimal(0)])
+                pair[idx] += t.amount
+        stored_balances = {
+            b.account_id: [b.income, b.expense] for b in AccountBalance.objects.all() if b.income or b.expense
+        }
+        stored_rollups = {
+            (r.account_id, r.month): [r.income, r.expense] for r in AccountRollup.objects.all() if r.income or r.expense
+        }
+        self.assertEqual(stored_balances, {k: v for k, v in balances.items() if any(v)})
+        self.assertEqual(stored_rollups, {k: v for k, v in rollups.items() if any(v)})
+        self.assertEqual(ledger.verify(), [])
+
+    def test_create(self):
+        self.add_tx(Transaction.IN_, self.cash, "1000", date(2026, 1, 5))
+        self.add_tx(Transaction.EX_, self.cash, "250.50", date(2026, 1, 20))
+        self.add_tx(Transaction.EX_, self.card, "12", date(2026, 2, 1))
+        self.assertEqual(self.cash.ledger_balance.balance, Decimal("749.50"))
+        self.assertLedgerMatchesRaw()
+
+    def test_update_amount_account_type_and_date(self):
+        other = Account.objects.create(user=self.user, name="Humo", type=Account.CARD, currency=Account.UZS)
+        tx = self.add_tx(Transaction.EX_, self.cash, "100", date(2026, 1, 5))
+        self.add_tx(Transaction.IN_, self.cash, "500", date(2026, 1, 6))
+
+        tx.amount = Decimal("120")
+        tx.save()
+        self.assertLedgerMatchesRaw()
+        tx.account = other
+        tx.save()
+        self.assertLedgerMatchesRaw()
+        tx.type, tx.category = Transaction.IN_, self.salary
+        tx.save()
+        self.assertLedgerMatchesRaw()
+        tx.date = date(2026, 3, 31)
+        tx.save()
+        self.assertLedgerMatchesRaw()
+        tx.account, tx.type, tx.category, tx.amount, tx.date = self.cash, Transaction.EX_, self.food, Decimal("7"), date(2025, 12, 31)
+        tx.save()
+        self.assertLedgerMatchesRaw()
+        self.assertEqual(other.ledger_balance.balance, Decimal("0"))
+
+    def test_delete_and_cascade_delete(self):
+        tx = self.add_tx(Transaction.EX_, self.cash, "100", date(2026, 1, 5))
+        self.add_tx(Transaction.IN_, self.cash, "500", date(2026, 1, 6))
+        self.add_tx(Transaction.IN_, self.card, "40", date(2026, 1, 6))
+        self.add_tx(Transaction.EX_, self.card, "15", date(2026, 2, 6))
+        tx.delete()
+        self.assertLedgerMatchesRaw()
+
+        Transaction.objects.filter(account=self.cash).delete()
+        self.assertLedgerMatchesRaw()
+
+        self.add_tx(Transaction.IN_, self.cash, "300", date(2026, 1, 7))
+        self.food.delete()  # kategoriya bilan birga chiqimlar ham o‘chadi
+        self.assertLedgerMatchesRaw()
+        self.card.delete()
+        self.assertFalse(AccountRollup.objects.filter(account_id=self.card.pk).exists())
+        self.assertLedgerMatchesRaw()
+
+    def test_transactions_created_signal(self):
+        batch = [
+            Transaction(user=self.user, type=t, category=self.salary if t == Transaction.IN_ else self.food,
+                        account=a, amount=Decimal(amount), date=d, currency=a.currency)
+            for t, a, amount, d in (
+                (Transaction.IN_, self.cash, "1000", date(2026, 1, 5)),
+                (Transaction.EX_, self.cash, "300", date(2026, 2, 5)),
+                (Transaction.EX_, self.card, "20", date(2026, 2, 5)),
+            )
+        ]
+        Transaction.objects.bulk_create(batch)
+        transactions_created.send(sender=Transaction, transactions=batch)
+        self.assertLedgerMatchesRaw()
+
+    def test_rebuild_ledger_command(self):
+        self.add_tx(Transaction.IN_, self.cash, "1000", date(2026, 1, 5))
+        self.add_tx(Transaction.EX_, self.card, "20", date(2026, 2, 5))
+        Transaction.objects.filter(account=self.card).update(amount=Decimal("25"))  # signalsiz — snapshot eskiradi
+        AccountRollup.objects.filter(account=self.cash).delete()
+        self.assertNotEqual(ledger.verify(), [])
+        with self.assertRaises(CommandError):
+            call_command("rebuild_ledger", "--verify-only", stdout=StringIO(), stderr=StringIO())
+
+        out = StringIO()
+        call_command("rebuild_ledger", stdout=out)
+        self.assertIn("2 ta balans", out.getvalue())
+        self.assertLedgerMatchesRaw()
+
+
+class ExchangeRateCacheTests(LedgerTestCase):
+    def test_rate_on_or_before_date(self):
+        ExchangeRate.objects.create(base=Account.USD, quote=Account.UZS, rate=Decimal("12500"), date=date(2026, 2, 1))
+        self.assertEqual(exchange.get_rate(Account.USD, Account.UZS, date(2026, 1, 31)), Decimal("12000"))
+        self.assertEqual(exchange.get_rate(Account.USD, Account.UZS, date(2026, 2, 1)), Decimal("12500"))
+        with self.assertRaises(ValueError):
+            exchange.get_rate(Account.USD, Account.UZS, date(2025, 12, 31))
+
+    def test_series_loaded_once(self):
+        with self.assertNumQueries(1):
+            exchange.convert_many(
+                [Decimal("1"), Decimal("2"), Decimal("3")],
+                [date(2026, 1, 1), date(2026, 3, 1), None],
+                Account.USD, Account.UZS,
+            )
+            exchange.get_rate(Account.USD, Account.UZS, date(2026, 5, 1))
+
+    def test_invalidated_on_write(self):
+        self.assertEqual(exchange.get_rate(Account.USD, Account.UZS, date(2026, 3, 1)), Decimal("12000"))
+        rate = ExchangeRate.objects.create(
+            base=Account.USD, quote=Account.UZS, rate=Decimal("12800"), date=date(2026, 3, 1)
+        )
+        self.assertEqual(exchange.get_rate(Account.USD, Account.UZS, date(2026, 3, 1)), Decimal("12800"))
+        rate.delete()
+        self.assertEqual(exchange.get_rate(Account.USD, Account.UZS, date(2026, 3, 1)), Decimal("12000"))
+
+    def test_matrix_inverse_and_triangulation(self):
+        ExchangeRate.objects.create(base=Account.RUB, quote=Account.UZS, rate=Decimal("150"), date=date(2026, 2, 1))
+        with self.assertNumQueries(1):
+            self.assertEqual(exchange.convert(Decimal("24000"), Account.UZS, Account.USD, date(2026, 3, 1)), Decimal("2.00"))
+            # RUB -> UZS -> USD: 150 / 12000
+            self.assertEqual(exchange.convert(Decimal("800"), Account.RUB, Account.USD, date(2026, 3, 1)), Decimal("10.00"))
+            self.assertEqual(exchange.convert(Decimal("1"), Account.USD, Account.RUB, date(2026, 3, 1)), Decimal("80.00"))
+            self.assertEqual(exchange.first_rate_date(Account.RUB, Account.USD), date(2026, 2, 1))
+            with self.assertRaises(ValueError):
+                exchange.get_rate(Account.RUB, Account.USD, date(2026, 1, 15))
+            with self.assertRaises(ValueError):
+                exchange.get_rate(Account.EUR, Account.UZS)
+
+    def test_currency_totals_single_grouped_query(self):
+        eur = Account.objects.create(user=self.user, name="Euro", type=Account.CARD, currency=Account.EUR)
+        ExchangeRate.objects.create(base=Account.EUR, quote=Account.UZS, rate=Decimal("13000"), date=date(2026, 1, 1))
+        self.add_tx(Transaction.IN_, self.cash, "50000", date(2026, 1, 2))
+        self.add_tx(Transaction.IN_, eur, "10", date(2026, 1, 2))
+        self.add_tx(Transaction.EX_, self.card, "1", date(2026, 1, 3))
+
+        with self.assertNumQueries(2):
+            totals = currency_totals(Transaction.objects.filter(user=self.user))
+            balance = total_balance(totals, Account.UZS)
+        self.assertEqual(set(totals), set(currencies()))
+        self.assertEqual(totals[Account.EUR]["balance"], Decimal("10"))
+        self.assertEqual(balance, Decimal("50000") + Decimal("130000") - Decimal("12000"))
+        self.assertEqual([row["code"] for row in currency_list(totals)], [Account.UZS, Account.USD, Account.EUR])
+
+    def test_historical_balance_uses_rate_of_each_day(self):
+        ExchangeRate.objects.create(base=Account.USD, quote=Account.UZS, rate=Decimal("12500"), date=date(2026, 2, 1))
+        eur = Account.objects.create(user=self.user, name="Euro", type=Account.CARD, currency=Account.EUR)
+        self.add_tx(Transaction.IN_, self.cash, "1000", date(2025, 6, 1))
+        self.add_tx(Transaction.IN_, self.card, "10", date(2025, 12, 31))  # birinchi kursdan oldin — 12000
+        self.add_tx(Transaction.IN_, self.card, "2", date(2026, 1, 15))
+        self.add_tx(Transaction.EX_, self.card, "1", date(2026, 2, 3))
+        self.add_tx(Transaction.IN_, eur, "5", date(2026, 1, 2))  # EUR kursi umuman yo‘q
+
+        balance = historical_balance(Transaction.objects.filter(user=self.user), Account.UZS)
+        self.assertEqual(balance, Decimal("1000") + 10 * Decimal("12000") + 2 * Decimal("12000") - Decimal("12500"))
+
+
+class TotalsTests(LedgerTestCase):
+    def test_currency_totals_per_currency(self):
+        self.add_tx(Transaction.IN_, self.cash, "1000000", date(2026, 1, 2))
+        self.add_tx(Transaction.EX_, self.cash, "250000.50", date(2026, 1, 3))
+        self.add_tx(Transaction.EX_, self.cash, "100", date(2026, 2, 1))
+        self.add_tx(Transaction.IN_, self.card, "40", date(2026, 1, 4))
+        self.add_tx(Transaction.EX_, self.card, "55.25", date(2026, 1, 5))
+
+        totals = currency_totals(Transaction.objects.filter(user=self.user))
+        self.assertEqual(totals[Account.UZS], {
+            "income": Decimal("1000000"), "expense": Decimal("250100.50"), "balance": Decimal("749899.50"),
+        })
+        self.assertEqual(totals[Account.USD], {
+            "income": Decimal("40"), "expense": Decimal("55.25"), "balance": Decimal("-15.25"),
+        })
+        self.assertEqual(totals[Account.EUR], {"income": 0, "expense": 0, "balance": 0})
+
+        january = currency_totals(Transaction.objects.filter(user=self.user, date__lt=date(2026, 2, 1)))
+        self.assertEqual(january[Account.UZS]["expense"], Decimal("250000.50"))
+        self.assertEqual(currency_totals(Transaction.objects.none())[Account.UZS]["balance"], 0)
+
+    def test_with_balances_per_account(self):
+        empty = Account.objects.create(user=self.user, name="Humo", type=Account.CARD, currency=Account.UZS)
+        self.add_tx(Transaction.IN_, self.cash, "500", date(2026, 1, 2))
+        self.add_tx(Transaction.IN_, self.cash, "300", date(2026, 1, 3))
+        self.add_tx(Transaction.EX_, self.cash, "120.75", date(2026, 1, 4))
+        self.add_tx(Transaction.EX_, self.card, "9", date(2026, 1, 4))
+
+        with self.assertNumQueries(1):
+            rows = {
+                a.pk: (a.calculated_income, a.calculated_expense, a.calculated_balance)
+                for a in with_balances(Account.objects.filter(user=self.user))
+            }
+        self.assertEqual(rows, {
+            self.cash.pk: (Decimal("800"), Decimal("120.75"), Decimal("679.25")),
+            self.card.pk: (0, Decimal("9"), Decimal("-9")),
+            empty.pk: (0, 0, 0),
+        })
+        # ledger snapshot bilan bir xil
+        stored = {a.pk: a.calculated_balance for a in ledger.with_ledger_balances(Account.objects.filter(user=self.user))}
+        self.assertEqual(stored, {pk: balance for pk, (_i, _e, balance) in rows.items()})
+
+
+class KeysetPaginationTests(LedgerTestCase):
+    def setUp(self):
+        super().setUp()
+        # ko‘p tenglik: 3 xil sana × 3 xil summa, har biridan ikkitadan
+        for d in (date(2026, 1, 1), date(2026, 1, 2), date(2026, 1, 3)):
+            for amount in ("10", "10.50", "200"):
+                self.add_tx(Transaction.EX_, self.cash, amount, d)
+                self.add_tx(Transaction.EX_, self.cash, amount, d)
+
+    def walk(self, order, size):
+        qs = Transaction.objects.filter(user=self.user)
+        pages, cursor = [], None
+        while True:
+            page = keyset_page(qs, order, cursor, size)
+            pages.append([t.pk for t in page])
+            if not page.has_next:
+                return pages
+            cursor = page.next_cursor
+
+    def test_pages_cover_every_row_once_in_order(self):
+        for order, fields in ORDERINGS.items():
+            expected = list(Transaction.objects.filter(user=self.user).order_by(*fields).values_list("pk", flat=True))
+            for size in (1, 4, 5, 18, 50):
+                with self.subTest(order=order, size=size):
+                    pages = self.walk(order, size)
+                    self.assertEqual([pk for page in pages for pk in page], expected)
+                    self.assertTrue(all(len(page) == size for page in pages[:-1]))
+                    self.assertEqual(len(pages), -(-len(expected) // size))
+
+    def test_cursor_round_trip(self):
+        tx = Transaction.objects.filter(user=self.user, amount=Decimal("10.50")).first()
+        for order, value in (("-date", tx.date), ("date", tx.date), ("amount", Decimal("10.50")), ("-amount", tx.amount)):
+            with self.subTest(order=order):
+                self.assertEqual(decode_cursor(encode_cursor(tx, order), order), (value, tx.pk))
+        for bad in ("", "!!!", encode_cursor(tx, "amount") + "x", "WyJ4IiwgMV0"):  # WyJ4IiwgMV0 = ["x", 1]
+            with self.subTest(cursor=bad):
+                self.assertIsNone(decode_cursor(bad, "-date"))
+
+    def test_non_finite_amount_cursor_falls_back(self):
+        self.client.force_login(self.user)
+        qs = Transaction.objects.filter(user=self.user)
+        first = [t.pk for t in keyset_page(qs, "amount", None, 5)]
+        for value, pk in [(v, 1) for v in ("NaN", "sNaN", "Infinity", "-Infinity")] + [("10", 2 ** 63)]:
+            cursor = base64.urlsafe_b64encode(json.dumps([value, pk]).encode()).decode().rstrip("=")
+            with self.subTest(value=value, pk=pk):
+                for order in ("amount", "-amount"):
+                    self.assertIsNone(decode_cursor(cursor, order))
+                self.assertEqual([t.pk for t in keyset_page(qs, "amount", cursor, 5)], first)
+                for url in ("/uz/", "/uz/api/transactions/"):
+                    self.assertEqual(self.client.get(url, {"order": "-amount", "cursor": cursor}).status_code, 200)
+
+    def test_bad_cursor_and_order_fall_back(self):
+        qs = Transaction.objects.filter(user=self.user)
+        first = [t.pk for t in keyset_page(qs, "-date", None, 5)]
+        self.assertEqual([t.pk for t in keyset_page(qs, "-date", "yomon", 5)], first)
+        self.assertEqual([t.pk for t in keyset_page(qs, "user__password", None, 5)], first)
+        # date kursori amount tartibiga berilsa (sana Decimal emas) — birinchi sahifa
+        date_cursor = keyset_page(qs, "-date", None, 5).next_cursor
+        self.assertEqual([t.pk for t in keyset_page(qs, "amount", date_cursor, 5)],
+                         [t.pk for t in keyset_page(qs, "amount", None, 5)])
+
+
+class AnalyticsCacheTests(LedgerTestCase):
+    def test_closed_year_is_served_from_cache(self):
+        self.add_tx(Transaction.IN_, self.cash, "100", date(2025, 3, 1))
+        first = analytics.yearly_series(self.user.id, 2025, Account.UZS)
+        with self.assertNumQueries(0):
+            self.assertEqual(analytics.yearly_series(self.user.id, 2025, Account.UZS), first)
+
+    def test_write_invalidates_only_its_year(self):
+        tx = self.add_tx(Transaction.IN_, self.cash, "100", date(2025, 3, 1))
+        analytics.yearly_series(self.user.id, 2025, Account.UZS)
+        analytics.yearly_series(self.user.id, 2026, Account.UZS)
+
+        self.add_tx(Transaction.EX_, self.cash, "40", date(2026, 1, 5))
+        with self.assertNumQueries(0):
+            analytics.yearly_series(self.user.id, 2025, Account.UZS)
+        self.assertEqual(analytics.yearly_series(self.user.id, 2026, Account.UZS)["expense"], [40.0])
+
+        tx.date = date(2026, 2, 1)
+        tx.save()
+        self.assertEqual(analytics.yearly_series(self.user.id, 2025, Account.UZS)["income"], [])
+        self.assertEqual(analytics.yearly_series(self.user.id, 2026, Account.UZS)["income"], [0, 100.0])
+
+        tx.delete()
+        self.assertEqual(analytics.yearly_series(self.user.id, 2026, Account.UZS)["income"], [0])
+
+    def test_category_and_account_changes_invalidate(self):
+        self.add_tx(Transaction.EX_, self.cash, "40", date(2025, 3, 1))
+        self.add_tx(Transaction.EX_, self.cash, "60", date(2026, 1, 5))
+        self.assertEqual(analytics.yearly_series(self.user.id, 2025, Account.UZS)["cat_labels"], ["Ovqat"])
+
+        self.food.name = "Oziq-ovqat"
+        self.food.save()
+        for year in (2025, 2026):
+            self.assertEqual(analytics.yearly_series(self.user.id, year, Account.UZS)["cat_labels"], ["Oziq-ovqat"])
+
+        self.cash.currency = Account.USD
+        self.cash.save()
+        self.assertEqual(analytics.yearly_series(self.user.id, 2025, Account.UZS)["expense"], [])
+        self.assertEqual(analytics.yearly_series(self.user.id, 2025, Account.USD)["expense"], [40.0])
+
+    def test_year_parameter_is_clamped(self):
+        self.client.force_login(self.user)
+        for value, year in (("100000", 9999), ("0", 1), ("-5", 1), ("x", date.today().year)):
+            with self.subTest(year=value):
+                response = self.client.get(f"/uz/analytics/?year={value}")
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response.context["year"], year)
+
+
+@skipUnless(connection.vendor == "sqlite", "FTS5 indeks — SQLite")
+class SearchIndexTests(LedgerTestCase):
+    def find(self, q):
+        return set(search.filter_transactions(Transaction.objects.filter(user=self.user), q, self.user))
+
+    def test_prefix_match_across_note_category_and_comments(self):
+        lunch = self.add_tx(Transaction.EX_, self.cash, "30", date(2026, 1, 2), note="Tushlik oshxonada")
+        salary = self.add_tx(Transaction.IN_, self.cash, "900", date(2026, 1, 3))
+        self.assertEqual(self.find("tush"), {lunch})
+        self.assertEqual(self.find("oyl"), {salary})
+        self.assertEqual(self.find("ovqat tush"), {lunch})
+        self.assertEqual(self.find('"*) OR ('), set())
+
+        comment = Comment.objects.create(transaction=salary, user=self.user, text="yanvar bonusi")
+        self.assertEqual(self.find("bonus"), {salary})
+        comment.delete()
+        self.assertEqual(self.find("bonus"), set())
+
+    def test_index_follows_updates_and_bulk_writes(self):
+        tx = self.add_tx(Transaction.EX_, self.cash, "30", date(2026, 1, 2), note="taksi")
+        tx.note = "metro"
+        tx.save()
+        self.assertEqual(self.find("taksi"), set())
+        self.assertEqual(self.find("metro"), {tx})
+
+        Category.objects.filter(pk=self.food.pk).update(name="Oziq-ovqat")
+        self.assertEqual(self.find("oziq"), {tx})
+
+        Transaction.objects.bulk_create([Transaction(
+            user=self.user, type=Transaction.EX_, category=self.food, account=self.cash,
+            amount=Decimal("5"), date=date(2026, 1, 4), note="avtobus",
+        )])
+        self.assertEqual(len(self.find("avto")), 1)
+        tx.delete()
+        self.assertEqual(self.find("metro"), set())
+
+    def test_ranked_prefers_category_and_stays_per_user(self):
+        misc = Category.objects.create(user=self.user, name="Boshqa", type=Category.EX_)
+        by_note = self.add_tx(Transaction.EX_, self.cash, "10", date(2026, 1, 2), misc, note="ovqat uchun pul")
+        by_category = self.add_tx(Transaction.EX_, self.cash, "20", date(2026, 1, 3), note="non")
+        other = User.objects.create_user("vali")
+        acc = Account.objects.create(user=other, name="Naqd", type=Account.CASH, currency=Account.UZS)
+        cat = Category.objects.create(user=other, name="Ovqat", type=Category.EX_)
+        Transaction.objects.create(user=other, type=Transaction.EX_, category=cat, account=acc,
+                                   amount=Decimal("1"), date=date(2026, 1, 2))
+
+        self.assertEqual(search.ranked(self.user, "ovqat"), [by_category, by_note])
+        # FTS ichki so‘rovining o‘zi foydalanuvchi bo‘yicha cheklangan
+        self.assertEqual(set(search.filter_transactions(Transaction.objects.all(), "ovqat", self.user)),
+                         {by_category, by_note})
+
+
+class BatchWriteTests(LedgerTestCase):
+    def transfers(self, n):
+        return [
+            {"from_account": self.card.pk, "to_account": self.cash.pk, "amount_from": "10",
+             "amount_to": "120000", "date": "2026-01-0%d" % (i % 9 + 1)}
+            for i in range(n)
+        ]
+
+    def test_transfer_batch_query_budget(self):
+        transfers.create_transfers(self.user, self.transfers(1))  # transfer kategoriyalari yaratilib keshlanadi
+        # jami 12: hisoblar (1), 2 ta bulk_create, ledger (4), versiya (1), savepoint’lar (4) —
+        # yozuvlar soniga bog‘liq emas
+        with self.assertNumQueries(12):
+            transfers.create_transfers(self.user, self.transfers(1))
+        with self.assertNumQueries(12):
+            created = transfers.create_transfers(self.user, self.transfers(40))
+
+        self.assertEqual(Transfer.objects.filter(user=self.user).count(), 42)
+        self.assertEqual(created[0].in_tx.currency, Account.UZS)
+        self.assertEqual(Transfer.objects.get(pk=created[-1].pk).out_tx.amount, Decimal("10"))
+        self.assertEqual(ledger.verify(), [])
+
+    def test_invalid_item_rejects_whole_batch(self):
+        items = self.transfers(3)
+        items[1]["amount_to"] = None
+        items[2]["to_account"] = items[2]["from_account"]
+        with self.assertRaises(ValidationError) as ctx:
+            transfers.create_transfers(self.user, items)
+        self.assertEqual(set(ctx.exception.message_dict), {"1", "2"})
+        self.assertFalse(Transaction.objects.exists())
+
+    def test_batch_endpoint(self):
+        self.client.force_login(self.user)
+        items = [{"type": "EX", "account": self.cash.pk, "category": self.food.pk, "amount": "5", "date": "2026-01-02"}]
+        response = self.client.post("/uz/api/transactions/batch/", {"transactions": items}, content_type="application/json")
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(len(response.json()["created"]), 1)
+
+        items[0]["account"] = 10 ** 6
+        response = self.client.post("/uz/api/transactions/batch/", {"transactions": items}, content_type="application/json")
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("0", response.json()["errors"])
+
+    def test_non_scalar_values_are_per_item_errors(self):
+        self.client.force_login(self.user)
+        tx = {"type": "EX", "account": self.cash.pk, "category": self.food.pk, "amount": "5", "date": "2026-01-02"}
+        items = [tx, {**tx, "category": {"a": 1}}, {**tx, "account": [1]}, {**tx, "date": 20260102},
+                 {**tx, "account": 10 ** 30}, {**tx, "account": True}]
+        response = self.client.post("/uz/api/transactions/batch/", {"transactions": items}, content_type="application/json")
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(set(response.json()["errors"]), {"1", "2", "3", "4", "5"})
+
+        transfer = self.transfers(1)[0]
+        items = [transfer, {**transfer, "from_account": [self.card.pk]}, {**transfer, "to_account": {"id": 1}},
+                 {**transfer, "amount_to": ""}]
+        response = self.client.post("/uz/api/transfers/batch/", {"transfers": items}, content_type="application/json")
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(set(response.json()["errors"]), {"1", "2", "3"})
+        self.assertFalse(Transaction.objects.exists())
+
+    def test_transfer_form_view(self):
+        self.client.force_login(self.user)
+        self.assertEqual(self.client.get("/uz/transfer/create/").status_code, 200)
+        data = {"from_account": self.card.pk, "to_account": self.cash.pk, "amount_from": "10",
+                "amount_to": "120000", "date": "2026-01-05"}
+        self.assertRedirects(self.client.post("/uz/transfer/create/", data), "/uz/")
+        self.assertEqual(Transfer.objects.get(user=self.user).in_tx.amount, Decimal("120000"))
+
+        response = self.client.post("/uz/transfer/create/", {**data, "to_account": self.card.pk})
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("to_account", response.context["form"].errors)
+
+
+class ImporterTests(LedgerTestCase):
+    def csv_file(self, text, encoding="utf-8"):
+        return BytesIO(text.encode(encoding))
+
+    def test_parse_amount_and_date(self):
+        self.assertEqual(importer.parse_amount("1 250,5"), Decimal("1250.50"))
+        self.assertEqual(importer.parse_amount("1\xa0000"), Decimal("1000.00"))
+        self.assertEqual(importer.parse_amount("-15.005"), Decimal("-15.00"))
+        for bad in ("", "abc", "NaN", "1e13"):
+            with self.subTest(amount=bad), self.assertRaises(importer.RowError):
+                importer.parse_amount(bad)
+        for value in ("2026-01-05", "05.01.2026", "05.01.2026 14:30", "05/01/2026"):
+            with self.subTest(date=value):
+                self.assertEqual(importer.parse_date(value), date(2026, 1, 5))
+        with self.assertRaises(importer.RowError):
+            importer.parse_date("2026-13-01")
+
+    def test_read_rows_sniffs_delimiter_and_skips_blank_lines(self):
+        rows = list(importer.read_rows(self.csv_file("Date;Type;Amount\n2026-01-05;in;10\n;;\n2026-01-06;ex;5\n")))
+        self.assertEqual(rows, [
+            (2, {"date": "2026-01-05", "type": "in", "amount": "10"}),
+            (4, {"date": "2026-01-06", "type": "ex", "amount": "5"}),
+        ])
+
+    def test_csv_import(self):
+        data = (
+            "date,type,amount,category,account,currency,note\n"
+            "2026-01-05,kirim,\"1 000,50\",Oylik,Naqd,,yanvar\n"
+            "05.01.2026,expense,200,Taksi,Naqd,,\n"
+            "2026-01-06,ex,15,Ovqat,Payme,USD,tushlik\n"
+            "2026-01-07,transfer,1,,Naqd,,\n"
+            "2026-01-07,ex,0,,Naqd,,\n"
+            "2026-01-07,ex,5,,,,\n"
+            "2026-01-07,ex,5,,Yangi,XYZ,\n"
+        )
+        result = importer.import_transactions(self.user, self.csv_file(data), batch_size=2)
+
+        self.assertEqual((result.created, result.skipped), (3, 4))
+        self.assertEqual([e.split(":")[0] for e in result.errors], ["5-qator", "6-qator", "7-qator", "8-qator"])
+        income = Transaction.objects.get(user=self.user, type=Transaction.IN_)
+        self.assertEqual((income.amount, income.account, income.category, income.note),
+                         (Decimal("1000.50"), self.cash, self.salary, "yanvar"))
+        payme = Account.objects.get(user=self.user, name="Payme")
+        self.assertEqual(payme.currency, Account.USD)
+        self.assertEqual(Transaction.objects.get(account=payme).currency, Account.USD)
+        self.assertTrue(Category.objects.filter(user=self.user, name="Taksi", type=Category.EX_).exists())
+        self.assertFalse(Account.objects.filter(user=self.user, name="Yangi").exists())
+        self.assertEqual(ledger.verify(), [])
+
+    def test_account_column_prefers_names_over_ids(self):
+        named = Account.objects.create(user=self.user, name=str(self.cash.pk), type=Account.CARD,
+                                       currency=Account.UZS, last4="4321")
+        data = f"date,type,amount,account\n2026-01-05,ex,1,{self.cash.pk}\n2026-01-05,ex,2,4321\n2026-01-05,ex,3,{self.card.pk}\n"
+        importer.import_transactions(self.user, self.csv_file(data))
+
+        amounts = dict(Transaction.objects.filter(user=self.user).values_list("amount", "account_id"))
+        self.assertEqual(amounts, {Decimal("1"): named.pk, Decimal("2"): named.pk, Decimal("3"): self.card.pk})
+
+    def test_statement_import(self):
+        data = (
+            "Дата;Сумма;Описание\n"
+            "05.01.2026 10:15;-25 000,00;Korzinka\n"
+            "06.01.2026;1 500 000;Oylik\n"
+            "07.01.2026;0;bekor qilingan\n"
+        )
+        result = importer.import_transactions(
+            self.user, self.csv_file(data, "cp1251"), importer.STATEMENT, account=self.cash, encoding="cp1251"
+        )
+        self.assertEqual((result.created, result.skipped), (2, 1))
+        expense = Transaction.objects.get(user=self.user, type=Transaction.EX_)
+        self.assertEqual((expense.amount, expense.date, expense.note), (Decimal("25000"), date(2026, 1, 5), "Korzinka"))
+        self.assertEqual(expense.category.name, importer.IMPORT_CATEGORIES[Transaction.EX_])
+        self.assertEqual(Transaction.objects.get(user=self.user, type=Transaction.IN_).amount, Decimal("1500000"))
+
+        result = importer.import_transactions(self.user, self.csv_file(data, "cp1251"), importer.STATEMENT,
+                                              encoding="cp1251")
+        self.assertEqual((result.created, result.skipped), (0, 3))
+
+    def test_decode_error_mid_file_writes_nothing(self):
+        rows = "".join(f"2026-01-05,ex,{i + 1},Kommunal,Naqd,,to‘lov {i}\n" for i in range(200))
+        data = ("date,type,amount,category,account,currency,note\n" + rows).encode() + "Ёлка\n".encode("cp1251")
+        self.assertGreater(len(data), 4096)  # xato sniff namunasidan keyin, birinchi bo‘laklar yozilgandan so‘ng
+
+        with self.assertRaises(UnicodeDecodeError):
+            importer.import_transactions(self.user, BytesIO(data), batch_size=50)
+        self.assertFalse(Transaction.objects.filter(user=self.user).exists())
+        self.assertFalse(Category.objects.filter(user=self.user, name="Kommunal").exists())
+        self.assertEqual(ledger.verify(), [])
+
+    def test_oversized_field_rolls_back(self):
+        data = ("date,type,amount,category,note\n2026-01-05,ex,1,Kommunal,ok\n"
+                f"2026-01-06,ex,2,Ovqat,\"{'x' * (csv.field_size_limit() + 1)}\"\n").encode()
+        with self.assertRaises(csv.Error):
+            importer.import_transactions(self.user, BytesIO(data), account=self.cash, batch_size=1)
+        self.assertFalse(Transaction.objects.exists())
+        self.assertFalse(Category.objects.filter(user=self.user, name="Kommunal").exists())
+
+        self.client.force_login(self.user)
+        response = self.client.post("/uz/transactions/import/", {
+            "file": SimpleUploadedFile("t.csv", data), "format": importer.CSV, "account": self.cash.pk,
+            "encoding": "utf-8-sig",
+        })
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("file", response.context["form"].errors)
+
+        path = self.enterContext(tempfile.TemporaryDirectory()) + "/t.csv"
+        with open(path, "wb") as f:
+            f.write(data)
+        with self.assertRaises(CommandError):
+            call_command("import_transactions", "ali", path, stdout=StringIO(), stderr=StringIO())
+        self.assertFalse(Transaction.objects.exists())
+
+    def test_import_view(self):
+        self.client.force_login(self.user)
+        self.assertEqual(self.client.get("/uz/transactions/import/").status_code, 200)
+
+        upload = SimpleUploadedFile("t.csv", b"date,type,amount,category\n2026-01-05,ex,7,Ovqat\n2026-01-05,ex,x,Ovqat\n")
+        response = self.client.post("/uz/transactions/import/", {
+            "file": upload, "format": importer.CSV, "account": self.cash.pk, "encoding": "utf-8-sig",
+        })
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response.context["result"].created, response.context["result"].skipped), (1, 1))
+        self.assertEqual(Transaction.objects.get(user=self.user).account, self.cash)
+
+        upload = SimpleUploadedFile("t.csv", "Sana;Summa\n05.01.2026;-5\nЁлка;1\n".encode("cp1251"))
+        response = self.client.post("/uz/transactions/import/", {
+            "file": upload, "format": importer.STATEMENT, "account": self.cash.pk, "encoding": "utf-8-sig",
+        })
+        self.assertIsNone(response.context["result"])
+        self.assertIn("encoding", response.context["form"].errors)
+        self.assertEqual(Transaction.objects.filter(user=self.user).count(), 1)
+
+        response = self.client.post("/uz/transactions/import/", {
+            "file": SimpleUploadedFile("t.csv", b"Sana;Summa\n"), "format": importer.STATEMENT, "encoding": "utf-8-sig",
+        })
+        self.assertIn("account", response.context["form"].errors)
+
+
+class TransactionFilterTests(LedgerTestCase):
+    def setUp(self):
+        super().setUp()
+        self.client.force_login(self.user)
+        self.add_tx(Transaction.IN_, self.cash, "100", date(2026, 1, 5))
+        self.add_tx(Transaction.EX_, self.cash, "30", date(2026, 1, 6), note="tushlik")
+        self.add_tx(Transaction.EX_, self.card, "7", date(2026, 2, 1))
+
+    def api(self, query):
+        return [t["amount"] for t in self.client.get(f"/uz/api/transactions/?{query}").json()["results"]]
+
+    def test_typed_filters(self):
+        self.assertEqual(self.api("type=EX&order=amount"), ["7.00", "30.00"])
+        self.assertEqual(self.api(f"account={self.cash.pk}&min_amount=50"), ["100.00"])
+        self.assertEqual(self.api(f"category={self.food.pk}&end=2026-01-31"), ["30.00"])
+        self.assertEqual(self.api("min_amount=5&max_amount=40&order=-amount"), ["30.00", "7.00"])
+
+    def test_invalid_values_are_ignored(self):
+        form = TransactionFilterForm({"start": "2026-13-45", "min_amount": "abc", "order": "user__password",
+                                      "account": "-1", "end": "2026-01-31"})
+        self.assertEqual(form.ordering, "-date")
+        self.assertEqual(set(form.errors), {"start", "min_amount", "order", "account"})
+        self.assertEqual(self.api("start=2026-13-45&min_amount=abc&order=user__password&end=2026-01-31"),
+                         ["30.00", "100.00"])
+        huge = "99999999999999999999999"
+        form = TransactionFilterForm({"account": huge, "category": huge})
+        self.assertEqual(set(form.errors), {"account", "category"})
+        self.assertEqual(self.api(f"account={huge}&category={huge}"), self.api(""))
+        for url in ("/uz/?start=yomon&max_amount=x", "/uz/report/monthly/?start=2026-99-01",
+                    "/uz/transactions/export.csv?order=note", "/uz/report/monthly/export.csv?end=x",
+                    f"/uz/?account={huge}&category={huge}"):
+            self.assertEqual(self.client.get(url).status_code, 200, url)
+        response = self.client.get(f"/uz/transactions/export.csv?account={huge}")
+        self.assertEqual(len(b"".join(response.streaming_content).decode().splitlines()), 1 + len(self.api("")))
+
+    def test_reversed_range_is_dropped(self):
+        form = TransactionFilterForm({"start": "2026-02-01", "end": "2026-01-01"})
+        self.assertIn("end", form.errors)
+        self.assertEqual(form.params()["start"], "2026-02-01")
+        self.assertEqual(form.params()["end"], "")
+
+
+class ExportTests(LedgerTestCase):
+    def setUp(self):
+        super().setUp()
+        self.client.force_login(self.user)
+
+    def rows(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        content = b"".join(response.streaming_content).decode()
+        self.assertTrue(content.startswith("\ufeff"))
+        return response, list(csv.reader(StringIO(content[1:])))
+
+    def test_header_rows_and_order(self):
+        self.add_tx(Transaction.IN_, self.cash, "1000", date(2026, 1, 5), note="yanvar")
+        self.add_tx(Transaction.EX_, self.card, "12.50", date(2026, 1, 7), note="kitob, daftar")
+        self.add_tx(Transaction.EX_, self.cash, "300", date(2026, 1, 6))
+
+        response, rows = self.rows("/uz/transactions/export.csv")
+        self.assertEqual(response["Content-Disposition"], 'attachment; filename="transactions.csv"')
+        self.assertEqual(rows, [
+            ["date", "type", "category", "account", "currency", "amount", "note"],
+            ["2026-01-07", "EX", "Ovqat", "Visa", "USD", "12.50", "kitob, daftar"],
+            ["2026-01-06", "EX", "Ovqat", "Naqd", "UZS", "300.00", ""],
+            ["2026-01-05", "IN", "Oylik", "Naqd", "UZS", "1000.00", "yanvar"],
+        ])
+        _response, rows = self.rows("/uz/transactions/export.csv?order=amount&type=EX")
+        self.assertEqual([r[5] for r in rows[1:]], ["12.50", "300.00"])
+
+    def test_report_totals_and_filename(self):
+        self.add_tx(Transaction.IN_, self.cash, "1000", date(2026, 1, 5))
+        self.add_tx(Transaction.EX_, self.cash, "300", date(2026, 1, 6))
+        self.add_tx(Transaction.EX_, self.card, "2", date(2026, 1, 7))
+        self.add_tx(Transaction.EX_, self.cash, "50", date(2026, 2, 1))
+
+        response, rows = self.rows("/uz/report/monthly/export.csv?start=2026-01-01&end=2026-01-31")
+        self.assertEqual(response["Content-Disposition"], 'attachment; filename="report_2026-01-01_2026-01-31.csv"')
+        self.assertEqual([r[0] for r in rows[1:4]], ["2026-01-07", "2026-01-06", "2026-01-05"])
+        self.assertEqual(rows[4], [])
+        self.assertEqual(rows[5], ["currency", "income", "expense", "balance"])
+        totals = {r[0]: [Decimal(v) for v in r[1:]] for r in rows[6:]}
+        self.assertEqual(totals[Account.UZS], [1000, 300, 700])
+        self.assertEqual(totals[Account.USD], [0, 2, -2])
+
+    def test_formulas_are_escaped(self):
+        Category.objects.filter(pk=self.food.pk).update(name="=HYPERLINK(\"http://x\")")
+        for note in ("=1+1", "+998901234567", "-2", "@SUM(A1)", "oddiy"):
+            self.add_tx(Transaction.EX_, self.cash, "1", date(2026, 1, 5), note=note)
+
+        _response, rows = self.rows("/uz/transactions/export.csv?order=note")
+        self.assertEqual(sorted(r[6] for r in rows[1:]), ["'+998901234567", "'-2", "'=1+1", "'@SUM(A1)", "oddiy"])
+        self.assertEqual({r[2] for r in rows[1:]}, {"'=HYPERLINK(\"http://x\")"})
+
+    def test_filename_is_sanitized(self):
+        self.assertEqual(export.safe_filename('report_"; x=1\r\nSet-Cookie: a.csv'), "report_x_1_Set-Cookie_a.csv")
+        self.assertEqual(export.safe_filename("../../"), "export.csv")
+
+
+class FormChoicesTests(LedgerTestCase):
+    def transaction_data(self, **extra):
+        return {"type": "EX", "category": self.food.pk, "currency": "UZS", "account": self.cash.pk,
+                "amount": "5000", "date": "2026-01-02", "note": "", **extra}
+
+    def test_forms_use_cached_choices(self):
+        # sovuq kesh: model boshiga bittadan (hisoblar + kategoriyalar) — ikki jadval, bitta so‘rovga sig‘maydi
+        with self.assertNumQueries(2):
+            TransactionForm(user=self.user).as_p()
+        with self.assertNumQueries(0):
+            form = TransactionForm(self.transaction_data(), user=self.user)
+            invalid = TransactionForm(self.transaction_data(account=self.card.pk), user=self.user)
+            transfer = TransferForm({"from_account": self.card.pk, "to_account": self.cash.pk, "amount_from": "1",
+                                     "amount_to": "12000", "date": "2026-01-02"}, user=self.user)
+            TransferForm(user=self.user).as_p()
+        # validatsiya: tanlangan obyektlar hali bazada borligi — forma boshiga bitta so‘rov
+        with self.assertNumQueries(1):
+            self.assertTrue(form.is_valid(), form.errors)
+        with self.assertNumQueries(1):
+            self.assertFalse(invalid.is_valid())
+        with self.assertNumQueries(1):
+            self.assertTrue(transfer.is_valid(), transfer.errors)
+        with self.assertNumQueries(0):
+            form.as_p()
+            invalid.as_p()
+        self.assertEqual(form.cleaned_data["account"].currency, Account.UZS)
+
+        obj = form.save(commit=False)
+        obj.user = self.user
+        obj.save()
+        self.assertEqual(Transaction.objects.get(pk=obj.pk).account, self.cash)
+
+    def test_foreign_and_new_accounts(self):
+        other = User.objects.create_user("vali", password="parol12345")
+        foreign = Account.objects.create(user=other, name="Naqd", type=Account.CASH, currency=Account.UZS)
+        form = TransactionForm(self.transaction_data(account=foreign.pk), user=self.user)
+        self.assertFalse(form.is_valid())
+        self.assertIn("account", form.errors)
+
+        TransactionForm(user=self.user)
+        extra = Account.objects.create(user=self.user, name="Humo", type=Account.CARD, currency=Account.UZS)
+        self.assertTrue(TransactionForm(self.transaction_data(account=extra.pk), user=self.user).is_valid())
+
+    def test_account_deleted_in_another_worker(self):
+        self.client.force_login(self.user)
+        extra = Account.objects.create(user=self.user, name="Humo", type=Account.CARD, currency=Account.UZS)
+        TransactionForm(user=self.user)
+        key = choices._key(Account, self.user.pk)
+        stale, pk = cache.get(key), extra.pk
+        extra.delete()
+        cache.set(key, stale)  # boshqa jarayonning keshi signalni ko‘rmagan
+
+        response = self.client.post("/uz/transactions/create/", self.transaction_data(account=pk))
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("account", response.context["form"].errors)
+        self.assertIsNone(cache.get(key))
+        self.assertFalse(Transaction.objects.exists())
+
+
+class SeedTests(TestCase):
+    def test_seed_user(self):
+        rng = random.Random(1)
+        self.assertEqual(seed.seed_rates(30, rng=rng), 30 * (len(currencies()) - 1))
+        user = seed.seed_user("bench", accounts=3, transactions=250, transfers_count=20, comments=15,
+                              days=30, rng=rng, batch_size=100)
+
+        self.assertEqual(Transaction.objects.filter(user=user, transfer_out=None, transfer_in=None).count(), 250)
+        self.assertEqual(Transfer.objects.filter(user=user).count(), 20)
+        self.assertEqual(Comment.objects.filter(user=user).count(), 15)
+        self.assertEqual(ledger.verify(), [])
+        self.assertEqual(search.ranked(user, seed.NOTES[0], limit=1)[0].user_id, user.pk)
+
+
+class RecurringTests(LedgerTestCase):
+    def rule(self, **kwargs):
+        data = {"user": self.user, "type": Transaction.EX_, "account": self.cash, "category": self.food,
+                "amount": Decimal("1000"), "start_date": date(2026, 1, 31), **kwargs}
+        return RecurringTransaction.objects.create(**data)
+
+    def test_month_end_is_clamped(self):
+        rule = self.rule(end_date=date(2026, 5, 1))
+        self.assertEqual([rule.nth(n) for n in range(5)],
+                         [date(2026, 1, 31), date(2026, 2, 28), date(2026, 3, 31), date(2026, 4, 30), None])
+        leap = self.rule(frequency=RecurringTransaction.YEARLY, start_date=date(2024, 2, 29))
+        self.assertEqual(leap.nth(1), date(2025, 2, 28))
+        self.assertEqual(leap.nth(4), date(2028, 2, 29))
+
+    def test_materialize_is_idempotent(self):
+        monthly = self.rule(end_date=date(2026, 4, 30))
+        weekly = self.rule(frequency=RecurringTransaction.WEEKLY, interval=2, start_date=date(2026, 1, 1))
+        until = date(2026, 6, 30)
+        self.assertEqual(recurring.materialize(until), 4 + 13)
+        self.assertEqual(monthly.transactions.count(), 4)
+        self.assertEqual(list(weekly.transactions.order_by("date").values_list("date", flat=True)[:2]),
+                         [date(2026, 1, 1), date(2026, 1, 15)])
+
+        # qayta ishga tushirish: muddati kelgan qoida yo‘q — bitta so‘rov
+        with self.assertNumQueries(1):
+            self.assertEqual(recurring.materialize(until), 0)
+        monthly.refresh_from_db()
+        self.assertFalse(monthly.active)
+
+        # occurrences yo‘qolgan bo‘lsa ham (recurring, date) kaliti dublikatga yo‘l qo‘ymaydi
+        RecurringTransaction.objects.filter(pk=weekly.pk).update(occurrences=0, next_date=date(2026, 1, 1))
+        self.assertEqual(recurring.materialize(until), 0)
+        self.assertEqual(weekly.transactions.count(), 13)
+        self.assertEqual(ledger.verify(), [])
+
+    def test_catch_up_query_count(self):
+        for i in range(5):
+            self.rule(frequency=RecurringTransaction.DAILY, start_date=date(2026, 1, 1 + i))
+        # qoidalar + mavjud juftliklar + ledger + bulk_update — qoidalar soniga bog‘liq emas
+        # (INSERT’lar faqat bazaning parametr chegarasi bo‘yicha bo‘linadi)
+        with CaptureQueriesContext(connection) as ctx:
+            created = recurring.materialize(date(2026, 3, 31))
+        self.assertEqual(created, sum(90 - i for i in range(5)))
+        other = [q for q in ctx.captured_queries if not q["sql"].startswith('INSERT INTO "finance_transaction"')]
+        self.assertLessEqual(len(other), 14)
+
+    def test_date_overflow_ends_rule(self):
+        rule = self.rule(frequency=RecurringTransaction.YEARLY, interval=RecurringTransaction.MAX_INTERVAL,
+                         start_date=date(9000, 1, 1))
+        self.assertIsNone(rule.nth(3))
+        daily = self.rule(frequency=RecurringTransaction.DAILY, start_date=date(9999, 12, 30))
+        # yillik: 9000, 9365, 9730 — keyingisi 10095 yil; kunlik: 9999-12-30, 9999-12-31
+        self.assertEqual(recurring.materialize(date(9999, 12, 31)), 3 + 2)
+        for r in (rule, daily):
+            r.refresh_from_db()
+            self.assertEqual((r.active, r.next_date), (False, None))
+        self.assertEqual(recurring.materialize(date(9999, 12, 31)), 0)
+
+    def test_catch_up_is_bounded_per_pass(self):
+        rule = self.rule(frequency=RecurringTransaction.DAILY, start_date=date(2025, 1, 1))
+        until = date(2026, 6, 30)  # 546 kun
+        self.assertEqual(recurring.materialize(until, rules=[rule], catch_up=False), recurring.PER_PASS)
+        rule.refresh_from_db()
+        self.assertEqual(rule.next_date, date(2026, 1, 2))
+        self.assertEqual(recurring.materialize(until), 546 - recurring.PER_PASS)
+        self.assertEqual(rule.transactions.count(), 546)
+
+    def test_form_and_view(self):
+        self.client.force_login(self.user)
+        data = {"type": "EX", "category": self.food.pk, "account": self.cash.pk, "amount": "500", "note": "ijara",
+                "frequency": RecurringTransaction.MONTHLY, "interval": "1", "start_date": "2026-01-10"}
+        form = RecurringTransactionForm({**data, "category": self.salary.pk}, user=self.user)
+        self.assertFalse(form.is_valid())
+        form = RecurringTransactionForm({**data, "interval": "10000"}, user=self.user)
+        self.assertFalse(form.is_valid())
+        self.assertIn("interval", form.errors)
+
+        response = self.client.post(reverse("finance:recurring_create"), data)
+        self.assertRedirects(response, reverse("finance:recurring_list"))
+        rule = RecurringTransaction.objects.get(user=self.user)
+        self.assertGreater(rule.transactions.count(), 0)
+        self.assertEqual(self.client.get(reverse("finance:recurring_list")).status_code, 200)
+
+        self.client.post(reverse("finance:recurring_delete", args=[rule.pk]))
+        self.assertFalse(RecurringTransaction.objects.exists())
+        self.assertTrue(Transaction.objects.filter(note="ijara", recurring=None).exists())
+
+
+class BudgetTests(LedgerTestCase):
+    def setUp(self):
+        super().setUp()
+        self.budget = Budget.objects.create(user=self.user, category=self.food, month=date(2026, 1, 1),
+                                            limit=Decimal("10000"))
+
+    def spent(self):
+        self.budget.refresh_from_db()
+        return self.budget.spent
+
+    def test_counter_follows_writes(self):
+        tx = self.add_tx(Transaction.EX_, self.cash, "3000", date(2026, 1, 5))
+        self.add_tx(Transaction.EX_, self.card, "5", date(2026, 1, 5))  # boshqa valyuta
+        self.add_tx(Transaction.IN_, self.cash, "700", date(2026, 1, 5))
+        self.assertEqual(self.spent(), Decimal("3000"))
+
+        tx.amount = Decimal("4000")
+        tx.save()
+        self.assertEqual(self.spent(), Decimal("4000"))
+        moved = Transaction.objects.only("id").get(pk=tx.pk)  # eski holat bazadan o‘qiladi
+        moved.date = date(2026, 2, 1)
+        moved.save()
+        self.assertEqual(self.spent(), Decimal("0"))
+
+        batch = [Transaction(user=self.user, type=Transaction.EX_, category=self.food, account=self.cash,
+                             currency=Account.UZS, amount=Decimal("250"), date=date(2026, 1, d)) for d in (1, 31)]
+        Transaction.objects.bulk_create(batch)
+        transactions_created.send(sender=Transaction, transactions=batch)
+        self.assertEqual(self.spent(), Decimal("500"))
+        batch[0].delete()
+        self.assertEqual(self.spent(), Decimal("250"))
+        self.assertEqual(budgets.verify(), [])
+
+        # byudjet keyin qo‘shilsa — mavjud chiqimlardan boshlanadi
+        feb = Budget.objects.create(user=self.user, category=self.food, month=date(2026, 2, 15), limit=Decimal("1"))
+        self.assertEqual((feb.month, feb.spent, feb.over), (date(2026, 2, 1), Decimal("4000"), True))
+
+    def test_unbudgeted_categories_cost_no_queries(self):
+        other = Category.objects.create(user=self.user, name="Taksi", type=Category.EX_)
+        tx = Transaction(user=self.user, type=Transaction.EX_, category=other, account=self.cash,
+                         currency=Account.UZS, amount=Decimal("1"), date=date(2026, 1, 1))
+        budgets.post_created([tx])  # kesh isiydi
+        with self.assertNumQueries(0):
+            budgets.post_created([tx])
+        tx.category = self.food
+        with self.assertNumQueries(1):
+            budgets.post_created([tx])
+        self.assertEqual(self.spent(), Decimal("1"))
+
+    def test_overview_reads_counters_only(self):
+        self.add_tx(Transaction.EX_, self.cash, "12000", date(2026, 1, 5))
+        self.client.force_login(self.user)
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get("/uz/budgets/?month=2026-01")
+        self.assertContains(response, "12000")
+        self.assertFalse([q for q in ctx.captured_queries if "finance_transaction" in q["sql"]])
+
+    def test_form_rejects_duplicates_and_income(self):
+        data = {"category": self.food.pk, "month": "2026-01", "currency": Account.UZS, "limit": "5"}
+        self.assertFalse(BudgetForm(data, user=self.user).is_valid())
+        self.assertFalse(BudgetForm({**data, "category": self.salary.pk}, user=self.user).is_valid())
+        form = BudgetForm({**data, "currency": Account.USD}, user=self.user)
+        self.assertTrue(form.is_valid(), form.errors)
+
+    def test_reconcile_command(self):
+        self.add_tx(Transaction.EX_, self.cash, "300", date(2026, 1, 5))
+        Budget.objects.update(spent=Decimal("1"))
+        with self.assertRaises(CommandError):
+            call_command("reconcile_budgets", "--verify-only", stdout=StringIO(), stderr=StringIO())
+        call_command("reconcile_budgets", stdout=StringIO())
+        self.assertEqual(self.spent(), Decimal("300"))
+
+    def test_calendar_edges(self):
+        self.client.force_login(self.user)
+        for month, links in (("9999-12", ["?month=9999-11"]), ("0001-01", ["?month=0001-02"])):
+            with self.subTest(month=month):
+                response = self.client.get(f"/uz/budgets/?month={month}")
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(re.findall(r'href="(\?month=[\d-]+)"', response.content.decode()), links)
+        last = Budget.objects.create(user=self.user, category=self.food, month=date(9999, 12, 1), limit=Decimal("1"))
+        self.assertEqual(last.spent, Decimal("0"))
+
+    @override_settings(
+        CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+                "lookup": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "lookup"}},
+        FINANCE_LOOKUP_CACHE="lookup", FINANCE_LOOKUP_CACHE_TIMEOUT=60,
+    )
+    def test_category_cache_uses_configured_alias(self):
+        self.assertEqual(budgets.budgeted_categories([self.user.pk]), {self.user.pk: {self.food.pk}})
+        lookup = caches["lookup"]
+        self.assertEqual(lookup.get(budgets._key(self.user.pk)), {self.food.pk})
+        self.assertIsNone(caches["default"].get(budgets._key(self.user.pk)))
+        Budget.objects.create(user=self.user, category=self.salary, month=date(2026, 1, 1), limit=Decimal("1"))
+        self.assertIsNone(lookup.get(budgets._key(self.user.pk)))
+
+
+@skipUnless(forecast.available(), "NumPy o‘rnatilmagan")
+class ForecastTests(LedgerTestCase):
+    def test_level_and_seasonality(self):
+        import numpy as np
+
+        # 3 yil: har oy +100, dekabrda yana +50; ikkinchi hisob faqat oxirgi 2 oyda faol
+        december = (np.arange(36) % 12) == 11
+        matrix = np.vstack([100 + 50 * december, np.r_[np.zeros(34), 30, 30]])
+        level, seasonal = forecast.decompose(matrix, first_month=0)
+        self.assertAlmostEqual(level[0], 100 + 50 / 12)
+        self.assertAlmostEqual(seasonal[0, 11], 50 - 50 / 12)
+        self.assertAlmostEqual(level[1], 30)  # faollikdan oldingi nollar o‘rtachaga kirmaydi
+        self.assertFalse(seasonal[1].any())
+
+        points = forecast.project(level, seasonal, [1000, 0], current_month=10, months=3)
+        self.assertEqual(np.round(points[0]).tolist(), [1100, 1250, 1350])  # noyabr, dekabr, yanvar
+
+    def test_forecast_from_ledger(self):
+        for month in range(1, 13):
+            self.add_tx(Transaction.IN_, self.cash, "1000", date(2025, month, 10))
+            self.add_tx(Transaction.EX_, self.cash, "400", date(2025, month, 20))
+        self.add_tx(Transaction.EX_, self.card, "5", date(2025, 6, 1))
+        with self.assertNumQueries(2):
+            data = forecast.forecast(self.user, Account.UZS, months=3, today=date(2026, 1, 1))
+        self.assertEqual(data["labels"], ["2026-01", "2026-02", "2026-03"])
+        self.assertEqual([a["name"] for a in data["accounts"]], [str(self.cash)])
+        self.assertEqual(data["total"], [7800.0, 8400.0, 9000.0])
+
+        empty = forecast.forecast(self.user, Account.USD, months=2, today=date(2026, 1, 1))
+        self.assertEqual(empty["total"], [-5.0, -5.0])
+        self.assertIsNone(forecast.forecast(self.user, "EUR"))
+
+    def test_monthly_matrix_drops_rows_outside_window(self):
+        rows = [(self.card.pk, "2025-12-31", -5.0), (self.cash.pk, "2026-01-01", 7.0), (self.cash.pk, "2026-01-31", 1.5),
+                (self.cash.pk, "2026-02-01", 100.0)]
+        matrix = forecast.monthly_matrix(rows, [self.cash.pk, self.card.pk], date(2026, 1, 1), 1)
+        self.assertEqual(matrix.tolist(), [[8.5], [0.0]])
+
+    def test_analytics_page(self):
+        self.add_tx(Transaction.IN_, self.cash, "1000", date(2025, 5, 10))
+        self.client.force_login(self.user)
+        response = self.client.get("/uz/analytics/?months=4")
+        self.assertContains(response, 'id="forecast-data"')
+        self.assertEqual(len(response.context["forecast"]["labels"]), 4)
+
+
+class ApiTests(LedgerTestCase):
+    def setUp(self):
+        super().setUp()
+        self.client.force_login(self.user)
+
+    def test_transactions_are_cursor_paged(self):
+        for day in range(1, 6):
+            self.add_tx(Transaction.EX_, self.cash, str(day), date(2026, 1, day))
+        first = self.client.get("/uz/api/transactions/?size=3").json()
+        self.assertEqual([t["amount"] for t in first["results"]], ["5.00", "4.00", "3.00"])
+        rest = self.client.get(f"/uz/api/transactions/?size=3&cursor={first['next_cursor']}").json()
+        self.assertEqual([t["amount"] for t in rest["results"]], ["2.00", "1.00"])
+        self.assertIsNone(rest["next_cursor"])
+
+    def test_accounts_and_monthly_summary(self):
+        self.add_tx(Transaction.IN_, self.cash, "100", date(2026, 1, 5))
+        self.add_tx(Transaction.EX_, self.cash, "30", date(2026, 2, 5))
+        accounts = {a["name"]: a for a in self.client.get("/uz/api/accounts/").json()["results"]}
+        self.assertEqual(accounts["Naqd"]["balance"], "70.00")
+        summary = self.client.get("/uz/api/summary/monthly/?year=2026").json()["results"]
+        self.assertEqual(
+            [(r["month"], r["income"], r["expense"]) for r in summary],
+            [("2026-01", "100.00", "0.00"), ("2026-02", "0.00", "30.00")],
+        )
+
+    def test_unchanged_ledger_answers_304(self):
+        response = self.client.get("/uz/api/analytics/?year=2026")
+        etag = response["ETag"]
+        self.assertTrue(response.has_header("Last-Modified"))
+        with self.assertNumQueries(3):  # sessiya, foydalanuvchi, versiya
+            cached = self.client.get("/uz/api/analytics/?year=2026", headers={"if-none-match": etag})
+        self.assertEqual(cached.status_code, 304)
+
+        self.add_tx(Transaction.IN_, self.cash, "5", date(2026, 1, 2))
+        fresh = self.client.get("/uz/api/analytics/?year=2026", headers={"if-none-match": etag})
+        self.assertEqual(fresh.status_code, 200)
+        self.assertNotEqual(fresh["ETag"], etag)
+
+        Account.objects.filter(pk=self.cash.pk).first().save()
+        self.assertEqual(
+            self.client.get("/uz/api/accounts/", headers={"if-none-match": fresh["ETag"]}).status_code, 200
+        )
+
+    def test_anonymous_gets_401(self):
+        self.client.logout()
+        self.assertEqual(self.client.get("/uz/api/accounts/").status_code, 401)
+
+
+class PageCacheTests(LedgerTestCase):
+    def get(self, url="/uz/report/monthly/"):
+        return self.client.get(url)["X-Cache"]
+
+    def warm(self, url="/uz/report/monthly/"):
+        self.client.get(url)  # birinchi javob csrftoken cookie o‘rnatadi — keshlanmaydi
+        self.get(url)
+
+    def test_hit_until_ledger_or_rates_change(self):
+        self.client.force_login(self.user)
+        self.warm()
+        self.assertEqual(self.get(), "HIT")
+        self.assertEqual(self.get("/uz/report/monthly/?start=2026-01-01"), "MISS")
+
+        self.add_tx(Transaction.IN_, self.cash, "10", date(2026, 1, 2))
+        self.assertEqual(self.get(), "MISS")
+        self.assertEqual(self.get(), "HIT")
+
+        ExchangeRate.objects.create(base=Account.USD, quote=Account.UZS, rate=Decimal("12100"), date=date(2026, 2, 1))
+        self.assertEqual(self.get(), "MISS")
+
+        stats = page_cache.stats()["monthly_report"]
+        self.assertEqual((stats["hits"], stats["misses"]), (2, 5))
+
+    def test_flash_message_is_shown_once_then_cache_resumes(self):
+        self.client.force_login(self.user)
+        self.client.get("/uz/users/profile/")
+        self.client.post("/uz/users/profile/edit/", {"first_name": "Ali", "last_name": "Valiyev"})
+        response = self.client.get("/uz/users/profile/")
+        self.assertContains(response, "Profil yangilandi")
+        self.assertNotIn("X-Cache", response)
+        self.assertEqual(self.get("/uz/users/profile/"), "MISS")
+        self.assertEqual(self.get("/uz/users/profile/"), "HIT")
+
+    def test_user_edit_outside_views_invalidates(self):
+        self.client.force_login(self.user)
+        self.warm("/uz/users/profile/")
+        self.assertEqual(self.get("/uz/users/profile/"), "HIT")
+        user = User.objects.get(pk=self.user.pk)
+        user.first_name = "Yangi"
+        user.save()  # masalan, admin’dan
+        response = self.client.get("/uz/users/profile/")
+        self.assertEqual(response["X-Cache"], "MISS")
+        self.assertContains(response, "Yangi")
+
+    def test_pages_are_not_shared_between_users(self):
+        self.client.force_login(self.user)
+        self.warm("/uz/users/profile/")
+        other = User.objects.create_user("vali")
+        self.client.force_login(other)
+        response = self.client.get("/uz/users/profile/")
+        self.assertEqual(response["X-Cache"], "MISS")
+        self.assertNotContains(response, "Naqd")
+
+
+METRICS_SETTINGS = dict(
+    MIDDLEWARE=["finance.metrics.QueryMetricsMiddleware", *settings.MIDDLEWARE],
+    TEMPLATES=[{**settings.TEMPLATES[0], "BACKEND": "finance.metrics.TimedDjangoTemplates"}],
+    FINANCE_QUERY_BUDGET_STRICT=True,
+)
+
+
+@override_settings(**METRICS_SETTINGS)
+class QueryBudgetTests(LedgerTestCase):
+    PAGES = (
+        "/uz/", "/uz/?valuation=historical", "/uz/?q=tushlik&order=amount", "/uz/report/monthly/",
+        "/uz/analytics/", "/uz/users/profile/", "/uz/users/profile/?valuation=historical",
+        "/uz/api/transactions/", "/uz/api/accounts/", "/uz/api/summary/monthly/", "/uz/api/analytics/",
+    )
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        for i in range(40):
+            account = cls.cash if i % 2 else cls.card
+            cls.add_tx(Transaction.IN_ if i % 3 else Transaction.EX_, account, str(10 + i), date(2026, 1 + i % 6, 1 + i % 28),
+                       note="tushlik" if i % 5 == 0 else "")
+
+    def setUp(self):
+        super().setUp()
+        metrics.reset()
+        self.client.force_login(self.user)
+
+    def test_pages_stay_within_budget(self):
+        for url in self.PAGES:
+            cache.clear()  # sahifa keshisiz, to‘liq hisoblash yo‘li
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200, url)
+            self.assertIn('desc="', response["Server-Timing"])
+
+    def test_exceeding_budget_fails(self):
+        with override_settings(FINANCE_QUERY_BUDGETS={"finance:dashboard": 2}):
+            with self.assertRaises(metrics.QueryBudgetExceeded):
+                self.client.get("/uz/")
+
+    def test_metrics_endpoint(self):
+        self.client.get("/uz/report/monthly/")
+        self.assertEqual(self.client.get("/uz/metrics/").status_code, 403)
+
+        self.user.is_staff = True
+        self.user.save()
+        data = self.client.get("/uz/metrics/").json()
+        report = data["views"]["finance:monthly_report"]
+        self.assertEqual(report["requests"], 1)
+        self.assertGreater(report["avg_queries"], 0)
+        self.assertGreater(report["avg_template_ms"], 0)
+        self.assertIn("monthly_report", data["page_cache"])
+
+
+class AsyncViewTests(LedgerTestCase):
+    def request(self, path):
+        request = RequestFactory().get(path)
+        request.user = self.user
+
+        async def auser():
+            return self.user
+
+        request.auser = auser
+        return request
+
+    @staticmethod
+    def page(response):
+        return re.sub(r'name="csrfmiddlewaretoken" value="\w+"', "", response.content.decode())
+
+    async def test_async_views_render_like_sync(self):
+        await Transaction.objects.acreate(
+            user=self.user, type=Transaction.IN_, category=self.salary, account=self.card,
+            amount=Decimal("10"), date=date(2026, 1, 2), note="bonus",
+        )
+        for path, sync_view, async_view in (
+            ("/", views.dashboard, views.adashboard),
+            ("/?valuation=historical&q=bonus", views.dashboard, views.adashboard),
+            ("/report/monthly/?start=2026-01-01", views.monthly_report, views.amonthly_report),
+            ("/analytics/?year=2026", views.analytics, views.aanalytics),
+        ):
+            expected = await sync_to_async(sync_view)(self.request(path))
+            await sync_to_async(cache.clear)()  # sahifa keshidan emas, async view’ning o‘zidan
+            response = await async_view(self.request(path))
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(self.page(response), self.page(expected), path)
+
+
+class _CbuStub(BaseHTTPRequestHandler):
+    """cbu.uz o‘rniga: / — bugungi kurslar (ETag bilan), /all/YYYY-MM-DD/ — arxiv."""
+    etag = '"v1"'
+    hits = []
+
+    def do_GET(self):
+        self.hits.append((self.path, self.headers.get("If-None-Match")))
+        if self.path == "/missing/":
+            self.send_response(404)
+            self.end_headers()
+            return
+        if self.path.startswith("/all/"):
+            day = date.fromisoformat(self.path.strip("/").split("/")[1])
+            return self._json(self._feed(day, "12100"))
+        if self.headers.get("If-None-Match") == self.etag:
+            self.send_response(304)
+            self.end_headers()
+            return
+        self._json(self._feed(date(2026, 1, 16), "11969.66"), etag=self.etag)
+
+    @staticmethod
+    def _feed(day, usd):
+        d = day.strftime("%d.%m.%Y")
+        return [
+            {"Ccy": "USD", "Nominal": "1", "Rate": usd, "Date": d},
+            {"Ccy": "EUR", "Nominal": "1", "Rate": "13950.10", "Date": d},
+            {"Ccy": "IRR", "Nominal": "10", "Rate": "2.85", "Date": d},
+        ]
+
+    def _json(self, payload, etag=None):
+        body = json.dumps(payload).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        if etag:
+            self.send_header("ETag", etag)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class CbuIngestTests(LedgerTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), _CbuStub)
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.url = f"http://127.0.0.1:{cls.server.server_port}/"
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        super().tearDownClass()
+
+    def setUp(self):
+        super().setUp()
+        _CbuStub.hits.clear()
+
+    def test_ingest_upserts_every_currency(self):
+        self.assertEqual(cbu.ingest(self.url), 3)
+        rates = dict(ExchangeRate.objects.filter(date=date(2026, 1, 16)).values_list("base", "rate"))
+        self.assertEqual(rates, {"USD": Decimal("11969.66"), "EUR": Decimal("13950.10"), "IRR": Decimal("0.285")})
+        self.assertEqual(exchange.get_rate("USD", "UZS", date(2026, 1, 16)), Decimal("11969.66"))
+
+    def test_unchanged_feed_costs_a_304(self):
+        cbu.ingest(self.url)
+        with self.assertNumQueries(0):
+            self.assertEqual(cbu.ingest(self.url), 0)
+        self.assertEqual(_CbuStub.hits[-1], ("/", _CbuStub.etag))
+
+    def test_backfill_fetches_archive_days(self):
+        count = cbu.backfill(date(2025, 12, 1), date(2025, 12, 5), url=self.url + "all/{date}/", max_workers=3)
+        self.assertEqual(count, 15)
+        self.assertEqual(len(_CbuStub.hits), 5)
+        self.assertEqual(ExchangeRate.objects.filter(base="USD", date__range=(date(2025, 12, 1), date(2025, 12, 5))).count(), 5)
+
+    def test_refresh_job_runs_once(self):
+        job, created = rate_jobs.enqueue(self.user)
+        self.assertTrue(created)
+        self.assertEqual(rate_jobs.enqueue(self.user), (job, False))
+
+        done = rate_jobs.run_pending(url=self.url)
+        self.assertEqual((done.pk, done.status, done.rows), (job.pk, RateRefreshJob.DONE, 3))
+        self.assertIsNone(rate_jobs.run_pending(url=self.url))
+        self.assertEqual(len(_CbuStub.hits), 1)
+
+    def test_failed_job_records_error(self):
+        rate_jobs.enqueue()
+        job = rate_jobs.run_pending(url=self.url + "missing/")
+        self.assertEqual(job.status, RateRefreshJob.FAILED)
+        self.assertTrue(job.message)
+        self.assertTrue(rate_jobs.enqueue()[1])
@@ -1,14 +1,23 @@
+from django.conf import settings
 from django.urls import path
+from . import api
 from .views import (dashboard, transaction_create, transaction_update, transaction_detail, transaction_delete,
                     account_list, account_create, account_update,
                     account_delete, category_list, category_create, category_update, category_delete, monthly_report,
-                    transfer_create, )
+                    transfer_create, analytics, transaction_import, transaction_export, monthly_report_export,
+                    adashboard, amonthly_report, aanalytics, recurring_list, recurring_create, recurring_delete,
+                    budget_list, budget_create, budget_delete, )
+
+if settings.FINANCE_ASYNC_VIEWS:
+    dashboard, monthly_report, analytics = adashboard, amonthly_report, aanalytics
 
 app_name = "finance"
 
 urlpatterns = [
     path('', dashboard, name="dashboard"),
     path('transactions/create/', transaction_create, name="transaction_create"),
+    path('transactions/import/', transaction_import, name="transaction_import"),
+    path('transactions/export.csv', transaction_export, name="transaction_export"),
     path('transactions/<int:pk>/update/', transaction_update, name="transaction_update"),
     path('transactions/<int:pk>/', transaction_detail, name="transaction_detail"),
     path('transactions/<int:pk>/delete/', transaction_delete, name="transaction_delete"),
@@ -21,6 +30,23 @@ urlpatterns = [
     path("categories/<int:pk>/update/", category_update, name="category_update"),
     path("categories/<int:pk>/delete/", category_delete, name="category_delete"),
     path("report/monthly/", monthly_report, name="monthly_report"),
+    path("report/monthly/export.csv", monthly_report_export, name="monthly_report_export"),
     path("transfer/create/", transfer_create, name="transfer_create"),
+    path("recurring/", recurring_list, name="recurring_list"),
+    path("recurring/create/", recurring_create, name="recurring_create"),
+    path("recurring/<int:pk>/delete/", recurring_delete, name="recurring_delete"),
+    path("budgets/", budget_list, name="budget_list"),
+    path("budgets/create/", budget_create, name="budget_create"),
+    path("budgets/<int:pk>/delete/", budget_delete, name="budget_delete"),
+    path("analytics/", analytics, name="analytics"),
+
+    path("api/transactions/", api.transactions, name="api_transactions"),
+    path("api/transactions/search/", api.transaction_search, name="transaction_search"),
+    path("api/transactions/batch/", api.transaction_batch, name="transaction_batch"),
+    path("api/transfers/batch/", api.transfer_batch, name="transfer_batch"),
+    path("api/accounts/", api.accounts, name="api_accounts"),
+    path("api/summary/monthly/", api.monthly_summary, name="api_monthly_summary"),
+    path("api/analytics/", api.analytics, name="api_analytics"),
+    path("metrics/", api.metrics, name="metrics"),
 
 ]
@@ -1,67 +1,124 @@
+import asyncio
+import csv
 from calendar import monthrange
 from datetime import date
 from decimal import Decimal
-from django.db import transaction as db_transaction
-from django.db.models.functions import TruncMonth, Coalesce
+from asgiref.sync import sync_to_async
+from django.core.exceptions import ValidationError
 from django.shortcuts import render, redirect, get_object_or_404
+from django.urls import reverse
 from django.contrib.auth.decorators import login_required
-from django.db.models import Q, Sum
-from django.utils.dateparse import parse_date
-from .models import Account, Category, Transaction
-from .forms import AccountForm, CategoryForm, TransactionForm, CommentForm, TransferForm
-from .services.exchange import convert
+from django.utils.translation import gettext
+from .models import Account, Budget, Category, RecurringTransaction, Transaction
+from .page_cache import cached_page
+from .forms import (AccountForm, CategoryForm, TransactionForm, CommentForm, TransferForm, ImportForm,
+                    TransactionFilterForm, RecurringTransactionForm, BudgetForm)
+from .services import (analytics as analytics_service, budgets as budget_service, choices, export, forecast,
+                       importer, ledger, recurring, transfers)
+from .services.pagination import DEFAULT_ORDER, akeyset_page, keyset_page, page_size
+from .services.totals import (VALUATIONS, CURRENT, HISTORICAL, acurrency_totals, ahistorical_balance,
+                              atotal_balance, currency_list, currency_totals, currencies, historical_balance,
+                              total_balance)
 
 
-def _sum_amount(qs):
-    return qs.aggregate(s=Coalesce(Sum("amount"), Decimal("0")))["s"]
+def _dashboard_filters(request, user=None):
+    user = user or request.user
+    form = TransactionFilterForm(request.GET, user=user)
+    qs = form.filter(Transaction.objects.filter(user=user))
+    return qs, {**form.params(), "filter_form": form, "filtered": form.has_filters()}
+
+
+def _report_filters(request, user=None):
+    qs, filters = _dashboard_filters(request, user)
+    # hisobot doim sana bo‘yicha
+    filters["order"] = DEFAULT_ORDER
+    return qs, filters
+
+
+# async view’lar context processor’lar (request.user) va shablon uchun render’ni oqimda chaqiradi
+arender = sync_to_async(render)
+
+
+def _valuation(request):
+    valuation = request.GET.get("valuation", CURRENT)
+    return valuation if valuation in VALUATIONS else CURRENT
 
 
 @login_required
+@cached_page("dashboard")
 def dashboard(request):
-    q = request.GET.get("q", "")
-    order = request.GET.get("order", "-date")
-    start = request.GET.get("start", "")
-    end = request.GET.get("end", "")
-
-    transactions = Transaction.objects.filter(user=request.user).select_related("account", "category")
-
-    if q:
-        transactions = transactions.filter(Q(note__icontains=q) | Q(category__name__icontains=q))
-    if start:
-        transactions = transactions.filter(date__gte=start)
-    if end:
-        transactions = transactions.filter(date__lte=end)
-
-    transactions = transactions.order_by(order)
-    income_uzs = _sum_amount(transactions.filter(type="IN", account__currency="UZS"))
-    expense_uzs = _sum_amount(transactions.filter(type="EX", account__currency="UZS"))
-    balance_uzs = income_uzs - expense_uzs
-    income_usd = _sum_amount(transactions.filter(type="IN", account__currency="USD"))
-    expense_usd = _sum_amount(transactions.filter(type="EX", account__currency="USD"))
-    balance_usd = income_usd - expense_usd
-    try:
-        usd_to_uzs = convert(balance_usd, "USD", "UZS")
-    except Exception:
-        usd_to_uzs = 0
+    transactions, filters = _dashboard_filters(request)
+    transactions = transactions.select_related("account", "category")
+    valuation = _valuation(request)
+
+    if filters["filtered"]:
+        totals = currency_totals(transactions)
+    else:
+        totals = ledger.currency_totals(request.user)
+    page = keyset_page(
+        transactions, filters["order"], request.GET.get("cursor"), page_size(request.GET.get("size"))
+    )
 
-    total_balance_uzs = balance_uzs + usd_to_uzs
+    if valuation == HISTORICAL:
+        total_balance_uzs = historical_balance(transactions, Account.UZS)
+    else:
+        total_balance_uzs = total_balance(totals, Account.UZS)
 
     return render(request, "dashboard.html", {
-        "transactions": transactions,
-        "income_usd": income_usd,
-        "expense_usd": expense_usd,
-        "balance_usd": balance_usd,
-        "income_uzs": income_uzs,
-        "expense_uzs": expense_uzs,
-        "balance_uzs": balance_uzs,
+        "transactions": page,
+        "page": page,
+        "currency_totals": currency_list(totals),
+        "total_balance_uzs": total_balance_uzs,
+        "valuation": valuation,
+        "accounts": choices.accounts(request.user),
+        "categories": choices.categories(request.user),
+        **filters,
+    })
+
+
+async def _adashboard_balance(transactions, totals, valuation):
+    if valuation == HISTORICAL:
+        return await ahistorical_balance(transactions, Account.UZS)
+    return await atotal_balance(await totals, Account.UZS)
+
+
+@login_required
+@cached_page("dashboard")
+async def adashboard(request):
+    """dashboard() ning ASGI varianti: jami summalar, sahifa va balans bir vaqtda so‘raladi."""
+    user = await request.auser()
+    transactions, filters = _dashboard_filters(request, user)
+    transactions = transactions.select_related("account", "category")
+    valuation = _valuation(request)
+
+    if filters["filtered"]:
+        totals = asyncio.ensure_future(acurrency_totals(transactions))
+    else:
+        totals = asyncio.ensure_future(ledger.acurrency_totals(user))
+    page, total_balance_uzs = await asyncio.gather(
+        akeyset_page(transactions, filters["order"], request.GET.get("cursor"), page_size(request.GET.get("size"))),
+        _adashboard_balance(transactions, totals, valuation),
+    )
+
+    return await arender(request, "dashboard.html", {
+        "transactions": page,
+        "page": page,
+        "currency_totals": currency_list(await totals),
         "total_balance_uzs": total_balance_uzs,
-        "q": q,
-        "order": order,
-        "start": start,
-        "end": end,
+        "valuation": valuation,
+        # filtr ro‘yxatlari keshdan (services.choices) — odatda so‘rovsiz
+        "accounts": await sync_to_async(choices.accounts)(user),
+        "categories": await sync_to_async(choices.categories)(user),
+        **filters,
     })
 
 
+@login_required
+def transaction_export(request):
+    transactions, filters = _dashboard_filters(request)
+    return export.csv_response(transactions, filters["order"], "transactions.csv")
+
+
 @login_required
 def transaction_create(request):
     form = TransactionForm(request.POST or None, user=request.user)
@@ -73,6 +130,27 @@ def transaction_create(request):
     return render(request, 'transaction_form.html', {'form': form})
 
 
+@login_required
+def transaction_import(request):
+    form = ImportForm(request.POST or None, request.FILES or None, user=request.user)
+    result = None
+    if form.is_valid():
+        try:
+            result = importer.import_transactions(
+                request.user,
+                request.FILES["file"].file,
+                form.cleaned_data["format"],
+                account=form.cleaned_data["account"],
+                encoding=form.cleaned_data["encoding"],
+            )
+        except UnicodeDecodeError:
+            form.add_error("encoding", gettext("Fayl kodlashi mos emas."))
+        except csv.Error as e:
+            # masalan, field_size_limit’dan uzun maydon; import atomic — hech narsa yozilmagan
+            form.add_error("file", gettext("Faylni CSV sifatida o‘qib bo‘lmadi: %s") % e)
+    return render(request, "transaction_import.html", {"form": form, "result": result})
+
+
 @login_required
 def transaction_update(request, pk):
     transaction = Transaction.objects.filter(pk=pk, user=request.user).first()
@@ -180,116 +258,192 @@ def category_delete(request, pk):
 
 
 @login_required
+@cached_page("monthly_report")
 def monthly_report(request):
-    start = request.GET.get("start")
-    end = request.GET.get("end")
-    qs = Transaction.objects.filter(user=request.user).select_related("account")
-    if start:
-        qs = qs.filter(date__gte=parse_date(start))
-    if end:
-        qs = qs.filter(date__lte=parse_date(end))
-
-    income_uzs = _sum_amount(qs.filter(type="IN", account__currency="UZS"))
-    expense_uzs = _sum_amount(qs.filter(type="EX", account__currency="UZS"))
-    balance_uzs = income_uzs - expense_uzs
-    income_usd = _sum_amount(qs.filter(type="IN", account__currency="USD"))
-    expense_usd = _sum_amount(qs.filter(type="EX", account__currency="USD"))
-    balance_usd = income_usd - expense_usd
+    qs, filters = _report_filters(request)
+    qs = qs.select_related("account", "category")
+    totals = currency_totals(qs)
+    page = keyset_page(qs, DEFAULT_ORDER, request.GET.get("cursor"), page_size(request.GET.get("size")))
 
     return render(request, "monthly_report.html", {
-        "transactions": qs.order_by("-date"),
-        "income_uzs": income_uzs,
-        "expense_uzs": expense_uzs,
-        "balance_uzs": balance_uzs,
-        "income_usd": income_usd,
-        "expense_usd": expense_usd,
-        "balance_usd": balance_usd,
-        "start": start,
-        "end": end,
+        "transactions": page,
+        "page": page,
+        "currency_totals": currency_list(totals),
+        **filters,
+    })
+
+
+@login_required
+@cached_page("monthly_report")
+async def amonthly_report(request):
+    qs, filters = _report_filters(request, await request.auser())
+    qs = qs.select_related("account", "category")
+    totals, page = await asyncio.gather(
+        acurrency_totals(qs),
+        akeyset_page(qs, DEFAULT_ORDER, request.GET.get("cursor"), page_size(request.GET.get("size"))),
+    )
+
+    return await arender(request, "monthly_report.html", {
+        "transactions": page,
+        "page": page,
+        "currency_totals": currency_list(totals),
+        **filters,
     })
 
 
+@login_required
+def monthly_report_export(request):
+    qs, filters = _report_filters(request)
+    name = "report_{}_{}.csv".format(filters["start"] or "", filters["end"] or "").replace("__", "_")
+    return export.csv_response(qs, DEFAULT_ORDER, name, with_totals=True)
+
+
 @login_required
 def transfer_create(request):
     form = TransferForm(request.POST or None, user=request.user)
     if form.is_valid():
-        obj = form.save(commit=False)
-        obj.user = request.user
-        obj.full_clean()
+        try:
+            transfers.create_transfers(request.user, [form.cleaned_data])
+        except ValidationError as e:
+            form.add_error(None, [m for messages in e.message_dict.values() for m in messages])
+        else:
+            return redirect("finance:dashboard")
+    return render(request, "transfer_form.html", {"form": form})
 
-        with db_transaction.atomic():
-            obj.save()
 
-            cat_out, _ = Category.objects.get_or_create(
-                user=request.user, type="EX", name="Transfer (chiqim)"
-            )
-            cat_in, _ = Category.objects.get_or_create(
-                user=request.user, type="IN", name="Transfer (kirim)"
-            )
+@login_required
+def recurring_list(request):
+    rules = (
+        RecurringTransaction.objects
+        .filter(user=request.user)
+        .select_related("account", "category")
+        .order_by("-active", "next_date", "id")
+    )
+    return render(request, "recurring_list.html", {"rules": rules})
 
-            out_tx = Transaction.objects.create(
-                user=request.user,
-                type="EX",
-                category=cat_out,
-                account=obj.from_account,
-                amount=obj.amount_from,
-                date=obj.date,
-                note=(obj.note or "")[:200],
-            )
 
-            in_amount = obj.amount_to if obj.amount_to is not None else obj.amount_from
-            in_tx = Transaction.objects.create(
-                user=request.user,
-                type="IN",
-                category=cat_in,
-                account=obj.to_account,
-                amount=in_amount,
-                date=obj.date,
-                note=(obj.note or "")[:200],
-            )
-            obj.out_tx = out_tx
-            obj.in_tx = in_tx
-            obj.save(update_fields=["out_tx", "in_tx"])
-        return redirect("finance:dashboard")
-    return render(request, "transfer_form.html", {"form": form})
+@login_required
+def recurring_create(request):
+    form = RecurringTransactionForm(request.POST or None, user=request.user)
+    if form.is_valid():
+        rule = form.save()
+        # o‘tgan sanalar (start_date bugundan oldin bo‘lsa) darhol yaratiladi, bir o‘tish bilan cheklangan
+        recurring.materialize(rules=[rule], catch_up=False)
+        return redirect("finance:recurring_list")
+    return render(request, "recurring_form.html", {"form": form})
+
+
+@login_required
+def recurring_delete(request, pk):
+    rule = get_object_or_404(RecurringTransaction, pk=pk, user=request.user)
+    if request.method == "POST":
+        # yaratilgan tranzaksiyalar qoladi (recurring = NULL)
+        rule.delete()
+        return redirect("finance:recurring_list")
+    return render(request, "confirm_delete.html", {"rule": rule})
+
+
+def _budget_month(request):
+    try:
+        return date.fromisoformat(request.GET.get("month", "") + "-01")
+    except ValueError:
+        return date.today().replace(day=1)
+
+
+def _shift_month(month, n):
+    """Oy ±n; date oralig‘idan (0001-01..9999-12) chiqsa None — sahifada o‘sha havola ko‘rsatilmaydi."""
+    year, index = divmod(month.month - 1 + n, 12)
+    year += month.year
+    return date(year, index + 1, 1) if date.min.year <= year <= date.max.year else None
+
+
+@login_required
+def budget_list(request):
+    month = _budget_month(request)
+    budgets = budget_service.overview(request.user, month)
+    totals = {}
+    for b in budgets:
+        t = totals.setdefault(b.currency, {"code": b.currency, "limit": Decimal(0), "spent": Decimal(0)})
+        t["limit"] += b.limit
+        t["spent"] += b.spent
+    return render(request, "budget_list.html", {
+        "budgets": budgets,
+        "totals": list(totals.values()),
+        "month": month,
+        "prev_month": _shift_month(month, -1),
+        "next_month": _shift_month(month, 1),
+    })
+
+
+@login_required
+def budget_create(request):
+    form = BudgetForm(request.POST or None, user=request.user, initial={"month": _budget_month(request)})
+    if form.is_valid():
+        budget = form.save()
+        return redirect(f"{reverse('finance:budget_list')}?month={budget.month:%Y-%m}")
+    return render(request, "budget_form.html", {"form": form})
+
+
+@login_required
+def budget_delete(request, pk):
+    budget = get_object_or_404(Budget, pk=pk, user=request.user)
+    if request.method == "POST":
+        budget.delete()
+        return redirect(f"{reverse('finance:budget_list')}?month={budget.month:%Y-%m}")
+    return render(request, "confirm_delete.html", {"budget": budget})
+
+
+def _analytics_params(request):
+    try:
+        year = int(request.GET.get("year", date.today().year))
+    except ValueError:
+        year = date.today().year
+    year = max(date.min.year, min(year, date.max.year))
+    currency = request.GET.get("currency", Account.UZS)
+    if currency not in currencies():
+        currency = Account.UZS
+    return year, currency
+
+
+def _forecast_months(request):
+    try:
+        months = int(request.GET.get("months", forecast.DEFAULT_MONTHS))
+    except ValueError:
+        months = forecast.DEFAULT_MONTHS
+    return max(1, min(months, forecast.MAX_MONTHS))
 
 
 @login_required
+@cached_page("analytics")
 def analytics(request):
-    year = int(request.GET.get("year", date.today().year))
-    currency = request.GET.get("currency", "UZS")
-    base = (
-        Transaction.objects
-        .filter(user=request.user, date__year=year, account__currency=currency)
-        .annotate(m=TruncMonth("date"))
-        .values("m", "type")
-        .annotate(total=Sum("amount"))
-        .order_by("m")
-    )
-    bucket = {}
-    for r in base:
-        m = r["m"].strftime("%Y-%m")
-        bucket.setdefault(m, {"IN": 0, "EX": 0})
-        bucket[m][r["type"]] = float(r["total"] or 0)
-
-    labels = sorted(bucket.keys())
-    income = [bucket[m]["IN"] for m in labels]
-    expense = [bucket[m]["EX"] for m in labels]
-    cat_qs = (
-        Transaction.objects
-        .filter(user=request.user, type="EX", date__year=year, account__currency=currency)
-        .values("category__name")
-        .annotate(total=Sum("amount"))
-        .order_by("-total")[:10]
-    )
-    cat_labels = [x["category__name"] for x in cat_qs]
-    cat_values = [float(x["total"] or 0) for x in cat_qs]
+    year, currency = _analytics_params(request)
+    months = _forecast_months(request)
+    series = analytics_service.yearly_series(request.user.id, year, currency)
     return render(request, "analytics.html", {
         "year": year,
         "currency": currency,
-        "labels": labels,
-        "income": income,
-        "expense": expense,
-        "cat_labels": cat_labels,
-        "cat_values": cat_values,
+        "currencies": Account.CURRENCY,
+        "months": months,
+        "forecast": forecast.forecast(request.user, currency, months),
+        **series,
+    })
+
+
+@login_required
+@cached_page("analytics")
+async def aanalytics(request):
+    year, currency = _analytics_params(request)
+    months = _forecast_months(request)
+    user = await request.auser()
+    series, projection = await asyncio.gather(
+        analytics_service.ayearly_series(user.id, year, currency),
+        sync_to_async(forecast.forecast)(user, currency, months),
+    )
+    return await arender(request, "analytics.html", {
+        "year": year,
+        "currency": currency,
+        "currencies": Account.CURRENCY,
+        "months": months,
+        "forecast": projection,
+        **series,
     })
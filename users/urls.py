@@ -1,5 +1,9 @@
+from django.conf import settings
 from django.urls import path
-from .views import register, profile, profile_edit, user_login, user_logout
+from .views import register, profile, aprofile, profile_edit, user_login, user_logout
+
+if settings.FINANCE_ASYNC_VIEWS:
+    profile = aprofile
 
 app_name = 'users'
 
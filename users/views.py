@@ -1,13 +1,17 @@
+import asyncio
 from decimal import Decimal
 
-from django.db.models import DecimalField, Sum
-from django.db.models.functions import Coalesce
+from asgiref.sync import sync_to_async
 from django.shortcuts import render, redirect
 from django.contrib.auth import authenticate, login, logout
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 
-from finance.models import Account, Transaction, ExchangeRate
+from finance.models import Account, Transaction
+from finance.page_cache import cached_page
+from finance.services import exchange, ledger
+from finance.services.totals import (VALUATIONS, CURRENT, HISTORICAL, ahistorical_balance, atotal_balance,
+                                     currency_list, historical_balance, total_balance)
 from .forms import RegisterForm, ProfileEditForm
 
 
@@ -38,54 +42,83 @@ def register(request):
     return render(request, "users/register.html", {"form": form})
 
 
-def _sum_amount(qs):
-    return qs.aggregate(
-        s=Coalesce(
-            Sum("amount"),
-            Decimal("0"),
-            output_field=DecimalField(max_digits=15, decimal_places=2),
-        )
-    )["s"]
-
-
-def _get_usd_rate():
-    obj = ExchangeRate.objects.filter(base="USD", quote="UZS").order_by("-date").first()
-    return obj.rate if obj else Decimal("0")
+def _current_rates(totals):
+    """Ko‘rsatilayotgan har bir valyutaning bugungi UZS kursi (matritsadan, qo‘shimcha so‘rovsiz)."""
+    rates = []
+    for row in totals:
+        if row["code"] == Account.UZS:
+            continue
+        try:
+            rate = exchange.get_rate(row["code"], Account.UZS)
+        except ValueError:
+            rate = Decimal("0")
+        rates.append({"code": row["code"], "rate": rate})
+    return rates
 
 
 @login_required
+@cached_page("profile")
 def profile(request):
-    accounts = list(Account.objects.filter(user=request.user).order_by("-id"))
-    tx = Transaction.objects.filter(user=request.user).select_related("account")
-    for acc in accounts:
-        inc = _sum_amount(tx.filter(type="IN", account=acc))
-        exp = _sum_amount(tx.filter(type="EX", account=acc))
-        acc.calculated_balance = inc - exp
-
-    income_usd = _sum_amount(tx.filter(type="IN", account__currency="USD"))
-    expense_usd = _sum_amount(tx.filter(type="EX", account__currency="USD"))
-    balance_usd = income_usd - expense_usd
-    income_uzs = _sum_amount(tx.filter(type="IN", account__currency="UZS"))
-    expense_uzs = _sum_amount(tx.filter(type="EX", account__currency="UZS"))
-    balance_uzs = income_uzs - expense_uzs
-    usd_rate = _get_usd_rate()
-    total_balance_uzs = balance_uzs + (balance_usd * usd_rate)
+    accounts = list(ledger.with_ledger_balances(Account.objects.filter(user=request.user)).order_by("-id"))
+    by_currency = ledger.currency_totals(request.user)
+    valuation = request.GET.get("valuation", CURRENT)
+    if valuation not in VALUATIONS:
+        valuation = CURRENT
+    if valuation == HISTORICAL:
+        total_balance_uzs = historical_balance(Transaction.objects.filter(user=request.user), Account.UZS)
+    else:
+        total_balance_uzs = total_balance(by_currency, Account.UZS)
+    currency_rows = currency_list(by_currency)
     totals = {
-        "income_usd": income_usd,
-        "expense_usd": expense_usd,
-        "balance_usd": balance_usd,
-        "income_uzs": income_uzs,
-        "expense_uzs": expense_uzs,
-        "balance_uzs": balance_uzs,
-        "usd_rate": usd_rate,
+        "currencies": currency_rows,
+        "rates": _current_rates(currency_rows),
         "total_balance_uzs": total_balance_uzs,
     }
     return render(request, "users/profile.html", {
         "accounts": accounts,
         "totals": totals,
+        "valuation": valuation,
     })
 
 
+@login_required
+@cached_page("profile")
+async def aprofile(request):
+    """profile() ning ASGI varianti: hisoblar va jami summalar bir vaqtda olinadi."""
+    user = await request.auser()
+    valuation = request.GET.get("valuation", CURRENT)
+    if valuation not in VALUATIONS:
+        valuation = CURRENT
+
+    accounts_qs = ledger.with_ledger_balances(Account.objects.filter(user=user)).order_by("-id")
+    accounts, by_currency, historical = await asyncio.gather(
+        _alist(accounts_qs),
+        ledger.acurrency_totals(user),
+        ahistorical_balance(Transaction.objects.filter(user=user), Account.UZS) if valuation == HISTORICAL
+        else asyncio.sleep(0),
+    )
+    if valuation == HISTORICAL:
+        total_balance_uzs = historical
+    else:
+        total_balance_uzs = await atotal_balance(by_currency, Account.UZS)
+    currency_rows = currency_list(by_currency)
+    totals = {
+        "currencies": currency_rows,
+        # kurslar matritsasi balans hisobida yuklangan bo‘ladi — odatda so‘rovsiz
+        "rates": await sync_to_async(_current_rates)(currency_rows),
+        "total_balance_uzs": total_balance_uzs,
+    }
+    return await sync_to_async(render)(request, "users/profile.html", {
+        "accounts": accounts,
+        "totals": totals,
+        "valuation": valuation,
+    })
+
+
+async def _alist(qs):
+    return [obj async for obj in qs]
+
+
 @login_required
 def profile_edit(request):
     form = ProfileEditForm(request.POST or None, instance=request.user)